@@ -1,4 +1,4 @@
-from InlineAgent.tools import MCPStdio
+from InlineAgent.tools import MCPServer, MCPStdio
 from InlineAgent.action_group import ActionGroup
 from InlineAgent.agent import InlineAgent
 from config import monitoring_server_params, jira_server_params
@@ -16,22 +16,18 @@ async def run_cloudguard_agent(input_text=None):
     print("=" * 80)
     print("AWS CloudGuard MCP - Incident Response with Bedrock Inline Agent")
     print("=" * 80)
+    jira_mcp_client = monitoring_mcp_client = None
     try:
-        # Connect to the jira mcp client next
-        print("Connecting to Jira server...")
-        jira_mcp_client = await MCPStdio.create(server_params=jira_server_params)
+        # Connect to the Jira and monitoring mcp servers concurrently
+        print("Connecting to Jira and monitoring servers...")
+        jira_mcp_client, monitoring_mcp_client = await MCPServer.create_many(
+            MCPStdio.create(server_params=jira_server_params),
+            MCPStdio.create(server_params=monitoring_server_params),
+            timeout=60,
+        )
         print("✅ Connected to Jira client")
-        
-        # Add a debug check on Jira client
-        print(f"Jira client type: {type(jira_mcp_client)}")
-        
-        # Connect to the monitoring mcp client first
-        print("Connecting to monitoring server...")
-        monitoring_mcp_client = await MCPStdio.create(server_params=monitoring_server_params)
         print("✅ Connected to monitoring client")
 
-        # Add a debug check on monitoring client
-        print(f"Monitoring client type: {type(monitoring_mcp_client)}")
         print("Creating action group with both clients...")
         
         # Create action group for both MCP servers
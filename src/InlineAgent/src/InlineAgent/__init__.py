@@ -7,10 +7,28 @@ Amazon Bedrock.
 """
 
 from .action_group import ActionGroup, ActionGroups
-from .agent import InlineAgent, CollaboratorAgent, require_confirmation
+from .agent import (
+    InlineAgent,
+    CollaboratorAgent,
+    require_confirmation,
+    ToolExecutionConfig,
+    cpu_bound,
+    tool_timeout,
+)
 from .knowledge_base import knowledgebase_plugin
 from .constants import USER_INPUT_ACTION_GROUP_NAME, TraceColor, Level
 from .utils import AgentAppConfig
+from .clients import ClientRegistry, client_registry
+from .resource_index import ResourceIndex, resource_index
+from .output import (
+    OutputSink,
+    ConsoleSink,
+    LoggerSink,
+    NullSink,
+    BufferedSink,
+    console_sink,
+    null_sink,
+)
 from .observability import *
 from .tools import *
 from .types import *
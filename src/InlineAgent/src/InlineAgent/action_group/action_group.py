@@ -1,6 +1,7 @@
 import json
-from functools import cached_property
+from functools import lru_cache
 import re
+import weakref
 from typing import (
     Annotated,
     List,
@@ -15,8 +16,16 @@ from typing import (
 )
 from inspect import Parameter, signature
 import boto3
-from pydantic import BaseModel, computed_field, model_validator, validate_call, Field
+from pydantic import (
+    BaseModel,
+    computed_field,
+    model_validator,
+    validate_call,
+    Field,
+    PrivateAttr,
+)
 
+from InlineAgent.clients import client_registry
 from InlineAgent.tools import MCPServer
 from InlineAgent.types import APISchema, Executor, FunctionDefination
 
@@ -38,10 +47,18 @@ class ActionGroup(BaseModel):
     return_key: str = "Returns:"
     test: bool = False
 
+    # Bumped whenever a field is assigned, invalidates the compiled action groups
+    _version: int = PrivateAttr(default=0)
+
     class Config:
         arbitrary_types_allowed = True
         extra = "forbid"
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._version += 1
+
     @computed_field
     @property
     def executor(self) -> Executor:
@@ -59,27 +76,23 @@ class ActionGroup(BaseModel):
         return None
 
     @computed_field
-    @cached_property
+    @property
     def session(self) -> Union[boto3.Session, None]:
-        """Lazy loading of AWS session"""
+        """Shared AWS session for this action group's profile"""
         if self.test:
             return None
-        print(
-            f"Using `{self.profile}` [profile](https://docs.aws.amazon.com/cli/v1/userguide/cli-configure-files.html)."
-        )
-        return boto3.Session(profile_name=self.profile)
+        return client_registry.get_session(profile=self.profile)
 
     @computed_field
-    @cached_property
+    @property
     def aws_credentials(self) -> tuple[str, str]:
-        """Cached AWS credentials"""
+        """Account and region, resolved once per profile and process"""
 
         try:
             if self.test:
                 return "Mock-Account", "Mock-Region"
-            sts_client = self.session.client("sts")
-            identity = sts_client.get_caller_identity()
-            return identity["Account"], self.session.region_name
+            identity = client_registry.get_identity(profile=self.profile)
+            return identity.account_id, identity.region
         except Exception as e:
             return "Mock-Account", "Mock-Region"
 
@@ -241,9 +254,45 @@ class ActionGroup(BaseModel):
 class ActionGroups(BaseModel):
     action_groups: List[ActionGroup]
 
+    # Compiled tool map and payload, keyed by the fingerprint they were built from
+    _compiled: Dict[str, Tuple[Tuple, Any]] = PrivateAttr(default_factory=dict)
+
+    def _fingerprint(self) -> Tuple:
+        # Strong references and values, the id of a freed object can be reused
+        return tuple(
+            (
+                action_group,
+                action_group._version,
+                tuple(action_group.tools),
+                tuple(action_group.function_schema),
+                action_group.api_schema,
+                dict(action_group.builtin_tools),
+                tuple(
+                    (client, client.function_schema, tuple(client.callable_tools))
+                    for client in action_group.mcp_clients or []
+                ),
+            )
+            for action_group in self.action_groups
+        )
+
+    def _get_compiled(self, name: str, build: Callable[[], Any]) -> Any:
+        fingerprint = self._fingerprint()
+        compiled = self._compiled.get(name)
+        if compiled is None or compiled[0] != fingerprint:
+            compiled = (fingerprint, build())
+            self._compiled[name] = compiled
+        return compiled[1]
+
+    def invalidate(self):
+        """Drop the compiled tool map and payload after mutating a tool in place."""
+        self._compiled.clear()
+
     @computed_field
     @property
     def tool_map(self) -> Dict[str, Callable]:
+        return dict(self._get_compiled("tool_map", self._compile_tool_map))
+
+    def _compile_tool_map(self) -> Dict[str, Callable]:
         tool_map = dict()
 
         for action_group in self.action_groups:
@@ -263,6 +312,14 @@ class ActionGroups(BaseModel):
     @computed_field
     @property
     def actionGroups(self) -> List:
+        return [
+            dict(actionGroup)
+            for actionGroup in self._get_compiled(
+                "actionGroups", self._compile_action_groups
+            )
+        ]
+
+    def _compile_action_groups(self) -> List:
         actionGroups = list()
 
         for action_group in self.action_groups:
@@ -330,6 +387,24 @@ class ActionGroups(BaseModel):
         return json.dumps(self.actionGroups, indent=4)
 
 
+_SPACES = re.compile(r" +")
+_NUMPY_SECTION = re.compile(
+    r"^[ \t]*(Parameters|Other Parameters|Returns|Yields|Raises|Warns|See Also|"
+    r"Notes|References|Examples?|Attributes|Methods)[ \t]*\r?\n[ \t]*-{3,}[ \t]*$",
+    re.MULTILINE,
+)
+_REST_FIELD = re.compile(
+    r"^[ \t]*:(param|parameter|arg|argument|type|returns?|rtype|raises?)\b([^:\n]*):",
+    re.MULTILINE,
+)
+
+
+# Function schemas per tool and (argument_key, return_key)
+_function_schemas: "weakref.WeakKeyDictionary[Callable, Dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
 class ActionGroupBuilder:
     @staticmethod
     def get_indent_level(line: str) -> int:
@@ -358,119 +433,181 @@ class ActionGroupBuilder:
         return current_param, current_desc
 
     @staticmethod
-    @validate_call
     def clean_string(line: str) -> str:
-        clean_line = str()
-        prev_char: str = None
-        for character in line:
+        """Collapse runs of spaces and drop trailing spaces."""
+        return _SPACES.sub(" ", line).rstrip(" ")
 
-            if character == " ":
-                prev_char = " "
-            else:
-                if prev_char == " ":
-                    clean_line += " " + character
-                else:
-                    clean_line += character
-                prev_char = character
-        return clean_line
+    @staticmethod
+    def normalize(text: str) -> str:
+        return _SPACES.sub(" ", text.replace("\n", " ").replace("\r", "")).strip()
 
     @staticmethod
-    @validate_call
     def parse_docstring(
-        docstring: Annotated[str, Field(min_length=1)],
+        docstring: str,
         argument_key="Parameters:",
         return_key="Returns:",
     ) -> tuple[str, Dict[str, str]]:
-        """Parse a docstring to extract function description and parameter descriptions."""
-        if not docstring:
+        """Parse a docstring to extract function description and parameter descriptions.
+
+        reST (``:param x:``) and NumPy (underlined ``Parameters``) docstrings are
+        detected, anything else is read as Google style using ``argument_key``
+        and ``return_key``.
+        """
+        if not isinstance(docstring, str) or not docstring:
             raise ValueError("Docstring is empty or None")
 
+        description, param_descriptions = ActionGroupBuilder._parse_docstring(
+            docstring, argument_key, return_key
+        )
+        return description, dict(param_descriptions)
+
+    @staticmethod
+    @lru_cache(maxsize=2048)
+    def _parse_docstring(
+        docstring: str, argument_key: str, return_key: str
+    ) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
         docstring = docstring.strip()
+        if _REST_FIELD.search(docstring):
+            description, param_descriptions = ActionGroupBuilder._parse_rest(docstring)
+        elif _NUMPY_SECTION.search(docstring):
+            description, param_descriptions = ActionGroupBuilder._parse_numpy(docstring)
+        else:
+            description, param_descriptions = ActionGroupBuilder._parse_google(
+                docstring, argument_key, return_key
+            )
+        return description, tuple(param_descriptions.items())
+
+    @staticmethod
+    def _with_returns(description: str, returns: str) -> str:
+        return description + (" This function returns " + returns if returns else "")
+
+    @staticmethod
+    def _parse_google(
+        docstring: str, argument_key: str, return_key: str
+    ) -> Tuple[str, Dict[str, str]]:
+        description, _, parameter_return_section = docstring.partition(argument_key)
+        description = ActionGroupBuilder.normalize(description)
+
+        param_descriptions = dict()
+        if not parameter_return_section.strip():
+            return description, param_descriptions
+
+        param_section, found, return_section = parameter_return_section.partition(
+            return_key
+        )
+        if found:
+            description = ActionGroupBuilder._with_returns(
+                description, ActionGroupBuilder.normalize(return_section)
+            )
+
+        current_param, current_desc = None, list()
         parameter_level = None
+        for line in param_section.split("\n"):
+            if not line.strip():
+                continue
 
-        # Split docstring into description and args sections
-        description, parameter_return_section = (None, None)
-        description_parameter_return_section = docstring.split(argument_key, 1)
-        # print(description_parameter_return_section)
-        # Get function description
-        if description_parameter_return_section:
-            description = description_parameter_return_section[0].strip()
-            description = description.replace("\n", " ").replace("\r", "").strip()
-            description = ActionGroupBuilder.clean_string(line=description)
-            # Parse parameter descriptions if they exist
-            param_descriptions = {}
-            if (
-                len(description_parameter_return_section) > 1
-                and description_parameter_return_section[1].strip()
-            ):
-                parameter_return_section = description_parameter_return_section[
-                    1
-                ].split(return_key, 1)
+            level = ActionGroupBuilder.get_indent_level(line=line)
+            if parameter_level is None or level == parameter_level:
+                if current_param:
+                    param_descriptions[current_param] = " ".join(current_desc).strip()
+                parameter_level = level
+                current_param, current_desc = ActionGroupBuilder.get_new_param(
+                    line=line
+                )
+            elif level > parameter_level:
+                current_desc.append(line.replace("\r", "").strip())
+            else:
+                raise ValueError("Invalid docstring format")
 
-                if len(parameter_return_section) > 1:
-                    param_section, return_section = parameter_return_section
-                    return_section = return_section.strip()
-                    return_section = (
-                        return_section.replace("\n", " ").replace("\r", "").strip()
-                    )
-                    return_section = ActionGroupBuilder.clean_string(
-                        line=return_section
-                    )
+        # Save the last parameter
+        if current_param:
+            param_descriptions[current_param] = " ".join(current_desc).strip()
 
-                    description += (
-                        " This function returns " + return_section
-                        if return_section
-                        else ""
-                    )
-                else:
-                    param_section = parameter_return_section[0]
-                # Split parameters into lines and parse each
-                param_lines = param_section.split("\n")
-
-                current_param = None
-                current_desc = []
-                parameter_level, current_parameter_level = 0, 0
-                first_level = False
-                for line in param_lines:
-                    if not line or not line.strip():
-                        continue
-
-                    if not first_level:
-                        parameter_level = ActionGroupBuilder.get_indent_level(line=line)
-                        current_param, current_desc = ActionGroupBuilder.get_new_param(
-                            line=line
-                        )
-                        first_level = True
+        return description, param_descriptions
 
-                    else:
-                        current_parameter_level = ActionGroupBuilder.get_indent_level(
-                            line=line
-                        )
-                        if current_parameter_level == parameter_level:
-                            if current_param:
-                                param_descriptions[current_param] = " ".join(
-                                    current_desc
-                                ).strip()
-                                current_desc = []
-                            current_param, current_desc = (
-                                ActionGroupBuilder.get_new_param(line=line)
-                            )
-                        elif current_parameter_level > parameter_level:
-                            current_desc.append(
-                                line.replace("\n", "").replace("\r", "").strip()
-                            )
-                        else:
-                            raise ValueError("Invalid docstring format")
-                # Save the last parameter
+    @staticmethod
+    def _split_numpy_sections(docstring: str) -> Tuple[str, Dict[str, List[str]]]:
+        headers = list(_NUMPY_SECTION.finditer(docstring))
+        sections = dict()
+        for idx, header in enumerate(headers):
+            end = headers[idx + 1].start() if idx + 1 < len(headers) else None
+            sections[header.group(1)] = docstring[header.end() : end].split("\n")
+        return docstring[: headers[0].start()], sections
+
+    @staticmethod
+    def _parse_numpy(docstring: str) -> Tuple[str, Dict[str, str]]:
+        description, sections = ActionGroupBuilder._split_numpy_sections(docstring)
+        description = ActionGroupBuilder.normalize(description)
+
+        param_descriptions = dict()
+        parameter_level = None
+        current_param, current_desc = None, list()
+        for line in sections.get("Parameters", list()):
+            if not line.strip():
+                continue
+
+            level = ActionGroupBuilder.get_indent_level(line=line)
+            if parameter_level is None or level <= parameter_level:
                 if current_param:
                     param_descriptions[current_param] = " ".join(current_desc).strip()
-        else:
-            raise ValueError("Invalid docstring format")
+                parameter_level = level
+                name, _, param_type = line.partition(":")
+                current_param = name.strip()
+                current_desc = [param_type.strip()]
+            else:
+                current_desc.append(line.strip())
+
+        if current_param:
+            param_descriptions[current_param] = " ".join(current_desc).strip()
+
+        returns = [
+            line.strip() for line in sections.get("Returns", list()) if line.strip()
+        ]
+        if returns:
+            returns[0] += ":"
+        description = ActionGroupBuilder._with_returns(
+            description, ActionGroupBuilder.normalize(" ".join(returns)).rstrip(":")
+        )
+
+        return description, param_descriptions
+
+    @staticmethod
+    def _parse_rest(docstring: str) -> Tuple[str, Dict[str, str]]:
+        fields = list(_REST_FIELD.finditer(docstring))
+        description = ActionGroupBuilder.normalize(docstring[: fields[0].start()])
+
+        descriptions, types = dict(), dict()
+        returns, return_type = str(), str()
+        for idx, match in enumerate(fields):
+            end = fields[idx + 1].start() if idx + 1 < len(fields) else None
+            # Continuation lines run up to the next field
+            text = ActionGroupBuilder.normalize(docstring[match.end() : end])
+            kind, arguments = match.group(1), match.group(2).split()
+
+            if kind in ("param", "parameter", "arg", "argument") and arguments:
+                descriptions[arguments[-1]] = text
+                if len(arguments) > 1:
+                    types[arguments[-1]] = " ".join(arguments[:-1])
+            elif kind == "type" and arguments:
+                types[arguments[-1]] = text
+            elif kind in ("returns", "return"):
+                returns = text
+            elif kind == "rtype":
+                return_type = text
+
+        param_descriptions = {
+            name: (types.get(name, "") + " " + text).strip()
+            for name, text in descriptions.items()
+        }
+        if return_type and returns:
+            returns = f"{return_type}: {returns}"
+        description = ActionGroupBuilder._with_returns(
+            description, returns or return_type
+        )
 
         return description, param_descriptions
 
     @staticmethod
-    @validate_call
     def _map_python_type_to_schema_type(python_type: str) -> str:
         """Map Python type names to JSON schema type names."""
         type_mapping = {
@@ -490,6 +627,31 @@ class ActionGroupBuilder:
     def create_function_schema(
         func: Callable, argument_key: str = "Parameters:", return_key: str = "Returns:"
     ) -> FunctionDefination:
+        try:
+            schemas = _function_schemas.setdefault(func, dict())
+        except TypeError:
+            # Not weak referenceable, e.g. a bound method
+            schemas = dict()
+
+        key = (argument_key, return_key)
+        if key not in schemas:
+            schemas[key] = ActionGroupBuilder._compile_function_schema(
+                func=func, argument_key=argument_key, return_key=return_key
+            )
+
+        schema = schemas[key]
+        return {
+            **schema,
+            "parameters": {
+                name: dict(param_info)
+                for name, param_info in schema["parameters"].items()
+            },
+        }
+
+    @staticmethod
+    def _compile_function_schema(
+        func: Callable, argument_key: str, return_key: str
+    ) -> FunctionDefination:
 
         if func.__doc__ is None:
             raise ValueError("Docstring is empty or None")
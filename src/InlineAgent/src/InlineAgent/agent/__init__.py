@@ -12,6 +12,7 @@ from .inline_agent import (
     InlineAgent,
 )
 from .confirmation import require_confirmation
+from .execution import ToolExecutionConfig, ToolTimeoutError, cpu_bound, tool_timeout
 from .process_roc import ProcessROC
 from .collaborator_agent_instance import (
     CollaboratorAgent,
@@ -20,6 +21,10 @@ from .collaborator_agent_instance import (
 __all__ = [
     "InlineAgent",
     "require_confirmation",
+    "ToolExecutionConfig",
+    "ToolTimeoutError",
+    "cpu_bound",
+    "tool_timeout",
     "ProcessROC",
     "CollaboratorAgent",
 ]
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Iterable, Optional
+
+
+_END_OF_STREAM = object()
+
+
+class _StreamError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def aiter_event_stream(
+    event_stream: Iterable, max_buffered_events: Optional[int] = None
+) -> AsyncIterator[Any]:
+    """Iterate a blocking botocore EventStream without blocking the event loop.
+
+    A dedicated reader thread drains ``event_stream`` and hands every event to
+    the running loop through an ``asyncio.Queue``. When ``max_buffered_events``
+    is set the reader thread blocks once that many events are waiting to be
+    consumed, so a slow consumer applies back-pressure to the network read.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    slots = (
+        threading.BoundedSemaphore(max_buffered_events)
+        if max_buffered_events
+        else None
+    )
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop was closed before the stream finished
+            stop.set()
+
+    def reader():
+        try:
+            for event in event_stream:
+                if slots:
+                    slots.acquire()
+                if stop.is_set():
+                    return
+                put(event)
+            put(_END_OF_STREAM)
+        except BaseException as e:
+            if not stop.is_set():
+                put(_StreamError(e))
+
+    thread = threading.Thread(
+        target=reader, name="bedrock-event-stream-reader", daemon=True
+    )
+    thread.start()
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, _StreamError):
+                raise item.error
+            if slots:
+                slots.release()
+            yield item
+    finally:
+        if thread.is_alive():
+            stop.set()
+            if slots:
+                try:
+                    slots.release()
+                except ValueError:
+                    pass
+            close = getattr(event_stream, "close", None)
+            if close:
+                try:
+                    close()
+                except Exception:
+                    # The reader thread notices the stop flag on its next event
+                    pass
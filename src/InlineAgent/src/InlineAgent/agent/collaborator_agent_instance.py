@@ -5,7 +5,7 @@ import uuid
 import copy
 import os
 import boto3
-from typing import Dict, Literal
+from typing import Dict, Literal, Tuple
 from pydantic import Field
 from termcolor import colored
 from rich.console import Console
@@ -16,6 +16,8 @@ from InlineAgent.constants import (
     TraceColor,
 )
 from InlineAgent.agent.process_roc import ProcessROC
+from InlineAgent.clients import client_registry
+from InlineAgent.resource_index import resource_index
 from InlineAgent.observability import Trace
 
 
@@ -27,16 +29,26 @@ class CollaboratorAgent:
     relay_conversationHistory: Literal["TO_COLLABORATOR", "DISABLED"] = "DISABLED"
     profile: str = "default"
 
+    # Bumped whenever a field is assigned, invalidates the cached to_dict
+    _params_version = 0
+    _to_dict_cache = None
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self.__dataclass_fields__:
+            object.__setattr__(self, "_params_version", self._params_version + 1)
+
+    def _params_fingerprint(self) -> Tuple:
+        return (self._params_version,)
+
     @property
     def session(self) -> boto3.Session:
-        """Lazy loading of AWS session"""
-        return boto3.Session(profile_name=self.profile)
+        """Shared AWS session for this agent's profile"""
+        return client_registry.get_session(profile=self.profile)
 
     @property
     def account_id(self) -> str:
-        sts_client = self.session.client("sts")
-        identity = sts_client.get_caller_identity()
-        return identity["Account"]
+        return client_registry.get_identity(profile=self.profile).account_id
 
     @property
     def region(self) -> str:
@@ -56,12 +68,22 @@ class CollaboratorAgent:
             raise ValueError("agent_alias_id cannot be 'TSTALIASID'")
 
     def to_dict(self):
+        """Collaborator configuration, resolved once until a field changes."""
+        fingerprint = self._params_fingerprint()
+        if self._to_dict_cache is None or self._to_dict_cache[0] != fingerprint:
+            object.__setattr__(
+                self, "_to_dict_cache", (fingerprint, self._compile_dict())
+            )
+
+        return dict(self._to_dict_cache[1])
+
+    def _compile_dict(self):
 
         agent_arn = CollaboratorAgent.get_agent_arn_by_name(
             agent_name=self.agent_name,
             region=self.region,
             account_id=self.account_id,
-            session=self.session,
+            profile=self.profile,
         )
 
         if self.routing_instruction == "":
@@ -76,6 +98,7 @@ class CollaboratorAgent:
 
     @staticmethod
     def get_agent_id_by_name(agent_name: str, session: boto3.Session):
+        """Page through list_agents, use ``resource_index`` to resolve several names."""
         # Create Bedrock Agent client
         bedrock_agent = session.client("bedrock-agent")
 
@@ -91,7 +114,19 @@ class CollaboratorAgent:
 
     @staticmethod
     def get_agent_arn_by_name(
-        agent_name: str, region: str, account_id: str, session: boto3.Session
+        agent_name: str,
+        region: str,
+        account_id: str,
+        session: boto3.Session = None,
+        profile: str = "default",
     ):
+        """ARN of the agent, resolved through ``resource_index``.
+
+        ``session`` is no longer used, agents are listed with the client of
+        ``profile`` once for all collaborators.
+        """
+        agent_id = resource_index.get_agent_id(agent_name, profile=profile)
+        if agent_id is None:
+            raise ValueError(f"Agent {agent_name} not found")
 
-        return f"arn:aws:bedrock:{region}:{account_id}:agent/{CollaboratorAgent.get_agent_id_by_name(agent_name=agent_name, session=session)}"
+        return f"arn:aws:bedrock:{region}:{account_id}:agent/{agent_id}"
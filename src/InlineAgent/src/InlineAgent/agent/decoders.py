@@ -0,0 +1,116 @@
+import json
+import typing
+import weakref
+from inspect import Parameter, signature
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+
+# Types of the generated function schema, used when a tool has no annotation
+SCHEMA_TYPES = {
+    "string": str,
+    "number": float,
+    "integer": int,
+    "boolean": bool,
+    "array": list,
+}
+
+
+def _parse_legacy_array(value: str) -> Any:
+    # Arrays of objects are sometimes sent as [{key=value, key=value}]
+    json_str = value.replace("=", ":").replace("[{", '[{"').replace("}]", '"}]')
+    json_str = json_str.replace(", ", '", "').replace(":", '":"')
+    return json.loads(json_str)
+
+
+def _compile_decoder(annotation: Any) -> Callable[[str], Any]:
+    if annotation is str:
+        return str
+
+    adapter = TypeAdapter(annotation)
+
+    def decode(value: Any) -> Any:
+        if not isinstance(value, str):
+            return adapter.validate_python(value)
+        try:
+            return adapter.validate_json(value)
+        except ValidationError:
+            try:
+                return adapter.validate_python(value)
+            except ValidationError:
+                if not value.startswith("[{"):
+                    raise
+                return adapter.validate_python(_parse_legacy_array(value))
+
+    return decode
+
+
+class ParameterDecoder:
+    """Converts the string values of a returnControl event to the types a tool expects.
+
+    Python annotations of the tool take precedence over the schema type sent by
+    the agent. Validators are compiled on first use and reused for every call.
+    """
+
+    def __init__(self, tool: Optional[Callable] = None):
+        self.annotations = ParameterDecoder.get_annotations(tool)
+        self._decoders: Dict[Tuple[str, str], Callable[[str], Any]] = dict()
+
+    @staticmethod
+    def get_annotations(tool: Optional[Callable]) -> Dict[str, Any]:
+        if not callable(tool):
+            return dict()
+        try:
+            parameters = signature(tool).parameters
+        except (TypeError, ValueError):
+            return dict()
+        try:
+            hints = typing.get_type_hints(tool)
+        except Exception:
+            hints = dict()
+
+        annotations = dict()
+        for name, param in parameters.items():
+            annotation = hints.get(name, param.annotation)
+            if annotation is not Parameter.empty and not isinstance(annotation, str):
+                annotations[name] = annotation
+        return annotations
+
+    def get_decoder(self, name: str, schema_type: str) -> Callable[[str], Any]:
+        key = (name, schema_type)
+        if key not in self._decoders:
+            annotation = self.annotations.get(name)
+            if annotation is None:
+                annotation = SCHEMA_TYPES.get(schema_type, str)
+            self._decoders[key] = _compile_decoder(annotation)
+        return self._decoders[key]
+
+    def decode(self, parameters: List[Dict]) -> Dict[str, Any]:
+        return {
+            param["name"]: self.get_decoder(param["name"], param["type"])(
+                param["value"]
+            )
+            for param in parameters
+        }
+
+
+_decoders: "weakref.WeakKeyDictionary[Callable, ParameterDecoder]" = (
+    weakref.WeakKeyDictionary()
+)
+_schema_decoder = ParameterDecoder()
+
+
+def get_parameter_decoder(tool: Optional[Callable]) -> ParameterDecoder:
+    """Return the cached decoder of ``tool``."""
+    if not callable(tool):
+        return _schema_decoder
+    try:
+        decoder = _decoders.get(tool)
+    except TypeError:
+        # Not weak referenceable, compile without caching
+        return ParameterDecoder(tool)
+    if decoder is None:
+        decoder = ParameterDecoder(tool)
+        _decoders[tool] = decoder
+    return decoder
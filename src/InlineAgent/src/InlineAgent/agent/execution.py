@@ -0,0 +1,85 @@
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+def cpu_bound(func: Callable) -> Callable:
+    """Mark a tool as CPU heavy so it runs on the process pool, if one is configured.
+
+    The tool and its arguments must be picklable, so define it at module level.
+    """
+    func.__cpu_bound__ = True
+    return func
+
+
+def tool_timeout(seconds: float):
+    """Override the timeout of a single tool."""
+
+    def decorator(func: Callable) -> Callable:
+        func.__tool_timeout__ = seconds
+        return func
+
+    return decorator
+
+
+class ToolTimeoutError(Exception):
+    """A tool ran longer than its timeout."""
+
+    def __init__(self, tool: Callable, timeout: float):
+        self.timeout = timeout
+        super().__init__(
+            f"{getattr(tool, '__name__', repr(tool))} timed out after {timeout} seconds"
+        )
+
+
+@dataclass
+class ToolExecutionConfig:
+    """Where and for how long ProcessROC runs the agent's tools.
+
+    Sync tools run on ``thread_pool``, or on the event loop's default executor
+    when it is None. Tools marked with ``@cpu_bound`` run on ``process_pool``
+    when one is given. A tool that runs longer than its timeout is reported to
+    the agent as a FAILURE; a thread or process that is already running is not
+    interrupted. Timeouts raise ``ToolTimeoutError``, a ``TimeoutError`` of
+    the tool itself is raised as is.
+    """
+
+    thread_pool: Optional[ThreadPoolExecutor] = None
+    process_pool: Optional[ProcessPoolExecutor] = None
+    timeout: Optional[float] = None
+
+    def get_timeout(self, tool: Callable) -> Optional[float]:
+        return getattr(tool, "__tool_timeout__", self.timeout)
+
+    async def run(self, tool: Callable, parameters: Dict) -> Any:
+        if inspect.iscoroutinefunction(tool):
+            call = tool(**parameters)
+        else:
+            executor = self.thread_pool
+            if self.process_pool and getattr(tool, "__cpu_bound__", False):
+                executor = self.process_pool
+            call = asyncio.get_running_loop().run_in_executor(
+                executor, functools.partial(tool, **parameters)
+            )
+
+        timeout = self.get_timeout(tool)
+        if timeout is None:
+            return await call
+
+        # Not wait_for, its TimeoutError cannot be told apart from the tool's
+        task = asyncio.ensure_future(call)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if not done:
+            task.cancel()
+            raise ToolTimeoutError(tool, timeout)
+        return task.result()
+
+
+default_tool_execution = ToolExecutionConfig()
@@ -1,33 +1,57 @@
 from dataclasses import dataclass, field
 from datetime import datetime, UTC
 
+import asyncio
 import json
+import random
+import time
 import uuid
 import copy
 import os
 import boto3
-from typing import Callable, Dict, List, Literal, Optional, Tuple, Union
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Dict, List, Literal, Optional, Tuple, Union
 from pydantic import Field
-from termcolor import colored
-from rich.console import Console
-from rich.markdown import Markdown
 
 
 from InlineAgent.action_group import ActionGroups
 from InlineAgent.action_group.action_group import ActionGroup
 from InlineAgent.agent.collaborator_agent_instance import CollaboratorAgent
+from InlineAgent.clients import client_registry
 from InlineAgent.constants import (
     USER_INPUT_ACTION_GROUP_NAME,
     TraceColor,
 )
+from InlineAgent.agent.async_stream import aiter_event_stream
+from InlineAgent.agent.execution import ToolExecutionConfig
 from InlineAgent.agent.process_roc import ProcessROC
+from InlineAgent.agent.resolution import resolve_all
+from InlineAgent.agent.snapshot import (
+    load_snapshot,
+    save_snapshot,
+    snapshot_key,
+    to_material,
+)
 from InlineAgent.observability import Trace
 from InlineAgent.knowledge_base import KnowledgeBasePlugin
+from InlineAgent.output import OutputSink, console_sink, null_sink
 from InlineAgent.tools.mcp import MCPServer
 from InlineAgent.types import (
+    BatchInvocationResult,
+    CitationEvent,
+    FilesEvent,
     InlineCollaboratorAgentConfig,
     InlineCollaboratorConfigurations,
+    InvocationJob,
+    InvocationResult,
+    OutputFile,
+    ReturnControlEvent,
+    StreamEvent,
+    TextDeltaEvent,
+    TraceEvent,
+    UsageEvent,
 )
+from InlineAgent.utils import is_throttling_error
 
 
 @dataclass
@@ -50,17 +74,52 @@ class InlineAgent:
     profile: str = field(default="default")
     user_input: bool = False
     tool_map: Dict[str, Callable] = None
+    output_sink: Optional[OutputSink] = None
+    max_tool_concurrency: Optional[int] = None
+    tool_execution: ToolExecutionConfig = field(default_factory=ToolExecutionConfig)
+    snapshot_dir: Optional[str] = None
+
+    # Bumped whenever a field is assigned, invalidates the compiled invoke params
+    _params_version = 0
+    _invoke_params_cache = None
+    # (path, fingerprint) when snapshot_dir is given and no snapshot was found
+    _pending_snapshot = None
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self.__dataclass_fields__:
+            object.__setattr__(self, "_params_version", self._params_version + 1)
+
+    def invalidate_invoke_params(self):
+        """Drop the compiled invoke params after mutating a field in place."""
+        object.__setattr__(self, "_params_version", self._params_version + 1)
+
+    def _params_fingerprint(self) -> Tuple:
+        collaborator_configuration = self.collaborator_configuration
+        return (
+            self._params_version,
+            (
+                (
+                    collaborator_configuration.instruction,
+                    collaborator_configuration.relayConversationHistory,
+                )
+                if collaborator_configuration
+                else None
+            ),
+            tuple(
+                collaborator._params_fingerprint()
+                for collaborator in self.collaborators or []
+            ),
+        )
 
     @property
     def session(self) -> boto3.Session:
-        """Lazy loading of AWS session"""
-        return boto3.Session(profile_name=self.profile)
+        """Shared AWS session for this agent's profile"""
+        return client_registry.get_session(profile=self.profile)
 
     @property
     def account_id(self) -> str:
-        sts_client = self.session.client("sts")
-        identity = sts_client.get_caller_identity()
-        return identity["Account"]
+        return client_registry.get_identity(profile=self.profile).account_id
 
     @property
     def region(self) -> str:
@@ -68,17 +127,30 @@ class InlineAgent:
 
     def __post_init__(self):
 
-        if self.knowledge_bases:
-            knowledge_bases_list = list()
-            for knowledge_base in self.knowledge_bases:
-                if not isinstance(knowledge_base, KnowledgeBasePlugin):
-                    knowledge_bases_list.append(
-                        KnowledgeBasePlugin.model_validate(knowledge_base).to_dict()
-                    )
-                else:
-                    knowledge_bases_list.append(knowledge_base.to_dict())
+        if self.output_sink is None:
+            self.output_sink = console_sink
 
-            self.knowledge_bases = knowledge_bases_list
+        snapshot, snapshot_path = None, None
+        if self.snapshot_dir:
+            snapshot_path = os.path.join(
+                self.snapshot_dir,
+                f"{self.agent_name}-{snapshot_key(self._snapshot_material())}.json",
+            )
+            snapshot = load_snapshot(snapshot_path)
+            if snapshot is not None:
+                # Skip docstring parsing and knowledge base lookups
+                self.knowledge_bases = snapshot.get("knowledgeBases", list())
+
+        if self.knowledge_bases and snapshot is None:
+            # Resolved to IDs with the collaborators, see _resolve_resources
+            self.knowledge_bases = [
+                (
+                    knowledge_base
+                    if isinstance(knowledge_base, KnowledgeBasePlugin)
+                    else KnowledgeBasePlugin.model_validate(knowledge_base)
+                )
+                for knowledge_base in self.knowledge_bases
+            ]
 
         if self.action_groups:
             if not isinstance(self.action_groups, ActionGroups):
@@ -88,9 +160,12 @@ class InlineAgent:
 
             self.tool_map = self.action_groups.tool_map
 
-            self.action_groups = self.action_groups.actionGroups
+            if snapshot is None:
+                self.action_groups = self.action_groups.actionGroups
 
-        if self.user_input:
+        if snapshot is not None:
+            self.action_groups = snapshot.get("actionGroups", list())
+        elif self.user_input:
             if self.action_groups:
                 self.action_groups.append(
                     {
@@ -139,7 +214,114 @@ class InlineAgent:
         if not self.collaborator_configuration.instruction:
             self.collaborator_configuration.instruction = self.instruction
 
+        if snapshot is None:
+            self._resolve_resources()
+
+        if snapshot is not None:
+            object.__setattr__(
+                self, "_invoke_params_cache", (self._params_fingerprint(), snapshot)
+            )
+        elif snapshot_path:
+            object.__setattr__(
+                self, "_pending_snapshot", (snapshot_path, self._params_fingerprint())
+            )
+
+    def _resolve_resources(self):
+        """Resolve knowledge bases and remote collaborators concurrently.
+
+        Knowledge base IDs and the alias ARNs of every ``CollaboratorAgent``
+        in the collaborator tree are looked up in one phase, so building a
+        supervisor costs the slowest lookup rather than the sum of them. The
+        collaborators cache their configuration for ``get_invoke_params``.
+        Raises a ResolutionError listing every resource that failed.
+        """
+        tasks = [
+            (f"knowledge base {knowledge_base.name}", knowledge_base.to_dict)
+            for knowledge_base in self.knowledge_bases
+        ]
+        tasks.extend(
+            (f"collaborator {collaborator.agent_name}", collaborator.to_dict)
+            for collaborator in self._remote_collaborators()
+        )
+        if not tasks:
+            return
+
+        results = resolve_all(tasks)
+        self.knowledge_bases = results[: len(self.knowledge_bases)]
+
+    def _remote_collaborators(self) -> List[CollaboratorAgent]:
+        """Every ``CollaboratorAgent`` of the collaborator tree, once each."""
+        found: Dict[int, CollaboratorAgent] = dict()
+        pending = list(self.collaborators or [])
+        while pending:
+            collaborator = pending.pop(0)
+            if isinstance(collaborator, CollaboratorAgent):
+                found.setdefault(id(collaborator), collaborator)
+            elif isinstance(collaborator, InlineAgent):
+                pending.extend(collaborator.collaborators or [])
+        return list(found.values())
+
+    def _snapshot_material(self) -> Dict:
+        """Configuration the invoke params are compiled from, see ``snapshot_dir``."""
+        material = {
+            name: to_material(getattr(self, name))
+            for name in (
+                "foundation_model",
+                "agent_name",
+                "instruction",
+                "action_groups",
+                "agent_collaboration",
+                "collaborator_configuration",
+                "customer_encryption_key_arn",
+                "guardrail_configuration",
+                "idle_session_ttl_in_seconds",
+                "knowledge_bases",
+                "prompt_override_configuration",
+                "profile",
+                "user_input",
+            )
+        }
+        material["collaborators"] = [
+            (
+                collaborator._snapshot_material()
+                if isinstance(collaborator, InlineAgent)
+                else {
+                    name: getattr(collaborator, name)
+                    for name in collaborator.__dataclass_fields__
+                }
+            )
+            for collaborator in self.collaborators or []
+        ]
+        identity = client_registry.get_identity(profile=self.profile)
+        material["identity"] = [identity.account_id, identity.region]
+        return material
+
     def get_invoke_params(self) -> Dict:
+        """Request parameters for ``invoke_inline_agent``.
+
+        The parameters are compiled once and reused until a field of this
+        agent or of one of its collaborators is assigned, so repeated turns
+        make no control-plane calls. Call ``invalidate_invoke_params`` after
+        mutating a field in place.
+        """
+        fingerprint = self._params_fingerprint()
+        if (
+            self._invoke_params_cache is None
+            or self._invoke_params_cache[0] != fingerprint
+        ):
+            object.__setattr__(
+                self,
+                "_invoke_params_cache",
+                (fingerprint, self._compile_invoke_params()),
+            )
+            # Only a payload compiled from the configuration the key was built from
+            if self._pending_snapshot and self._pending_snapshot[1] == fingerprint:
+                save_snapshot(self._pending_snapshot[0], self._invoke_params_cache[1])
+            object.__setattr__(self, "_pending_snapshot", None)
+
+        return dict(self._invoke_params_cache[1])
+
+    def _compile_invoke_params(self) -> Dict:
         invokeParams = dict()
         match self.agent_collaboration:
             case "DISABLED":
@@ -207,7 +389,7 @@ class InlineAgent:
         self,
         input_text: str,
         enable_trace: bool = True,
-        session_id: str = str(uuid.uuid4()),
+        session_id: str = None,
         end_session: bool = False,
         session_state: Dict = None,
         add_citation: bool = False,
@@ -217,23 +399,185 @@ class InlineAgent:
         bedrock_model_configurations: Dict = {
             "performanceConfig": {"latency": "standard"}
         },
+        output_sink: Optional[OutputSink] = None,
     ):
-        if session_state is None:
-            session_state = {}
+        result = await self._invoke(
+            input_text=input_text,
+            enable_trace=enable_trace,
+            session_id=session_id,
+            end_session=end_session,
+            session_state=session_state,
+            add_citation=add_citation,
+            process_response=process_response,
+            truncate_response=truncate_response,
+            streaming_configurations=streaming_configurations,
+            bedrock_model_configurations=bedrock_model_configurations,
+            output_sink=output_sink,
+        )
+        if not process_response:
+            return result
 
-        print(f"SessionId: {session_id}")
-        if "returnControlInvocationResults" in session_state:
-            raise ValueError(
-                "returnControlInvocationResults key is not supported in inlineSessionState"
+        return result.answer
+
+    async def invoke_many(
+        self,
+        jobs: List[Union[InvocationJob, Dict, Tuple, str]],
+        max_concurrency: int = 4,
+        timeout: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        **invoke_kwargs,
+    ) -> BatchInvocationResult:
+        """Invoke the agent for many jobs with bounded concurrency.
+
+        Each job is an ``InvocationJob``, a dict with its fields, an
+        ``(input_text, session_id, session_state)`` tuple or a plain input
+        text. Jobs without a session id get a fresh one. At most
+        ``max_concurrency`` invocations run at once, each limited to
+        ``timeout`` seconds, and throttled invocations are retried with
+        exponential backoff and full jitter. Only invocations throttled
+        before their first event are retried, so tools answering a return
+        of control never run twice, and backoffs do not hold a concurrency
+        slot. Failed jobs are reported in the result instead of raising.
+        Results keep the order of ``jobs``. Nothing is printed unless an
+        ``output_sink`` is passed.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        invoke_kwargs.setdefault("output_sink", null_sink)
+
+        jobs = [InlineAgent._to_invocation_job(job) for job in jobs]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(job: InvocationJob) -> InvocationResult:
+            session_id = job.session_id or str(uuid.uuid4())
+            attempt = 0
+            consumed = False
+
+            def on_event(event: StreamEvent) -> None:
+                nonlocal consumed
+                consumed = True
+
+            time_before_call = time.perf_counter()
+            while True:
+                attempt += 1
+                consumed = False
+                error = None
+                async with semaphore:
+                    try:
+                        result = await asyncio.wait_for(
+                            self._invoke(
+                                input_text=job.input_text,
+                                session_id=session_id,
+                                session_state=job.session_state,
+                                on_event=on_event,
+                                **invoke_kwargs,
+                            ),
+                            timeout=timeout,
+                        )
+                    except Exception as e:
+                        error = e
+
+                if error is None:
+                    break
+
+                if (
+                    attempt <= max_retries
+                    and not consumed
+                    and is_throttling_error(error)
+                ):
+                    # Backs off outside the semaphore, other jobs take the slot
+                    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+                    await asyncio.sleep(random.uniform(0, delay))
+                    continue
+
+                result = InvocationResult(
+                    input_text=job.input_text,
+                    session_id=session_id,
+                    error=(
+                        f"Invocation timed out after {timeout} seconds"
+                        if isinstance(error, asyncio.TimeoutError)
+                        else str(error.__cause__ or error)
+                    ),
+                )
+                break
+
+            result.attempts = attempt
+            result.latency_seconds = time.perf_counter() - time_before_call
+            return result
+
+        time_before_batch = time.perf_counter()
+        results = await asyncio.gather(*[run(job) for job in jobs])
+        wall_time = time.perf_counter() - time_before_batch
+
+        latencies = sorted(result.latency_seconds for result in results)
+        succeeded = [result for result in results if result.error is None]
+        return BatchInvocationResult(
+            results=results,
+            succeeded=len(succeeded),
+            failed=len(results) - len(succeeded),
+            total_input_tokens=sum(result.input_tokens for result in results),
+            total_output_tokens=sum(result.output_tokens for result in results),
+            total_llm_calls=sum(result.llm_calls for result in results),
+            throttle_retries=sum(result.attempts - 1 for result in results),
+            wall_time_seconds=wall_time,
+            invocations_per_second=len(succeeded) / wall_time if wall_time else 0.0,
+            p50_latency_seconds=(
+                latencies[int(0.50 * (len(latencies) - 1))] if latencies else 0.0
+            ),
+            p95_latency_seconds=(
+                latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+            ),
+        )
+
+    @staticmethod
+    def _to_invocation_job(
+        job: Union[InvocationJob, Dict, Tuple, str],
+    ) -> InvocationJob:
+        if isinstance(job, InvocationJob):
+            return job
+        if isinstance(job, str):
+            return InvocationJob(input_text=job)
+        if isinstance(job, dict):
+            return InvocationJob.model_validate(job)
+        if isinstance(job, (tuple, list)):
+            return InvocationJob(
+                **dict(zip(("input_text", "session_id", "session_state"), job))
             )
+        raise ValueError(f"Unsupported invocation job: {job}")
 
-        if "invocationId" in session_state:
-            raise ValueError("invocationId key is not supported in inlineSessionState")
+    async def stream(
+        self,
+        input_text: str,
+        enable_trace: bool = True,
+        session_id: str = None,
+        end_session: bool = False,
+        session_state: Dict = None,
+        streaming_configurations: Dict = {"streamFinalResponse": True},
+        bedrock_model_configurations: Dict = {
+            "performanceConfig": {"latency": "standard"}
+        },
+        output_sink: OutputSink = null_sink,
+    ) -> AsyncIterator[StreamEvent]:
+        """Invoke the agent and yield typed events as they arrive.
+
+        Return of control requests are answered with the agent's tools
+        before the next turn starts, and a ``UsageEvent`` with the totals
+        of the whole invocation is yielded last. Only tool output is
+        written, to ``output_sink``, which discards it by default.
+        """
+        if session_id is None:
+            session_id = str(uuid.uuid4())
 
-        agent_answer = ""
+        if session_state is None:
+            session_state = {}
 
-        bedrock_agent_runtime = boto3.Session(profile_name=self.profile).client(
-            "bedrock-agent-runtime"
+        InlineAgent._validate_session_state(session_state=session_state)
+
+        bedrock_agent_runtime = client_registry.get_client(
+            "bedrock-agent-runtime", profile=self.profile
         )
 
         inlineSessionState = copy.deepcopy(session_state)
@@ -243,163 +587,261 @@ class InlineAgent:
         total_llm_calls = 0
 
         time_before_call = datetime.now(UTC)
-        cite = None
-        orch_step = 0
-        sub_step = 0
-
-        stream_final_response = streaming_configurations["streamFinalResponse"]
-        # print(self.get_invoke_params())
-        while not agent_answer:
-            if inlineSessionState:
-                response = bedrock_agent_runtime.invoke_inline_agent(
-                    sessionId=session_id,
-                    inputText=input_text,
-                    enableTrace=enable_trace,
-                    endSession=end_session,
-                    inlineSessionState=inlineSessionState,
-                    streamingConfigurations=streaming_configurations,
-                    bedrockModelConfigurations=bedrock_model_configurations,
-                    **self.get_invoke_params(),
-                )
-            else:
-                response = bedrock_agent_runtime.invoke_inline_agent(
-                    sessionId=session_id,
-                    inputText=input_text,
-                    enableTrace=enable_trace,
-                    endSession=end_session,
-                    streamingConfigurations=streaming_configurations,
-                    bedrockModelConfigurations=bedrock_model_configurations,
-                    **self.get_invoke_params(),
-                )
 
-            if not process_response:
-                return response
+        answered = False
+        while not answered:
+            response = await self._invoke_inline_agent(
+                bedrock_agent_runtime=bedrock_agent_runtime,
+                input_text=input_text,
+                enable_trace=enable_trace,
+                session_id=session_id,
+                end_session=end_session,
+                inlineSessionState=inlineSessionState,
+                streaming_configurations=streaming_configurations,
+                bedrock_model_configurations=bedrock_model_configurations,
+            )
 
             inlineSessionState = copy.deepcopy(session_state)
 
-            event_stream = response["completion"]
-
             try:
-                for event in event_stream:
-                    # print(json.dumps(event, indent=2, default=str))
-                    if "files" in event:
-                        files_event = event["files"]
-
-                        console = Console()
-                        print("\n\n")
-                        console.print(Markdown("**Files saved in output directory**"))
-
-                        files_list = files_event["files"]
-                        for idx, this_file in enumerate(files_list):
-                            file_bytes = this_file["bytes"]
-
-                            # save bytes to file, given the name of file and the bytes
-                            directory_path = os.path.join(os.getcwd(), "output")
-                            if not os.path.exists(directory_path):
-                                try:
-                                    os.makedirs(directory_path, exist_ok=True)
-                                except OSError as e:
-                                    print(f"Error creating directory output: {e}")
-                                    raise
-
-                            if not os.path.exists(
-                                os.path.join(directory_path, str(session_id))
-                            ):
-                                try:
-                                    os.makedirs(
-                                        os.path.join(directory_path, str(session_id)),
-                                        exist_ok=True,
+                async with aclosing(
+                    aiter_event_stream(response["completion"])
+                ) as event_stream:
+                    async for event in event_stream:
+                        if "files" in event:
+                            yield FilesEvent(
+                                files=[
+                                    OutputFile(
+                                        name=this_file["name"],
+                                        type=this_file.get("type"),
+                                        bytes=this_file["bytes"],
                                     )
-                                except OSError as e:
-                                    print(f"Error creating directory output: {e}")
-                                    raise
-
-                            file_name = os.path.join(
-                                directory_path, str(session_id), this_file["name"]
+                                    for this_file in event["files"]["files"]
+                                ]
                             )
-                            with open(file_name, "wb") as f:
-                                f.write(file_bytes)
-
-                    if "returnControl" in event:
-                        inlineSessionState = await ProcessROC.process_roc(
-                            inlineSessionState=inlineSessionState,
-                            roc_event=event["returnControl"],
-                            tool_map=self.tool_map,
-                        )
 
-                    # Process trace
-                    if "trace" in event and "trace" in event["trace"] and enable_trace:
+                        if "returnControl" in event:
+                            yield ReturnControlEvent(
+                                invocation_id=event["returnControl"]["invocationId"],
+                                invocation_inputs=event["returnControl"][
+                                    "invocationInputs"
+                                ],
+                            )
+                            inlineSessionState = await ProcessROC.process_roc(
+                                inlineSessionState=inlineSessionState,
+                                roc_event=event["returnControl"],
+                                tool_map=self.tool_map,
+                                sink=output_sink,
+                                max_concurrency=self.max_tool_concurrency,
+                                execution=self.tool_execution,
+                            )
 
-                        # print(json.dumps(event["trace"], indent=2))
-                        input_tokens, output_tokens, llm_calls = Trace.parse_trace(
-                            trace=event["trace"]["trace"],
-                            truncateResponse=truncate_response,
-                            agentName=self.agent_name,
-                        )
-                        total_input_tokens += int(input_tokens)
-                        total_output_tokens += int(output_tokens)
-                        total_llm_calls += int(llm_calls)
+                        if "trace" in event:
+                            input_tokens, output_tokens, llm_calls = 0, 0, 0
+                            if "trace" in event["trace"]:
+                                input_tokens, output_tokens, llm_calls = (
+                                    Trace.get_usage(trace=event["trace"]["trace"])
+                                )
+                            total_input_tokens += input_tokens
+                            total_output_tokens += output_tokens
+                            total_llm_calls += llm_calls
+
+                            yield TraceEvent(
+                                trace=event["trace"],
+                                input_tokens=input_tokens,
+                                output_tokens=output_tokens,
+                                llm_calls=llm_calls,
+                            )
 
-                    # Get Final Answer
-                    if "chunk" in event:
-                        if add_citation:
+                        if "chunk" in event:
+                            text = event["chunk"].get("bytes", b"").decode("utf8")
                             if "attribution" in event["chunk"]:
-                                agent_answer, cite = Trace.add_citation(
-                                    citations=event["chunk"]["attribution"][
-                                        "citations"
-                                    ],
-                                    cite=1 if not cite else cite,
-                                )
+                                citations = event["chunk"]["attribution"]["citations"]
+                                answered = answered or bool(text or citations)
+                                yield CitationEvent(text=text, citations=citations)
                             else:
-                                data = event["chunk"]["bytes"]
-                                agent_answer += data.decode("utf8")
-                                print(
-                                    colored(
-                                        data.decode("utf8"), TraceColor.final_output
-                                    ),
-                                    end="",
-                                )
-                        elif not add_citation:
-                            data = event["chunk"]["bytes"]
-                            if stream_final_response:
-                                agent_answer += data.decode("utf8")
-                                print(
-                                    colored(
-                                        data.decode("utf8"), TraceColor.final_output
-                                    ),
-                                    end="",
-                                )
-                            else:
-                                agent_answer += data.decode("utf8")
-                                print(
-                                    colored(agent_answer, TraceColor.final_output),
-                                    end="",
-                                )
+                                answered = answered or bool(text)
+                                yield TextDeltaEvent(text=text)
 
             except Exception as e:
-                print(
-                    colored("Caught exception while invoking Agent", TraceColor.error)
+                e.add_note(
+                    f"request ID: {response['ResponseMetadata']['RequestId']}, "
+                    f"retries: {response['ResponseMetadata']['RetryAttempts']}"
                 )
-                print(colored(f"input text: {input_text}", TraceColor.error))
-                print(
-                    colored(
-                        f"request ID: {response['ResponseMetadata']['RequestId']}, retries: {response['ResponseMetadata']['RetryAttempts']}\n",
-                        TraceColor.error,
-                    )
-                )
-                print(colored(f"Error: {e}", TraceColor.error))
-                raise Exception("Unexpected exception: ", e)
-
-        duration = datetime.now(UTC) - time_before_call
-
-        print(
-            colored(
-                f"\nAgent made a total of {total_llm_calls} LLM calls, "
-                + f"using {total_input_tokens+total_output_tokens} tokens "
-                + f"(in: {total_input_tokens}, out: {total_output_tokens})"
-                + f", and took {duration.total_seconds():,.1f} total seconds",
-                TraceColor.stats,
+                raise Exception("Unexpected exception: ", e) from e
+
+        yield UsageEvent(
+            session_id=session_id,
+            input_tokens=total_input_tokens,
+            output_tokens=total_output_tokens,
+            llm_calls=total_llm_calls,
+            latency_seconds=(datetime.now(UTC) - time_before_call).total_seconds(),
+        )
+
+    async def _invoke(
+        self,
+        input_text: str,
+        enable_trace: bool = True,
+        session_id: str = None,
+        end_session: bool = False,
+        session_state: Dict = None,
+        add_citation: bool = False,
+        process_response: bool = True,
+        truncate_response: int = None,
+        streaming_configurations: Dict = {"streamFinalResponse": False},
+        bedrock_model_configurations: Dict = {
+            "performanceConfig": {"latency": "standard"}
+        },
+        output_sink: Optional[OutputSink] = None,
+        on_event: Optional[Callable[[StreamEvent], None]] = None,
+    ) -> InvocationResult:
+        if session_id is None:
+            session_id = str(uuid.uuid4())
+
+        if session_state is None:
+            session_state = {}
+
+        sink = output_sink or self.output_sink
+        sink.write(f"SessionId: {session_id}")
+        InlineAgent._validate_session_state(session_state=session_state)
+
+        if not process_response:
+            return await self._invoke_inline_agent(
+                bedrock_agent_runtime=client_registry.get_client(
+                    "bedrock-agent-runtime", profile=self.profile
+                ),
+                input_text=input_text,
+                enable_trace=enable_trace,
+                session_id=session_id,
+                end_session=end_session,
+                inlineSessionState=copy.deepcopy(session_state),
+                streaming_configurations=streaming_configurations,
+                bedrock_model_configurations=bedrock_model_configurations,
             )
+
+        # Answer chunks are appended and joined once at the end
+        answer_chunks: List[str] = list()
+        usage = None
+        cite = None
+
+        try:
+            async for event in self.stream(
+                input_text=input_text,
+                enable_trace=enable_trace,
+                session_id=session_id,
+                end_session=end_session,
+                session_state=session_state,
+                streaming_configurations=streaming_configurations,
+                bedrock_model_configurations=bedrock_model_configurations,
+                output_sink=sink,
+            ):
+                if on_event is not None:
+                    on_event(event)
+
+                if isinstance(event, FilesEvent):
+                    sink.write("\n\n")
+                    sink.markdown("**Files saved in output directory**")
+
+                    for this_file in event.files:
+                        # save bytes to file, given the name of file and the bytes
+                        directory_path = os.path.join(
+                            os.getcwd(), "output", str(session_id)
+                        )
+                        try:
+                            os.makedirs(directory_path, exist_ok=True)
+                        except OSError as e:
+                            sink.write(f"Error creating directory output: {e}")
+                            raise
+
+                        file_name = os.path.join(directory_path, this_file.name)
+                        with open(file_name, "wb") as f:
+                            f.write(this_file.bytes)
+
+                elif isinstance(event, TraceEvent):
+                    if sink.enabled and enable_trace and "trace" in event.trace:
+                        Trace.parse_trace(
+                            trace=event.trace["trace"],
+                            truncateResponse=truncate_response,
+                            agentName=self.agent_name,
+                            sink=sink,
+                        )
+
+                elif isinstance(event, CitationEvent) and add_citation:
+                    agent_answer, cite = Trace.add_citation(
+                        citations=event.citations,
+                        cite=1 if not cite else cite,
+                        sink=sink,
+                    )
+                    answer_chunks = [agent_answer]
+
+                elif isinstance(event, (TextDeltaEvent, CitationEvent)):
+                    answer_chunks.append(event.text)
+                    sink.write(event.text, TraceColor.final_output, end="")
+
+                elif isinstance(event, UsageEvent):
+                    usage = event
+
+        except Exception as e:
+            sink.write("Caught exception while invoking Agent", TraceColor.error)
+            sink.write(f"input text: {input_text}", TraceColor.error)
+            for note in getattr(e.__cause__, "__notes__", []):
+                sink.write(f"{note}\n", TraceColor.error)
+            sink.write(f"Error: {e.__cause__ or e}", TraceColor.error)
+            sink.flush()
+            raise
+
+        sink.write(
+            f"\nAgent made a total of {usage.llm_calls} LLM calls, "
+            + f"using {usage.input_tokens+usage.output_tokens} tokens "
+            + f"(in: {usage.input_tokens}, out: {usage.output_tokens})"
+            + f", and took {usage.latency_seconds:,.1f} total seconds",
+            TraceColor.stats,
+        )
+        sink.flush()
+
+        return InvocationResult(
+            input_text=input_text,
+            session_id=session_id,
+            answer="".join(answer_chunks),
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            llm_calls=usage.llm_calls,
+            latency_seconds=usage.latency_seconds,
         )
 
-        return agent_answer
+    async def _invoke_inline_agent(
+        self,
+        bedrock_agent_runtime,
+        input_text: str,
+        enable_trace: bool,
+        session_id: str,
+        end_session: bool,
+        inlineSessionState: Dict,
+        streaming_configurations: Dict,
+        bedrock_model_configurations: Dict,
+    ) -> Dict:
+        kwargs = dict()
+        if inlineSessionState:
+            kwargs["inlineSessionState"] = inlineSessionState
+
+        return await asyncio.to_thread(
+            bedrock_agent_runtime.invoke_inline_agent,
+            sessionId=session_id,
+            inputText=input_text,
+            enableTrace=enable_trace,
+            endSession=end_session,
+            streamingConfigurations=streaming_configurations,
+            bedrockModelConfigurations=bedrock_model_configurations,
+            **kwargs,
+            **self.get_invoke_params(),
+        )
+
+    @staticmethod
+    def _validate_session_state(session_state: Dict):
+        if "returnControlInvocationResults" in session_state:
+            raise ValueError(
+                "returnControlInvocationResults key is not supported in inlineSessionState"
+            )
+
+        if "invocationId" in session_state:
+            raise ValueError("invocationId key is not supported in inlineSessionState")
@@ -1,17 +1,38 @@
+import asyncio
 import copy
-import inspect
+import functools
 import json
-from typing import Any, Callable, Dict, Union
-from termcolor import colored
+from typing import Any, Callable, Dict, List, Optional, Union
 
+from InlineAgent.agent.decoders import get_parameter_decoder
+from InlineAgent.agent.execution import (
+    ToolExecutionConfig,
+    ToolTimeoutError,
+    default_tool_execution,
+)
 from InlineAgent.constants import TraceColor
+from InlineAgent.observability.metrics import record_tool_cache
+from InlineAgent.output import OutputSink, console_sink
+from InlineAgent.tools.cache import get_tool_cache
+from InlineAgent.tools.result import ToolResult
 
 
 class ProcessROC:
     @staticmethod
     async def process_roc(
-        inlineSessionState: Dict, roc_event: Dict, tool_map: Dict[str, Callable]
+        inlineSessionState: Dict,
+        roc_event: Dict,
+        tool_map: Dict[str, Callable],
+        sink: OutputSink = console_sink,
+        max_concurrency: Optional[int] = None,
+        execution: ToolExecutionConfig = default_tool_execution,
     ):
+        """Answer a returnControl event with the results of the requested tools.
+
+        Confirmations are asked one at a time, in order. Tools that need no
+        confirmation run concurrently, at most ``max_concurrency`` at once,
+        and the results keep the order of ``invocationInputs``.
+        """
         # TODO: Tool to invoke is str and callable
         if "returnControlInvocationResults" in inlineSessionState:
             raise ValueError(
@@ -25,6 +46,8 @@ class ProcessROC:
         inlineSessionState = {"returnControlInvocationResults": []}
         inlineSessionState["invocationId"] = roc_event["invocationId"]
 
+        # Each entry is either a finished result or a pending tool call
+        invocationResults: List[Union[Dict, Callable]] = list()
         for invocationInput in roc_event["invocationInputs"]:
 
             # This is a Tagged Union structure. Only one of the following top level keys will be set: apiInvocationInput, functionInvocationInput.
@@ -41,31 +64,10 @@ class ProcessROC:
             functionInvocationInput = invocationInput["functionInvocationInput"]
             actionGroup = functionInvocationInput["actionGroup"]
 
-            parameters = dict()
-            for param in functionInvocationInput["parameters"]:
-                if param["type"] == "array":
-                    result = None
-                    try:
-                        result = json.loads(param["value"])
-                    except Exception:
-                        json_str = (
-                            param["value"]
-                            .replace("=", ":")
-                            .replace("[{", '[{"')
-                            .replace("}]", '"}]')
-                        )
-                        json_str = json_str.replace(", ", '", "').replace(":", '":"')
-                        result = json.loads(json_str)
-                    finally:
-                        parameters[param["name"]] = result
-                elif param["type"] == "string":
-                    parameters[param["name"]] = param["value"]
-                elif param["type"] == "number":
-                    parameters[param["name"]] = int(param["value"])
-                elif param["type"] == "boolean":
-                    parameters[param["name"]] = bool(param["value"])
-                elif param["type"] == "integer":
-                    parameters[param["name"]] = int(param["value"])
+            # Decoders are compiled once per tool from its annotations
+            parameters = get_parameter_decoder(
+                tool_map.get(functionInvocationInput["function"])
+            ).decode(functionInvocationInput["parameters"])
             if (
                 actionInvocationType == "RESULT"
                 or actionInvocationType == "USER_CONFIRMATION_AND_RESULT"
@@ -80,40 +82,89 @@ class ProcessROC:
                     )
 
                 if actionInvocationType == "USER_CONFIRMATION_AND_RESULT":
+                    confirmationState = {"returnControlInvocationResults": []}
                     await ProcessROC.process_user_confirmation(
-                        sessionState=inlineSessionState,
+                        sessionState=confirmationState,
                         tool_to_invoke=tool_to_invoke,
                         functionInvocationInput=functionInvocationInput,
                         include_result=True,
                         parameters=parameters,
+                        sink=sink,
+                        execution=execution,
+                    )
+                    invocationResults.extend(
+                        confirmationState["returnControlInvocationResults"]
                     )
 
                 else:
-                    inlineSessionState["returnControlInvocationResults"].append(
-                        {
-                            "functionResult": await ProcessROC.invoke_roc_function(
-                                functionInvocationInput=functionInvocationInput,
-                                tool_to_invoke=tool_to_invoke,
-                                parameters=parameters,
-                                confirm=None,
-                            )
-                        }
+                    invocationResults.append(
+                        functools.partial(
+                            ProcessROC.invoke_roc_function,
+                            functionInvocationInput=functionInvocationInput,
+                            tool_to_invoke=tool_to_invoke,
+                            parameters=parameters,
+                            confirm=None,
+                            sink=sink,
+                            execution=execution,
+                        )
                     )
 
             elif actionInvocationType == "USER_CONFIRMATION":
                 tool_to_invoke = functionInvocationInput["function"]
+                confirmationState = {"returnControlInvocationResults": []}
                 await ProcessROC.process_user_confirmation(
-                    sessionState=inlineSessionState,
+                    sessionState=confirmationState,
                     tool_to_invoke=tool_to_invoke,
                     functionInvocationInput=functionInvocationInput,
                     include_result=False,
                     parameters=parameters,
+                    sink=sink,
+                )
+                invocationResults.extend(
+                    confirmationState["returnControlInvocationResults"]
                 )
 
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+        async def resolve(invocationResult: Union[Dict, Callable]) -> Dict:
+            if not callable(invocationResult):
+                return invocationResult
+            if semaphore is None:
+                return {"functionResult": await invocationResult()}
+            async with semaphore:
+                return {"functionResult": await invocationResult()}
+
+        inlineSessionState["returnControlInvocationResults"] = list(
+            await asyncio.gather(
+                *[resolve(invocationResult) for invocationResult in invocationResults]
+            )
+        )
+
+        # Images and binary content of tool results are sent as files
+        files = [
+            file
+            for invocationResult in inlineSessionState["returnControlInvocationResults"]
+            for file in ProcessROC.get_result_files(invocationResult)
+        ]
+        if files:
+            inlineSessionState["files"] = files
+
         inlineSessionState.update(inlineSessionState)
 
         return inlineSessionState
 
+    @staticmethod
+    def get_result_files(invocationResult: Dict) -> List[Dict]:
+        body = (
+            invocationResult["functionResult"]
+            .get("responseBody", {})
+            .get("TEXT", {})
+            .get("body")
+        )
+        if isinstance(body, ToolResult):
+            return body.files
+        return list()
+
     @staticmethod
     async def process_user_confirmation(
         sessionState: Dict,
@@ -121,6 +172,8 @@ class ProcessROC:
         include_result: bool,
         parameters: Dict,
         tool_to_invoke: Union[str, Callable] = None,
+        sink: OutputSink = console_sink,
+        execution: ToolExecutionConfig = default_tool_execution,
     ):
         while True:
             if isinstance(tool_to_invoke, Callable):
@@ -138,6 +191,8 @@ class ProcessROC:
                                 tool_to_invoke=tool_to_invoke,
                                 confirm="CONFIRM",
                                 parameters=parameters,
+                                sink=sink,
+                                execution=execution,
                             )
                         }
                     )
@@ -193,6 +248,8 @@ class ProcessROC:
         parameters: Dict = dict(),
         confirm: str = None,
         tool_to_invoke: Callable = None,
+        sink: OutputSink = console_sink,
+        execution: ToolExecutionConfig = default_tool_execution,
     ) -> Dict:
 
         functionResult = dict
@@ -200,17 +257,26 @@ class ProcessROC:
         # TODO: responseState
         try:
 
-            if inspect.iscoroutinefunction(tool_to_invoke):
-                result = await tool_to_invoke(**parameters)
-            else:
-                result = tool_to_invoke(**parameters)
+            cache = get_tool_cache(tool_to_invoke)
+            hit = False
+            if cache:
+                hit, result = cache.get(parameters)
+                record_tool_cache(cache, hit)
 
-            print(
-                colored(
-                    f"Tool output: {result}",
-                    TraceColor.invocation_input,
-                )
-            )
+            if not hit:
+                # Sync tools run off the event loop, see ToolExecutionConfig
+                result = await execution.run(tool_to_invoke, parameters)
+                if cache:
+                    cache.set(parameters, result)
+
+            if sink.enabled:
+                if cache:
+                    sink.write(
+                        f"Tool cache {'hit' if hit else 'miss'}: {cache.name} "
+                        + f"(hits: {cache.stats.hits}, misses: {cache.stats.misses})",
+                        TraceColor.invocation_input,
+                    )
+                sink.write(f"Tool output: {result}", TraceColor.invocation_input)
 
             functionResult = {
                 "actionGroup": functionInvocationInput["actionGroup"],
@@ -218,6 +284,18 @@ class ProcessROC:
                 "function": functionInvocationInput["function"],
                 "responseBody": {"TEXT": {"body": result}},
             }
+        except ToolTimeoutError as e:
+            functionResult = {
+                "actionGroup": functionInvocationInput["actionGroup"],
+                "agentId": functionInvocationInput["agentId"],
+                "function": functionInvocationInput["function"],
+                "responseBody": {
+                    "TEXT": {
+                        "body": f"{functionInvocationInput['function']} timed out after {e.timeout} seconds"
+                    }
+                },
+                "responseState": "FAILURE",
+            }
         except Exception as e:
             functionResult = {
                 "actionGroup": functionInvocationInput["actionGroup"],
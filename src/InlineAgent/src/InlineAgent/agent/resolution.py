@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Tuple
+
+
+# Lookups are I/O bound, the threads mostly wait on control-plane calls
+MAX_RESOLUTION_WORKERS = 16
+
+
+class ResolutionError(ValueError):
+    """Raised when resources of an agent could not be resolved.
+
+    ``errors`` holds every failure as (name, exception), not only the first.
+    """
+
+    def __init__(self, errors: List[Tuple[str, Exception]]):
+        self.errors = errors
+        details = "\n".join(f"  {name}: {error}" for name, error in errors)
+        super().__init__(f"Failed to resolve {len(errors)} resource(s):\n{details}")
+
+
+def resolve_all(
+    tasks: List[Tuple[str, Callable[[], Any]]],
+    max_workers: int = MAX_RESOLUTION_WORKERS,
+) -> List[Any]:
+    """Run blocking lookups concurrently, results are in the order of ``tasks``.
+
+    Every lookup runs to completion, then a ResolutionError lists the ones
+    that failed.
+    """
+    if len(tasks) <= 1:
+        # Not worth a thread pool
+        outcomes = list()
+        for _, task in tasks:
+            try:
+                outcomes.append((task(), None))
+            except Exception as e:
+                outcomes.append((None, e))
+    else:
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(tasks)),
+            thread_name_prefix="InlineAgentResolve",
+        ) as executor:
+            futures = [executor.submit(task) for _, task in tasks]
+        outcomes = list()
+        for future in futures:
+            error = future.exception()
+            outcomes.append((None if error else future.result(), error))
+
+    errors = [
+        (name, error)
+        for (name, _), (_, error) in zip(tasks, outcomes)
+        if error is not None
+    ]
+    if errors:
+        raise ResolutionError(errors)
+    return [result for result, _ in outcomes]
@@ -0,0 +1,81 @@
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+
+# Bump when the layout of the compiled invoke params changes
+SNAPSHOT_VERSION = 1
+
+
+def tool_fingerprint(tool: Callable) -> Dict[str, Any]:
+    """Source of a tool, so editing a tool invalidates the snapshot."""
+    try:
+        source = inspect.getsource(tool)
+    except (OSError, TypeError):
+        source = f"{tool.__doc__}{inspect.signature(tool)}"
+    return {
+        "name": getattr(tool, "__qualname__", repr(tool)),
+        "source": source,
+        "confirmation": getattr(tool, "__is_confirmation_required__", False),
+    }
+
+
+def to_material(value: Any) -> Any:
+    """JSON friendly view of the configuration an invoke payload is built from."""
+    if isinstance(value, BaseModel):
+        fields = type(value).model_fields
+        return {name: to_material(getattr(value, name)) for name in fields}
+    if isinstance(value, dict):
+        return {str(key): to_material(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_material(item) for item in value]
+    if callable(value):
+        return tool_fingerprint(value)
+    if hasattr(value, "function_schema"):
+        # Connected MCP server
+        return value.function_schema
+    return value
+
+
+def snapshot_key(material: Any) -> str:
+    material = {"version": SNAPSHOT_VERSION, "material": material}
+    return hashlib.sha256(
+        json.dumps(material, sort_keys=True, default=str).encode("utf8")
+    ).hexdigest()
+
+
+def load_snapshot(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot.get("invokeParams")
+
+
+def save_snapshot(path: str, invoke_params: Dict) -> bool:
+    """Write the snapshot atomically. Returns False if it cannot be serialized."""
+    try:
+        data = json.dumps({"version": SNAPSHOT_VERSION, "invokeParams": invoke_params})
+    except (TypeError, ValueError):
+        return False
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    return True
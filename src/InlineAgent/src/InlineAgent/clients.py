@@ -0,0 +1,144 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+
+@dataclass(frozen=True)
+class Identity:
+    """Caller identity of a profile, as returned by STS."""
+
+    account_id: str
+    arn: str
+    region: Optional[str]
+    # time.monotonic() after which the identity is resolved again
+    expires_at: float
+
+
+class ClientRegistry:
+    """Thread-safe registry of boto3 sessions and clients shared across agents.
+
+    Sessions are keyed by profile and clients by profile, service and region,
+    so credential resolution, endpoint discovery and TLS connection setup
+    happen once per process instead of once per request.
+    """
+
+    def __init__(
+        self,
+        max_pool_connections: int = 50,
+        tcp_keepalive: bool = True,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        retries: Optional[Dict[str, Any]] = None,
+        identity_ttl: float = 3600.0,
+    ):
+        self._lock = threading.RLock()
+        self._identity_lock = threading.Lock()
+        self._sessions: Dict[str, boto3.Session] = dict()
+        self._clients: Dict[Tuple[str, str, Optional[str]], Any] = dict()
+        self._identities: Dict[str, Identity] = dict()
+        self.identity_ttl = identity_ttl
+        self._config_kwargs: Dict[str, Any] = dict()
+        self.configure(
+            max_pool_connections=max_pool_connections,
+            tcp_keepalive=tcp_keepalive,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries=retries,
+        )
+
+    @property
+    def config(self) -> Config:
+        return Config(**self._config_kwargs)
+
+    def configure(self, **config_kwargs) -> None:
+        """Update the botocore ``Config`` used for new clients.
+
+        Accepts any ``botocore.config.Config`` keyword, e.g.
+        ``max_pool_connections`` or ``tcp_keepalive``. Cached clients are
+        dropped so the next lookup picks up the new configuration.
+        """
+        with self._lock:
+            self._config_kwargs.update(
+                {k: v for k, v in config_kwargs.items() if v is not None}
+            )
+            self._clients = dict()
+
+    def get_session(self, profile: str = "default") -> boto3.Session:
+        with self._lock:
+            if profile not in self._sessions:
+                self._sessions[profile] = boto3.Session(profile_name=profile)
+            return self._sessions[profile]
+
+    def get_client(
+        self,
+        service_name: str,
+        profile: str = "default",
+        region_name: Optional[str] = None,
+    ):
+        key = (profile, service_name, region_name)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        # boto3 sessions are not thread-safe, clients created from them are.
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self.get_session(profile).client(
+                    service_name, region_name=region_name, config=self.config
+                )
+            return self._clients[key]
+
+    def get_identity(self, profile: str = "default", refresh: bool = False) -> Identity:
+        """Resolve the account of a profile once and share it across agents.
+
+        The identity is resolved again after ``identity_ttl`` seconds, or
+        shortly before the profile's temporary credentials expire.
+        """
+        identity = self._identities.get(profile)
+        if identity and not refresh and identity.expires_at > time.monotonic():
+            return identity
+
+        with self._identity_lock:
+            current = self._identities.get(profile)
+            if (
+                current is not None
+                and current is not identity
+                and current.expires_at > time.monotonic()
+            ):
+                # Resolved by another thread while this one was waiting
+                return current
+
+            response = self.get_client("sts", profile=profile).get_caller_identity()
+            session = self.get_session(profile)
+            identity = Identity(
+                account_id=response["Account"],
+                arn=response["Arn"],
+                region=session.region_name,
+                expires_at=self._get_identity_expiry(session),
+            )
+            self._identities[profile] = identity
+            return identity
+
+    def _get_identity_expiry(self, session: boto3.Session) -> float:
+        ttl = self.identity_ttl
+        credentials = session.get_credentials()
+        # Only refreshable (temporary) credentials carry an expiry time
+        expiry_time = getattr(credentials, "_expiry_time", None)
+        if isinstance(expiry_time, datetime):
+            remaining = (expiry_time - datetime.now(timezone.utc)).total_seconds()
+            ttl = min(ttl, max(remaining - 300, 0))
+        return time.monotonic() + ttl
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions = dict()
+            self._clients = dict()
+            self._identities = dict()
+
+
+client_registry = ClientRegistry()
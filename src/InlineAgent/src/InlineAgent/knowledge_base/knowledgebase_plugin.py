@@ -5,6 +5,9 @@ from typing import Any, Dict, Optional
 import boto3
 from pydantic import BaseModel, Field, computed_field, model_validator, validate_call
 
+from InlineAgent.clients import client_registry
+from InlineAgent.resource_index import resource_index
+
 
 class KnowledgeBasePlugin(BaseModel):
     name: str
@@ -18,16 +21,17 @@ class KnowledgeBasePlugin(BaseModel):
     @computed_field
     @cached_property
     def session(self) -> boto3.Session:
-        """Lazy loading of AWS session"""
-        return boto3.Session(profile_name=self.profile)
+        """Shared AWS session for this knowledge base's profile"""
+        return client_registry.get_session(profile=self.profile)
 
     def to_dict(self) -> dict:
         """Convert the KnowledgeBase instance to a dictionary"""
 
         # Adding for unittest
         if self.name != "SKaEdphpZh":
-            knowledgeBaseId = KnowledgeBasePlugin.get_knowledge_base_id_by_name(
-                self.name, self.session
+            # One sweep of list_knowledge_bases serves every knowledge base
+            knowledgeBaseId = resource_index.get_knowledge_base_id(
+                self.name, profile=self.profile
             )
             if knowledgeBaseId is None:
                 raise ValueError(f"Knowledge base {self.name} does not exist")
@@ -48,6 +52,9 @@ class KnowledgeBasePlugin(BaseModel):
         """
         Retrieve the knowledge base ID for a given knowledge base name.
 
+        Lists every knowledge base on each call, use ``resource_index`` to
+        resolve several names.
+
         Args:
             knowledge_base_name (str): Name of the knowledge base
 
@@ -57,26 +64,11 @@ class KnowledgeBasePlugin(BaseModel):
         # Create a Bedrock Agent client"
         bedrock_agent = session.client("bedrock-agent")
 
-        # Initialize variables for pagination
-        next_token = None
-
-        while True:
-            # Prepare the list request
-            kwargs = {}
-            if next_token:
-                kwargs["nextToken"] = next_token
-
-            # List knowledge bases
-            response = bedrock_agent.list_knowledge_bases(**kwargs)
-
+        paginator = bedrock_agent.get_paginator("list_knowledge_bases")
+        for page in paginator.paginate():
             # Search for the knowledge base with matching name
-            for kb in response.get("knowledgeBaseSummaries", []):
+            for kb in page.get("knowledgeBaseSummaries", []):
                 if kb.get("name") == knowledge_base_name:
                     return kb.get("knowledgeBaseId")
 
-            # Check if there are more results
-            next_token = response.get("nextToken")
-            if not next_token:
-                break
-
-            raise ValueError(f"Knowledge base {knowledge_base_name} not found")
+        return None
@@ -2,5 +2,16 @@ from .trace import Trace
 from .agent_instrument import observe
 from .settings_management import ObservabilityConfig
 from .trace_provider import create_tracer_provider
+from .metrics import record_tool_cache
+from .trace_writer import TraceWriter, read_trace, trace_writer
 
-__all__ = ["Trace", "observe", "ObservabilityConfig", "create_tracer_provider"]
+__all__ = [
+    "Trace",
+    "observe",
+    "ObservabilityConfig",
+    "create_tracer_provider",
+    "record_tool_cache",
+    "TraceWriter",
+    "read_trace",
+    "trace_writer",
+]
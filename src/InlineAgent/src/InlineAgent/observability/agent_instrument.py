@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 import functools
 import logging
 import os
+from typing import Dict
 from opentelemetry import trace as otel_trace
 from termcolor import colored
 from rich.console import Console
@@ -16,7 +17,10 @@ from openinference.semconv.trace import (
 
 from .utils import add_citation, get_agent_from_caller_chain
 from .semantics import SpanAttributes, SpanName
+from .pipeline import TracePipeline
 from .process import ProcessL2Trace
+from .sampling import TraceSampler
+from .trace import Trace
 from .settings_management import ObservabilityConfig
 from .span_manager import SpanManager
 from .utils import json_safe
@@ -32,11 +36,97 @@ config = ObservabilityConfig()
 
 tracer = otel_trace.get_tracer(config.BEDROCK_AGENT_TRACER_NAME)
 
+sampler = TraceSampler.from_config(config)
+
 guardrail_span: otel_trace.Span = None
 output_stream_guardrail_intervene: bool = False
 is_guardrail: bool = False
 
 
+def process_guardrail_trace(
+    trace_data: Dict,
+    span_manager: SpanManager,
+    agent_id: str,
+    agent_alias_id: str,
+    stream_final_response: bool,
+    intervened_output: bool,
+):
+    """Spans of a guardrail trace event, ``intervened_output`` is decided by ``observe``."""
+    global guardrail_span
+
+    if "trace" not in trace_data or "guardrailTrace" not in trace_data["trace"]:
+        return
+
+    session_id = trace_data["sessionId"]
+    caller_chain = trace_data["callerChain"]
+    guardrail_trace = trace_data["trace"]["guardrailTrace"]
+    sub_agent_id, sub_agent_alias_id = get_agent_from_caller_chain(
+        caller_chain=caller_chain, index=-1
+    )
+
+    if "inputAssessments" in guardrail_trace:
+        agent_span = span_manager.create_agent_span_return(
+            agent_session_id=session_id,
+            caller_chain=caller_chain,
+            attributes={
+                OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.AGENT.value,
+                SpanAttributes.AGENT_ID.value: sub_agent_id,
+                SpanAttributes.AGENT_ALIAS_ID.value: sub_agent_alias_id,
+                OtelSpanAttributes.LLM_SYSTEM: "aws.bedrock",
+                OtelSpanAttributes.SESSION_ID: session_id,
+            },
+            name=f"Agent {agent_id}:{agent_alias_id}",
+        )
+
+        guardrail_span = tracer.start_span(
+            name=SpanName.GUARDRAIL.value,
+            kind=SpanKind.CLIENT,
+            attributes={
+                OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.GUARDRAIL.value,
+                SpanAttributes.GUARDRAIL_ACTION.value: guardrail_trace["action"],
+            },
+            context=otel_trace.set_span_in_context(agent_span),
+        )
+        guardrail_span.set_attributes(
+            {
+                OtelSpanAttributes.INPUT_VALUE: json_safe(
+                    guardrail_trace["inputAssessments"]
+                ),
+                OtelSpanAttributes.INPUT_MIME_TYPE: "application/json",
+            }
+        )
+
+        guardrail_span.set_status(Status(StatusCode.OK))
+        guardrail_span.end()
+        guardrail_span = None
+
+    if "outputAssessments" in guardrail_trace:
+        if stream_final_response is True and not intervened_output:
+            return
+
+        guardrail_span = tracer.start_span(
+            name=SpanName.GUARDRAIL.value,
+            kind=SpanKind.CLIENT,
+            attributes={
+                OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.GUARDRAIL.value,
+                SpanAttributes.GUARDRAIL_ACTION.value: guardrail_trace["action"],
+            },
+            context=otel_trace.set_span_in_context(
+                span_manager.spans[session_id].agent_span.span
+            ),
+        )
+        guardrail_span.set_attributes(
+            {
+                OtelSpanAttributes.OUTPUT_VALUE: json_safe(
+                    guardrail_trace["outputAssessments"]
+                ),
+                OtelSpanAttributes.OUTPUT_MIME_TYPE: "application/json",
+            }
+        )
+        guardrail_span.set_status(Status(StatusCode.OK))
+        guardrail_span.end()
+
+
 def observe(show_traces: bool = True, save_traces: bool = False):
     def decorator(func):
         @functools.wraps(func)
@@ -65,20 +155,30 @@ def observe(show_traces: bool = True, save_traces: bool = False):
             )
             
             stream_final_response= stream_final_response["streamFinalResponse"]
-            span_manager = SpanManager()
+            span_manager = SpanManager(
+                recording=config.PRODUCE_BEDROCK_OTEL_TRACES
+                and sampler.head(sessionId, agent_id, agent_alias_id, agent_name)
+            )
+            # Trace events of an invocation left out by head sampling, for tail sampling
+            sampled_out_traces = (
+                list()
+                if config.PRODUCE_BEDROCK_OTEL_TRACES
+                and not span_manager.recording
+                and sampler.tail_enabled
+                else None
+            )
 
             time_before_call = datetime.now(timezone.utc)
             time_after_call = None
 
-            if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                root_agent_span = span_manager.create_agent_span_return(
+            def create_root_span(start_time=None):
+                return span_manager.create_agent_span_return(
                     agent_session_id=sessionId,
                     caller_chain=[
                         {
                             "agentAliasArn": f"arn:aws:bedrock:agent:agent-alias/{agent_id}/{agent_alias_id}"
                         }
                     ],
-                    # start_time=int(time_before_call.timestamp() * 1e9),
                     attributes={
                         OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.AGENT.value,
                         OtelSpanAttributes.INPUT_VALUE: inputText,
@@ -92,14 +192,83 @@ def observe(show_traces: bool = True, save_traces: bool = False):
                         OtelSpanAttributes.LLM_SYSTEM: "aws.bedrock",
                     },
                     name=f"Agent {agent_id}:{agent_alias_id}",
+                    start_time=start_time,
                 )
 
+            root_agent_span = None
+            if span_manager.recording:
+                root_agent_span = create_root_span()
+
             agent_answer = str()
             cite = None
             citations = list()
             total_input_tokens = 0
             total_output_tokens = 0
             total_llm_calls = 0
+            output_guardrail_seen = False
+            guardrail_intervened = False
+
+            def process_trace(item):
+                trace_data, intervened_output = item
+
+                if span_manager.recording:
+                    process_guardrail_trace(
+                        trace_data=trace_data,
+                        span_manager=span_manager,
+                        agent_id=agent_id,
+                        agent_alias_id=agent_alias_id,
+                        stream_final_response=stream_final_response,
+                        intervened_output=intervened_output,
+                    )
+                elif sampled_out_traces is not None:
+                    sampled_out_traces.append(item)
+
+                # Saved and counted when the event was read
+                ProcessL2Trace.process_trace_event(
+                    trace_data=trace_data,
+                    span_manager=span_manager,
+                    save_traces=False,
+                    session_id=sessionId,
+                    show_traces=show_traces,
+                )
+
+            def record_sampled_out(reason: str):
+                """Spans of an invocation left out by head sampling and kept by tail sampling."""
+                span_manager.recording = True
+                root_span = create_root_span(
+                    start_time=int(time_before_call.timestamp() * 1e9)
+                )
+                root_span.set_attribute(SpanAttributes.SAMPLING_REASON.value, reason)
+                try:
+                    for trace_data, intervened_output in sampled_out_traces:
+                        process_guardrail_trace(
+                            trace_data=trace_data,
+                            span_manager=span_manager,
+                            agent_id=agent_id,
+                            agent_alias_id=agent_alias_id,
+                            stream_final_response=stream_final_response,
+                            intervened_output=intervened_output,
+                        )
+                        # Printed, saved and counted when the event was read
+                        ProcessL2Trace.process_trace_event(
+                            trace_data=trace_data,
+                            span_manager=span_manager,
+                            save_traces=False,
+                            session_id=sessionId,
+                            show_traces=False,
+                        )
+                except Exception as e:
+                    # E.g. events of a failed stream, keep the spans built so far
+                    root_span.set_attribute(
+                        SpanAttributes.SAMPLING_REPLAY_ERROR.value, str(e)
+                    )
+                return root_span
+
+            pipeline = TracePipeline(
+                handler=process_trace,
+                maxsize=config.TRACE_QUEUE_SIZE,
+                policy=config.TRACE_QUEUE_POLICY,
+            )
             try:
                 response = func(
                     inputText=inputText,
@@ -145,7 +314,7 @@ def observe(show_traces: bool = True, save_traces: bool = False):
                             with open(file_name, "wb") as f:
                                 f.write(file_bytes)
 
-                            if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                            if span_manager.recording:
                                 with open(file_name, "rb") as f:
                                     root_agent_span.set_attribute(
                                         SpanAttributes.FILES.value + str(idx + 1),
@@ -160,7 +329,7 @@ def observe(show_traces: bool = True, save_traces: bool = False):
                             )
 
                     if "returnControl" in event:
-                        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        if span_manager.recording:
 
                             roc_span = tracer.start_span(
                                 name="Return of Control",
@@ -178,168 +347,59 @@ def observe(show_traces: bool = True, save_traces: bool = False):
                     if "trace" in event:
 
                         trace_data = event["trace"]
+                        intervened_output = False
 
+                        # Interventions change the answer so they are read here, the pipeline builds the spans
                         if "trace" in trace_data:
                             if "guardrailTrace" in trace_data["trace"]:
-                                session_id = trace_data["sessionId"]
-                                caller_chain = trace_data["callerChain"]
                                 guardrail_trace = trace_data["trace"]["guardrailTrace"]
                                 sub_agent_id, sub_agent_alias_id = (
                                     get_agent_from_caller_chain(
-                                        caller_chain=caller_chain, index=-1
+                                        caller_chain=trace_data["callerChain"],
+                                        index=-1,
                                     )
                                 )
-
-                                if (
+                                is_root_agent = (
                                     sub_agent_id == agent_id
                                     and sub_agent_alias_id == agent_alias_id
-                                ):
+                                )
+                                if is_root_agent:
                                     is_guardrail = True
 
-                                if "inputAssessments" in guardrail_trace:
-
-                                    if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                                        agent_span = span_manager.create_agent_span_return(
-                                            agent_session_id=session_id,
-                                            caller_chain=caller_chain,
-                                            # start_time=int(event_time.timestamp() * 1e9),
-                                            attributes={
-                                                OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.AGENT.value,
-                                                SpanAttributes.AGENT_ID.value: sub_agent_id,
-                                                SpanAttributes.AGENT_ALIAS_ID.value: sub_agent_alias_id,
-                                                OtelSpanAttributes.LLM_SYSTEM: "aws.bedrock",
-                                                OtelSpanAttributes.SESSION_ID: session_id,
-                                            },
-                                            name=f"Agent {agent_id}:{agent_alias_id}",
-                                        )
-
-                                    if guardrail_trace["action"] == "INTERVENED":
-                                        agent_answer = str()
-
-                                    if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                                        guardrail_span = tracer.start_span(
-                                            name=SpanName.GUARDRAIL.value,
-                                            kind=SpanKind.CLIENT,
-                                            attributes={
-                                                OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.GUARDRAIL.value,
-                                                SpanAttributes.GUARDRAIL_ACTION.value: guardrail_trace[
-                                                    "action"
-                                                ],
-                                            },
-                                            context=otel_trace.set_span_in_context(
-                                                agent_span
-                                            ),
-                                        )
-                                        guardrail_span.set_attributes(
-                                            {
-                                                OtelSpanAttributes.INPUT_VALUE: json_safe(
-                                                    guardrail_trace["inputAssessments"]
-                                                ),
-                                                OtelSpanAttributes.INPUT_MIME_TYPE: "application/json",
-                                            }
-                                        )
-
-                                        guardrail_span.set_status(Status(StatusCode.OK))
-                                        guardrail_span.end()
-                                        guardrail_span = None
-
-                                if "outputAssessments" in guardrail_trace:
-                                    if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                                        if stream_final_response is False:
-                                            if (
-                                                guardrail_trace["action"]
-                                                == "INTERVENED"
-                                            ):
-                                                agent_answer = str()
-
-                                            guardrail_span = tracer.start_span(
-                                                name=SpanName.GUARDRAIL.value,
-                                                kind=SpanKind.CLIENT,
-                                                attributes={
-                                                    OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.GUARDRAIL.value,
-                                                    SpanAttributes.GUARDRAIL_ACTION.value: guardrail_trace[
-                                                        "action"
-                                                    ],
-                                                },
-                                                context=otel_trace.set_span_in_context(
-                                                    span_manager.spans[
-                                                        session_id
-                                                    ].agent_span.span
-                                                ),
-                                            )
-                                            guardrail_span.set_attributes(
-                                                {
-                                                    OtelSpanAttributes.OUTPUT_VALUE: json_safe(
-                                                        guardrail_trace[
-                                                            "outputAssessments"
-                                                        ]
-                                                    ),
-                                                    OtelSpanAttributes.OUTPUT_MIME_TYPE: "application/json",
-                                                }
-                                            )
-                                            guardrail_span.set_status(
-                                                Status(StatusCode.OK)
-                                            )
-                                            guardrail_span.end()
-                                        else:
-                                            if (
-                                                not guardrail_span
-                                                and guardrail_trace["action"]
-                                                == "INTERVENED"
-                                            ):
-
-                                                if (
-                                                    sub_agent_id == agent_id
-                                                    and sub_agent_alias_id
-                                                    == agent_alias_id
-                                                ):
-                                                    output_stream_guardrail_intervene = (
-                                                        True
-                                                    )
-
-                                                guardrail_span = tracer.start_span(
-                                                    name=SpanName.GUARDRAIL.value,
-                                                    kind=SpanKind.CLIENT,
-                                                    attributes={
-                                                        OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.GUARDRAIL.value,
-                                                        SpanAttributes.GUARDRAIL_ACTION.value: guardrail_trace[
-                                                            "action"
-                                                        ],
-                                                    },
-                                                    context=otel_trace.set_span_in_context(
-                                                        span_manager.spans[
-                                                            session_id
-                                                        ].agent_span.span
-                                                    ),
-                                                )
-                                                guardrail_span.set_attributes(
-                                                    {
-                                                        OtelSpanAttributes.OUTPUT_VALUE: json_safe(
-                                                            guardrail_trace[
-                                                                "outputAssessments"
-                                                            ]
-                                                        ),
-                                                        OtelSpanAttributes.OUTPUT_MIME_TYPE: "application/json",
-                                                    }
-                                                )
-                                                guardrail_span.set_status(
-                                                    Status(StatusCode.OK)
-                                                )
-                                                guardrail_span.end()
-
-                        input_tokens, output_tokens, llm_calls = (
-                            ProcessL2Trace.process_trace_event(
-                                trace_data=event["trace"],
-                                span_manager=span_manager,
-                                save_traces=save_traces,
-                                session_id=sessionId,
-                                show_traces=show_traces,
+                                intervened = guardrail_trace["action"] == "INTERVENED"
+                                if intervened:
+                                    guardrail_intervened = True
+                                if "inputAssessments" in guardrail_trace and intervened:
+                                    agent_answer = str()
+
+                                if (
+                                    "outputAssessments" in guardrail_trace
+                                    and config.PRODUCE_BEDROCK_OTEL_TRACES
+                                ):
+                                    if stream_final_response is False:
+                                        if intervened:
+                                            agent_answer = str()
+                                    elif intervened and not output_guardrail_seen:
+                                        # Only the first intervention gets a span
+                                        output_guardrail_seen = True
+                                        intervened_output = True
+                                        if is_root_agent:
+                                            output_stream_guardrail_intervene = True
+
+                        # Saving and counting are cheap and never dropped, unlike span building and printing
+                        if save_traces:
+                            ProcessL2Trace.save_trace(
+                                trace_data=trace_data, session_id=sessionId
                             )
+                        input_tokens, output_tokens, llm_calls = Trace.get_usage(
+                            trace=trace_data.get("trace", dict())
                         )
                         total_input_tokens += int(input_tokens)
                         total_output_tokens += int(output_tokens)
                         total_llm_calls += int(llm_calls)
 
+                        pipeline.submit((trace_data, intervened_output))
+
                     # Get Final Answer
                     if "chunk" in event:
                         if "attribution" in event["chunk"]:
@@ -379,7 +439,19 @@ def observe(show_traces: bool = True, save_traces: bool = False):
 
                 time_after_call = datetime.now(timezone.utc)
 
-                if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                # Every span is built before the root span is completed
+                pipeline.close()
+
+                if sampled_out_traces is not None:
+                    reason = sampler.tail(
+                        error=False,
+                        guardrail_intervened=guardrail_intervened,
+                        duration=(time_after_call - time_before_call).total_seconds(),
+                    )
+                    if reason:
+                        root_agent_span = record_sampled_out(reason)
+
+                if span_manager.recording:
                     if sessionId not in span_manager.spans:
                         raise RuntimeError("Root Agent span not found")
                     if citations and output_stream_guardrail_intervene is False:
@@ -431,24 +503,41 @@ def observe(show_traces: bool = True, save_traces: bool = False):
 
             except Exception as e:
                 # Handle exceptions
+                try:
+                    # The worker must be done with the spans before they are ended
+                    pipeline.close()
+                except Exception:
+                    pass
 
                 if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                    root_agent_span.record_exception(e)
-                    root_agent_span.set_attribute("error.message", str(e))
-                    root_agent_span.set_attribute("error.type", e.__class__.__name__)
-                    root_agent_span.set_status(Status(StatusCode.ERROR))
+                    if sampled_out_traces is not None and not span_manager.recording:
+                        reason = sampler.tail(
+                            error=True,
+                            guardrail_intervened=guardrail_intervened,
+                            duration=(
+                                datetime.now(timezone.utc) - time_before_call
+                            ).total_seconds(),
+                        )
+                        if reason:
+                            root_agent_span = record_sampled_out(reason)
 
-                    agent_answer = str()
-                    agent_answer = json_safe({"error": str(e), "exception": str(e)})
+                    if span_manager.recording:
+                        root_agent_span.record_exception(e)
+                        root_agent_span.set_attribute("error.message", str(e))
+                        root_agent_span.set_attribute("error.type", e.__class__.__name__)
+                        root_agent_span.set_status(Status(StatusCode.ERROR))
 
-                    root_agent_span.set_attribute(
-                        OtelSpanAttributes.OUTPUT_VALUE, json_safe(agent_answer)
-                    )
-                    root_agent_span.set_attribute(
-                        OtelSpanAttributes.OUTPUT_MIME_TYPE, "application/json"
-                    )
+                        agent_answer = str()
+                        agent_answer = json_safe({"error": str(e), "exception": str(e)})
+
+                        root_agent_span.set_attribute(
+                            OtelSpanAttributes.OUTPUT_VALUE, json_safe(agent_answer)
+                        )
+                        root_agent_span.set_attribute(
+                            OtelSpanAttributes.OUTPUT_MIME_TYPE, "application/json"
+                        )
 
-                    span_manager.end_all_spans(status_code=StatusCode.ERROR)
+                        span_manager.end_all_spans(status_code=StatusCode.ERROR)
 
                     raise Exception(e)
 
@@ -460,6 +549,14 @@ def observe(show_traces: bool = True, save_traces: bool = False):
 
             duration = (time_after_call - time_before_call).total_seconds()
 
+            if pipeline.dropped:
+                print(
+                    colored(
+                        f"\n{pipeline.dropped} trace events were not processed into spans or printed, the trace queue was full",
+                        TraceColor.error,
+                    )
+                )
+
             print(
                 colored(
                     f"\nAgent made a total of {total_llm_calls} LLM calls, "
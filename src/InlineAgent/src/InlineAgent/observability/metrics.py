@@ -0,0 +1,24 @@
+"""OpenTelemetry metrics of the SDK.
+
+Instruments are created on the global meter provider. Nothing is exported
+until the application configures one, e.g. with an OTLP metric exporter.
+"""
+
+from opentelemetry import metrics
+
+from InlineAgent.tools.cache import ToolCache
+
+meter = metrics.get_meter("InlineAgent")
+
+tool_cache_requests = meter.create_counter(
+    name="inline_agent.tool_cache.requests",
+    unit="{request}",
+    description="Lookups of tool results in the tool cache, by tool and result",
+)
+
+
+def record_tool_cache(cache: ToolCache, hit: bool) -> None:
+    """Count a lookup of ``cache``, the hit rate is hits over all requests."""
+    tool_cache_requests.add(
+        1, {"tool.name": cache.name, "cache.result": "hit" if hit else "miss"}
+    )
@@ -0,0 +1,88 @@
+import queue
+import threading
+from typing import Any, Callable, Literal, Optional
+
+QueuePolicy = Literal["block", "drop_newest", "drop_oldest"]
+
+_CLOSE = object()
+
+
+class TracePipeline:
+    """Processes trace events on a worker thread, in the order they were submitted.
+
+    The thread reading the agent's event stream only enqueues, so answer
+    chunks are not held up by span building or printing of traces. The
+    queue holds ``maxsize`` events, when it is full ``policy`` decides:
+
+    - ``block`` waits for the worker, slowing the reader down to its pace.
+    - ``drop_newest`` drops the event being submitted.
+    - ``drop_oldest`` drops the oldest queued event to make room.
+
+    ``close`` waits until every queued event is processed, then raises the
+    first error of ``handler``, if any.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], None],
+        maxsize: int = 1000,
+        policy: QueuePolicy = "block",
+    ):
+        if policy not in ("block", "drop_newest", "drop_oldest"):
+            raise ValueError(
+                "policy must be one of 'block', 'drop_newest' or 'drop_oldest'"
+            )
+
+        self.handler = handler
+        self.policy = policy
+        self.dropped = 0
+        self.error: Optional[Exception] = None
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._worker = threading.Thread(
+            target=self._run, name="InlineAgentTracePipeline", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, item: Any) -> bool:
+        """Queue ``item``, False if it, or an older event, was dropped."""
+        if self.policy == "block":
+            self._queue.put(item)
+            return True
+
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            if self.policy == "drop_newest":
+                self.dropped += 1
+                return False
+
+        # drop_oldest, the worker may empty the queue in between
+        try:
+            self._queue.get_nowait()
+            self.dropped += 1
+        except queue.Empty:
+            pass
+        self._queue.put(item)
+        return False
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        if self._worker.is_alive():
+            self._queue.put(_CLOSE)
+            self._worker.join(timeout)
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _CLOSE:
+                return
+            if self.error is not None:
+                # Keep draining so a blocked reader is not left waiting
+                continue
+            try:
+                self.handler(item)
+            except Exception as e:
+                self.error = e
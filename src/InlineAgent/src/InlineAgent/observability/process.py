@@ -2,7 +2,6 @@ import json
 import logging
 from typing import Any, Dict, Literal
 
-import os
 from opentelemetry.trace import StatusCode
 from opentelemetry import trace as otel_trace
 from openinference.semconv.trace import (
@@ -20,6 +19,7 @@ from .utils import (
 from .semantics import SpanAttributes, SpanName
 from .settings_management import ObservabilityConfig
 from .span_manager import SpanManager
+from .trace_writer import trace_writer
 from .constants import (
     L2Traces,
     L3OrchestrationTraces,
@@ -44,33 +44,9 @@ class ProcessL2Trace:
 
     @staticmethod
     def save_trace(trace_data: Dict, session_id: int):
+        """Append the event to the session's JSONL file, see ``trace_writer``."""
         try:
-            directory_path = os.path.join(os.getcwd(), "trace")
-            if not os.path.exists(directory_path):
-                try:
-                    os.makedirs(directory_path, exist_ok=True)
-                except OSError as e:
-                    print(f"Error creating directory output: {e}")
-                    raise
-
-            try:
-                with open(
-                    os.path.join(directory_path, str(session_id) + ".json"), "r"
-                ) as file:
-                    data = json.load(file)
-            except (FileNotFoundError, json.JSONDecodeError):
-                # If file doesn't exist or is empty, start with empty list
-                data = []
-
-            # Append the new data
-            data.append(trace_data)
-
-            # Write back to file with proper formatting
-            with open(
-                os.path.join(directory_path, str(session_id) + ".json"), "w"
-            ) as file:
-                json.dump(data, file, indent=2, default=str)
-
+            trace_writer.write(session_id=session_id, trace_data=trace_data)
         except Exception as e:
             print(f"An error occurred: {str(e)}")
 
@@ -413,7 +389,7 @@ class ProcessL4Trace:
                             )
                         )
 
-                    if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                    if span_manager.recording:
                         agent_span = span_manager.create_agent_span_return(
                             agent_session_id=session_id,
                             caller_chain=caller_chain,
@@ -553,7 +529,7 @@ class ProcessL4Trace:
                     except Exception as e:
                         model = None
 
-                    if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                    if span_manager.recording:
                         span_manager.spans[session_id].l3_span[
                             f"{agent_id}:{agent_alias_id}"
                         ].span.set_attributes(
@@ -801,7 +777,7 @@ class ProcessL4Trace:
                         caller_chain=caller_chain, index=-1
                     )
 
-                    if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                    if span_manager.recording:
                         span_manager.spans[session_id].l2_span.span.set_attributes(
                             attributes={SpanName.RATIONALE.value: text}
                         )
@@ -853,7 +829,7 @@ class ProcessL5InvocationInputTrace:
                             name = action_group_invocation_input["apiPath"]
                             parameters = action_group_invocation_input["requestBody"]
 
-                        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        if span_manager.recording:
                             span_manager.assign_new_l3_return(
                                 agent_session_id=session_id,
                                 collab_agent_trace_id=f"{agent_id}:{agent_alias_id}",
@@ -924,7 +900,7 @@ class ProcessL5InvocationInputTrace:
                             ]
                         )
 
-                        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        if span_manager.recording:
 
                             l3_span = span_manager.assign_new_l3_return(
                                 agent_session_id=session_id,
@@ -946,7 +922,7 @@ class ProcessL5InvocationInputTrace:
                             )
 
                         if "text" in agent_collaborator_invocation_input["input"]:
-                            if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                            if span_manager.recording:
 
                                 l3_span.set_attribute(
                                     OtelSpanAttributes.INPUT_VALUE,
@@ -966,7 +942,7 @@ class ProcessL5InvocationInputTrace:
                             "returnControlResults"
                             in agent_collaborator_invocation_input["input"]
                         ):
-                            if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                            if span_manager.recording:
 
                                 l3_span.set_attribute(
                                     OtelSpanAttributes.INPUT_VALUE,
@@ -1027,7 +1003,7 @@ class ProcessL5InvocationInputTrace:
                                 )
                             )
 
-                        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        if span_manager.recording:
                             span_manager.assign_new_l3_return(
                                 agent_session_id=session_id,
                                 collab_agent_trace_id=f"{agent_id}:{agent_alias_id}",
@@ -1085,7 +1061,7 @@ class ProcessL5InvocationInputTrace:
                             caller_chain=caller_chain, index=-1
                         )
 
-                        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        if span_manager.recording:
 
                             span_manager.assign_new_l3_return(
                                 agent_session_id=session_id,
@@ -1142,7 +1118,7 @@ class ProcessL5Obervation:
                             caller_chain=caller_chain, index=-1
                         )
 
-                        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        if span_manager.recording:
                             span_manager.spans[session_id].l3_span[
                                 f"{agent_id}:{agent_alias_id}"
                             ].span.set_attributes(
@@ -1203,7 +1179,7 @@ class ProcessL5Obervation:
 
                         if "text" in agent_collaborator_invocation_output["output"]:
 
-                            if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                            if span_manager.recording:
                                 span_manager.spans[session_id].l3_span[
                                     f"{collab_agent_id}:{collab_agent_alias_id}"
                                 ].span.set_attributes(
@@ -1221,7 +1197,7 @@ class ProcessL5Obervation:
                             "returnControlPayload"
                             in agent_collaborator_invocation_output["output"]
                         ):
-                            if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                            if span_manager.recording:
                                 span_manager.spans[session_id].l3_span[
                                     "{collab_agent_id}:{collab_agent_alias_id}"
                                 ].span.set_attributes(
@@ -1235,7 +1211,7 @@ class ProcessL5Obervation:
                                     },
                                 )
 
-                        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        if span_manager.recording:
                             span_manager.delete_l3_span(
                                 agent_session_id=session_id,
                                 collab_agent_trace_id=f"{collab_agent_id}:{collab_agent_alias_id}",
@@ -1280,7 +1256,7 @@ class ProcessL5Obervation:
                             or "executionTimeout" in code_interpreter_invocation_output
                         ):
                             if "executionError" in code_interpreter_invocation_output:
-                                if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                                if span_manager.recording:
                                     span_manager.spans[session_id].l3_span[
                                         f"{agent_id}:{agent_alias_id}"
                                     ].span.set_attributes(
@@ -1292,7 +1268,7 @@ class ProcessL5Obervation:
                                     )
 
                             if "executionTimeout" in code_interpreter_invocation_output:
-                                if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                                if span_manager.recording:
                                     span_manager.spans[session_id].l3_span[
                                         f"{agent_id}:{agent_alias_id}"
                                     ].span.set_attributes(
@@ -1303,7 +1279,7 @@ class ProcessL5Obervation:
                                         },
                                     )
 
-                            if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                            if span_manager.recording:
                                 span_manager.delete_l3_span(
                                     agent_session_id=session_id,
                                     trace_id=observation["traceId"],
@@ -1313,7 +1289,7 @@ class ProcessL5Obervation:
                                 )
 
                         else:
-                            if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                            if span_manager.recording:
                                 span_manager.spans[session_id].l3_span[
                                     f"{agent_id}:{agent_alias_id}"
                                 ].span.set_attributes(
@@ -1382,7 +1358,7 @@ class ProcessL5Obervation:
                             caller_chain=caller_chain, index=-1
                         )
 
-                        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        if span_manager.recording:
                             span_manager.spans[session_id].l3_span[
                                 f"{agent_id}:{agent_alias_id}"
                             ].span.set_attributes(
@@ -1438,7 +1414,7 @@ class ProcessL5Obervation:
                             caller_chain, -1
                         )
 
-                        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        if span_manager.recording:
 
                             span_manager.spans[
                                 session_id
@@ -1471,7 +1447,7 @@ class ProcessL5Obervation:
                             span_manager.spans[session_id].l2_span = None
 
                         if len(caller_chain) != 1:
-                            if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                            if span_manager.recording:
 
                                 span_manager.spans[session_id].agent_span.end_time = (
                                     int(event_time.timestamp() * 1e9)
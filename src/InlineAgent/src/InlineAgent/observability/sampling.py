@@ -0,0 +1,83 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from .settings_management import ObservabilityConfig
+
+
+@dataclass
+class TraceSampler:
+    """Decides which invocations of ``observe`` produce OpenTelemetry spans.
+
+    Head sampling decides before the invocation: ``ratio`` of sessions are
+    sampled, ``rules`` override it for agents by ``"<agentId>:<aliasId>"``,
+    agent ID or agent name. The decision is a hash of the session ID, so
+    every invocation of a session gets the same one. Invocations left out
+    build no spans, their trace events are kept in memory when a tail rule
+    is enabled.
+
+    Tail sampling decides after the invocation and keeps invocations left
+    out by head sampling that failed, had a guardrail intervention, or took
+    at least ``latency_threshold`` seconds. Their spans are built from the
+    kept trace events at the end of the invocation.
+    """
+
+    ratio: float = 1.0
+    rules: Dict[str, float] = field(default_factory=dict)
+    keep_errors: bool = True
+    keep_guardrail_interventions: bool = True
+    latency_threshold: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, config: ObservabilityConfig) -> "TraceSampler":
+        return cls(
+            ratio=config.TRACE_SAMPLE_RATIO,
+            rules=config.TRACE_SAMPLE_RULES,
+            keep_errors=config.TRACE_TAIL_KEEP_ERRORS,
+            keep_guardrail_interventions=config.TRACE_TAIL_KEEP_GUARDRAIL_INTERVENTIONS,
+            latency_threshold=config.TRACE_TAIL_LATENCY_SECONDS,
+        )
+
+    @property
+    def tail_enabled(self) -> bool:
+        return (
+            self.keep_errors
+            or self.keep_guardrail_interventions
+            or self.latency_threshold is not None
+        )
+
+    def get_ratio(
+        self, agent_id: str = "", agent_alias_id: str = "", agent_name: str = ""
+    ) -> float:
+        for key in (f"{agent_id}:{agent_alias_id}", agent_id, agent_name):
+            if key and key in self.rules:
+                return self.rules[key]
+        return self.ratio
+
+    def head(
+        self,
+        session_id: str,
+        agent_id: str = "",
+        agent_alias_id: str = "",
+        agent_name: str = "",
+    ) -> bool:
+        ratio = self.get_ratio(agent_id, agent_alias_id, agent_name)
+        if ratio >= 1:
+            return True
+        if ratio <= 0:
+            return False
+
+        digest = hashlib.sha256(str(session_id).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2**64 < ratio
+
+    def tail(
+        self, error: bool, guardrail_intervened: bool, duration: float
+    ) -> Optional[str]:
+        """Why an invocation left out by head sampling is kept, None if it is not."""
+        if error and self.keep_errors:
+            return "error"
+        if guardrail_intervened and self.keep_guardrail_interventions:
+            return "guardrail_intervention"
+        if self.latency_threshold is not None and duration >= self.latency_threshold:
+            return "latency"
+        return None
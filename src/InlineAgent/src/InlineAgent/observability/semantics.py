@@ -27,6 +27,9 @@ class SpanAttributes(Enum):
     RAW_RESPONSE = "bedrock.agent.raw_response"
     RESONING_CONTENT = "bedrock.agent.resoning_content"
 
+    SAMPLING_REASON = "bedrock.agent.sampling.reason"
+    SAMPLING_REPLAY_ERROR = "bedrock.agent.sampling.replay_error"
+
 
 class SpanName(Enum):
     ORCHESTRACTION = "Orchestration"
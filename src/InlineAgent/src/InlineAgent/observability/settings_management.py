@@ -1,6 +1,6 @@
 from pydantic import HttpUrl, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, Literal, Optional
 
 
 class ObservabilityConfig(BaseSettings):
@@ -18,3 +18,23 @@ class ObservabilityConfig(BaseSettings):
     LANGFUSE_SECRET_KEY: Optional[str] = None
     BEDROCK_AGENT_TRACER_NAME: str = Field(default="bedrock-agent-tracer")
     PRODUCE_BEDROCK_OTEL_TRACES: bool = Field(default=False)
+
+    # Saved traces, see trace_writer.py
+    TRACE_DIRECTORY: Optional[str] = None
+    TRACE_COMPRESSION: Optional[Literal["gzip", "zstd"]] = None
+    TRACE_MAX_BYTES: Optional[int] = Field(default=64 * 1024 * 1024)
+    TRACE_MAX_AGE_SECONDS: Optional[float] = None
+    TRACE_FLUSH_INTERVAL_SECONDS: float = Field(default=1.0)
+
+    # Trace events are processed off the event stream, see pipeline.py
+    TRACE_QUEUE_SIZE: int = Field(default=1000)
+    TRACE_QUEUE_POLICY: Literal["block", "drop_newest", "drop_oldest"] = Field(
+        default="block"
+    )
+
+    # Which invocations produce spans, see sampling.py
+    TRACE_SAMPLE_RATIO: float = Field(default=1.0, ge=0, le=1)
+    TRACE_SAMPLE_RULES: Dict[str, float] = Field(default_factory=dict)
+    TRACE_TAIL_KEEP_ERRORS: bool = Field(default=True)
+    TRACE_TAIL_KEEP_GUARDRAIL_INTERVENTIONS: bool = Field(default=True)
+    TRACE_TAIL_LATENCY_SECONDS: Optional[float] = None
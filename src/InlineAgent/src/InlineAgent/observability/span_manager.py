@@ -71,6 +71,8 @@ class SpanManager(BaseModel):
 
     spans: Optional[Dict[str, SpanFamily]] = {}
     agent_session_id_dict: Optional[Dict[str, str]] = {}
+    # False when the invocation is not sampled, no span is built
+    recording: bool = True
 
     class Config:
         arbitrary_types_allowed = True
@@ -82,9 +84,9 @@ class SpanManager(BaseModel):
         self,
         agent_session_id: str,
         caller_chain: list,
-        # start_time: int,
         attributes: Dict[str, Any],
         name: str,
+        start_time: Optional[int] = None,
     ) -> Span:
         # new agent
         parent_span = None
@@ -134,7 +136,7 @@ class SpanManager(BaseModel):
             kind=SpanKind.CLIENT,
             attributes=attributes or {},
             context=trace.set_span_in_context(parent_span),
-            # start_time=start_time,
+            start_time=start_time,
         )
 
         span_family = SpanFamily(
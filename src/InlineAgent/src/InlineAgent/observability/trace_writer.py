@@ -0,0 +1,270 @@
+"""Append-only JSONL files of the trace events of each session.
+
+Each event is one JSON line appended to ``<directory>/<session>.jsonl``
+through a buffered handle kept open per session, flushed by a background
+thread. Files are rotated to ``<session>.<n>.jsonl`` once they reach
+``max_bytes`` or ``max_age`` seconds, and can be gzip or zstd compressed.
+``read_trace`` returns the events of a session as the JSON array written
+by earlier versions.
+"""
+
+import atexit
+import gzip
+import io
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Literal, Optional
+
+from .settings_management import ObservabilityConfig
+
+Compression = Literal["gzip", "zstd"]
+
+EXTENSIONS = {None: ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstd compression of traces needs the zstandard package, install it with `pip install zstandard`"
+        ) from e
+    return zstandard
+
+
+def _open_append(path: str, compression: Optional[Compression], buffer_size: int):
+    """Append handle, and the raw file when closing the handle leaves it open."""
+    raw = open(path, "ab", buffering=buffer_size)
+    match compression:
+        case None:
+            return raw, None
+        case "gzip":
+            # Appending adds a gzip member, readers decompress members in sequence
+            return gzip.GzipFile(fileobj=raw, mode="ab"), raw
+        case "zstd":
+            zstandard = _import_zstandard()
+            return zstandard.ZstdCompressor().stream_writer(raw, closefd=True), None
+
+
+def _open_read(path: str) -> BinaryIO:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        zstandard = _import_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), read_across_frames=True, closefd=True
+        )
+    return open(path, "rb")
+
+
+@dataclass
+class SessionFile:
+    path: str
+    handle: io.IOBase
+    opened_at: float
+    last_write: float
+    bytes_written: int
+    # The gzip file object does not close the raw file it was given
+    raw: Optional[io.IOBase] = None
+
+    def close(self) -> None:
+        self.handle.close()
+        if self.raw is not None:
+            self.raw.close()
+
+
+class TraceWriter:
+    """Writes trace events to one append-only JSONL file per session.
+
+    Writes only append to a buffer, so saving a session's trace is linear
+    in its events. A daemon thread flushes the buffers every
+    ``flush_interval`` seconds and closes files idle for ``idle_timeout``
+    seconds, ``flush`` and ``close`` do it on demand and ``close`` runs at
+    interpreter exit. ``max_bytes`` counts the JSON written to a file,
+    before compression.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        compression: Optional[Compression] = None,
+        max_bytes: Optional[int] = 64 * 1024 * 1024,
+        max_age: Optional[float] = None,
+        flush_interval: float = 1.0,
+        idle_timeout: float = 60.0,
+        buffer_size: int = 64 * 1024,
+    ):
+        if compression not in EXTENSIONS:
+            raise ValueError(
+                f"compression must be one of {[c for c in EXTENSIONS if c]} or None"
+            )
+        if compression == "zstd":
+            _import_zstandard()
+
+        # None is trace/ in the working directory at the time of the write
+        self.directory = directory
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self.buffer_size = buffer_size
+        self._files: Dict[str, SessionFile] = dict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        atexit.register(self.close)
+
+    def write(self, session_id: str, trace_data: Dict) -> None:
+        line = (json.dumps(trace_data, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            session_file = self._files.get(str(session_id))
+            if session_file is not None and self._should_rotate(session_file):
+                self._rotate(str(session_id))
+                session_file = None
+            if session_file is None:
+                session_file = self._open(str(session_id))
+
+            session_file.handle.write(line)
+            session_file.bytes_written += len(line)
+            session_file.last_write = time.monotonic()
+
+            if self._flusher is None or not self._flusher.is_alive():
+                self._stopped.clear()
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, name="InlineAgentTraceWriter", daemon=True
+                )
+                self._flusher.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            for session_file in self._files.values():
+                session_file.handle.flush()
+
+    def close(self, session_id: Optional[str] = None) -> None:
+        """Flush and close the file of ``session_id``, or of every session."""
+        with self._lock:
+            if session_id is None:
+                for session_file in self._files.values():
+                    session_file.close()
+                self._files.clear()
+                self._stopped.set()
+            elif str(session_id) in self._files:
+                self._files.pop(str(session_id)).close()
+
+    def get_directory(self) -> str:
+        return self.directory or os.path.join(os.getcwd(), "trace")
+
+    def _open(self, session_id: str) -> SessionFile:
+        directory = self.get_directory()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, session_id + EXTENSIONS[self.compression])
+
+        handle, raw = _open_append(path, self.compression, self.buffer_size)
+        now = time.monotonic()
+        session_file = SessionFile(
+            path=path,
+            handle=handle,
+            opened_at=now,
+            last_write=now,
+            # Compressed size when appending to an existing compressed file
+            bytes_written=os.path.getsize(path),
+            raw=raw,
+        )
+        self._files[session_id] = session_file
+        return session_file
+
+    def _should_rotate(self, session_file: SessionFile) -> bool:
+        if self.max_bytes is not None and session_file.bytes_written >= self.max_bytes:
+            return True
+        return (
+            self.max_age is not None
+            and time.monotonic() - session_file.opened_at >= self.max_age
+        )
+
+    def _rotate(self, session_id: str) -> None:
+        session_file = self._files.pop(session_id)
+        session_file.close()
+
+        directory = os.path.dirname(session_file.path)
+        parts = trace_files(session_id, directory)
+        index = len([part for part in parts if part != session_file.path]) + 1
+        os.replace(
+            session_file.path,
+            os.path.join(
+                directory, f"{session_id}.{index}{EXTENSIONS[self.compression]}"
+            ),
+        )
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            with self._lock:
+                now = time.monotonic()
+                for session_id, session_file in list(self._files.items()):
+                    if now - session_file.last_write >= self.idle_timeout:
+                        self._files.pop(session_id).close()
+                    else:
+                        session_file.handle.flush()
+                if not self._files:
+                    # Started again by the next write
+                    self._flusher = None
+                    return
+
+
+def trace_files(session_id: str, directory: str) -> List[str]:
+    """Trace files of a session, oldest first: rotated parts then the current file."""
+    pattern = re.compile(
+        rf"^{re.escape(str(session_id))}(?:\.(\d+))?\.jsonl(?:\.gz|\.zst)?$"
+    )
+    parts = list()
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return parts
+
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            index = int(match.group(1)) if match.group(1) else float("inf")
+            parts.append((index, os.path.join(directory, name)))
+    return [path for _, path in sorted(parts)]
+
+
+def read_trace(session_id: str, directory: Optional[str] = None) -> List[Dict]:
+    """Events of a session in the order they were written, as one JSON array.
+
+    Includes the ``<session>.json`` array written by earlier versions.
+    ``directory`` defaults to the one ``trace_writer`` writes to, whose
+    buffered events of the session are written out first.
+    """
+    # Closing, not flushing, so a compressed file ends with a complete frame
+    trace_writer.close(session_id)
+    directory = directory or trace_writer.get_directory()
+    events = list()
+
+    legacy_path = os.path.join(directory, str(session_id) + ".json")
+    if os.path.exists(legacy_path):
+        with open(legacy_path, "r") as file:
+            events.extend(json.load(file))
+
+    for path in trace_files(session_id, directory):
+        with _open_read(path) as file:
+            for line in io.TextIOWrapper(file, encoding="utf-8"):
+                if line.strip():
+                    events.append(json.loads(line))
+    return events
+
+
+config = ObservabilityConfig()
+
+trace_writer = TraceWriter(
+    directory=config.TRACE_DIRECTORY,
+    compression=config.TRACE_COMPRESSION,
+    max_bytes=config.TRACE_MAX_BYTES,
+    max_age=config.TRACE_MAX_AGE_SECONDS,
+    flush_interval=config.TRACE_FLUSH_INTERVAL_SECONDS,
+)
@@ -0,0 +1,88 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from termcolor import colored
+from rich.console import Console
+from rich.markdown import Markdown
+
+
+class OutputSink(ABC):
+    """Destination for the human readable output of an agent invocation."""
+
+    enabled: bool = True
+
+    @abstractmethod
+    def write(self, text: str, color: Optional[str] = None, end: str = "\n") -> None:
+        pass
+
+    def markdown(self, text: str) -> None:
+        self.write(text)
+
+    def flush(self) -> None:
+        pass
+
+
+class ConsoleSink(OutputSink):
+    """Colored terminal output, the default."""
+
+    def write(self, text: str, color: Optional[str] = None, end: str = "\n") -> None:
+        print(colored(text, color) if color else text, end=end)
+
+    def markdown(self, text: str) -> None:
+        Console().print(Markdown(text))
+
+
+class LoggerSink(OutputSink):
+    """Emit complete lines to a ``logging.Logger``."""
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger("InlineAgent")
+        self.level = level
+        self._line: List[str] = list()
+
+    def write(self, text: str, color: Optional[str] = None, end: str = "\n") -> None:
+        self._line.append(text)
+        if "\n" in end:
+            self.flush()
+        else:
+            self._line.append(end)
+
+    def flush(self) -> None:
+        line = "".join(self._line).strip()
+        self._line = list()
+        if line and self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, line)
+
+
+class NullSink(OutputSink):
+    """Discard all output. Callers skip formatting entirely for this sink."""
+
+    enabled = False
+
+    def write(self, text: str, color: Optional[str] = None, end: str = "\n") -> None:
+        pass
+
+    def markdown(self, text: str) -> None:
+        pass
+
+
+class BufferedSink(OutputSink):
+    """Collect output in memory, e.g. to return it from an API handler."""
+
+    def __init__(self):
+        self._chunks: List[str] = list()
+
+    def write(self, text: str, color: Optional[str] = None, end: str = "\n") -> None:
+        self._chunks.append(text)
+        self._chunks.append(end)
+
+    def getvalue(self) -> str:
+        return "".join(self._chunks)
+
+    def clear(self) -> None:
+        self._chunks = list()
+
+
+console_sink = ConsoleSink()
+null_sink = NullSink()
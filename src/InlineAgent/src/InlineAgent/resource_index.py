@@ -0,0 +1,222 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from InlineAgent.clients import ClientRegistry, client_registry
+
+
+@dataclass(frozen=True)
+class ResourceListing:
+    """A paginated bedrock-agent list operation and the fields of its summaries."""
+
+    operation: str
+    result_key: str
+    name_key: str
+    id_key: str
+    parent_key: Optional[str] = None
+
+
+LISTINGS = {
+    "knowledge_base": ResourceListing(
+        "list_knowledge_bases", "knowledgeBaseSummaries", "name", "knowledgeBaseId"
+    ),
+    "agent": ResourceListing("list_agents", "agentSummaries", "agentName", "agentId"),
+    "agent_alias": ResourceListing(
+        "list_agent_aliases",
+        "agentAliasSummaries",
+        "agentAliasName",
+        "agentAliasId",
+        parent_key="agentId",
+    ),
+}
+
+# Bump when the layout of the index file changes
+INDEX_VERSION = 1
+
+# profile, kind, parent id
+IndexKey = Tuple[str, str, Optional[str]]
+
+
+@dataclass
+class IndexEntry:
+    ids: Dict[str, str]
+    # time.time(), so entries loaded from disk age correctly
+    loaded_at: float
+
+
+class ResourceIndex:
+    """Thread-safe name to ID index of knowledge bases, agents and aliases.
+
+    Each listing is paged through once per profile and kept for ``ttl``
+    seconds, so resolving many names costs one sweep instead of one per name.
+    A name that is not found triggers a refresh, in case the resource was
+    created after the sweep, unless the listing was swept less than
+    ``min_refresh_interval`` seconds ago. With ``path`` the index is saved to
+    and loaded from a JSON file, so it survives process restarts.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        path: Optional[str] = None,
+        registry: ClientRegistry = client_registry,
+        min_refresh_interval: float = 30.0,
+    ):
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.path = path
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._key_locks: Dict[IndexKey, threading.Lock] = dict()
+        self._entries: Dict[IndexKey, IndexEntry] = dict()
+        self._loaded_path: Optional[str] = None
+
+    def get_knowledge_base_id(
+        self, name: str, profile: str = "default"
+    ) -> Optional[str]:
+        return self.get_id("knowledge_base", name, profile=profile)
+
+    def get_agent_id(self, name: str, profile: str = "default") -> Optional[str]:
+        return self.get_id("agent", name, profile=profile)
+
+    def get_agent_alias_id(
+        self, agent_id: str, name: str, profile: str = "default"
+    ) -> Optional[str]:
+        return self.get_id("agent_alias", name, profile=profile, parent_id=agent_id)
+
+    def get_id(
+        self,
+        kind: str,
+        name: str,
+        profile: str = "default",
+        parent_id: Optional[str] = None,
+    ) -> Optional[str]:
+        """Return the ID of the resource called ``name``, None if there is none."""
+        key = (profile, kind, parent_id)
+        entry = self._get_entry(key)
+        if (
+            name not in entry.ids
+            and entry.loaded_at + self.min_refresh_interval <= time.time()
+        ):
+            entry = self._get_entry(key, stale=entry)
+        return entry.ids.get(name)
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        with self._lock:
+            self._entries = {
+                key: entry
+                for key, entry in self._entries.items()
+                if kind is not None and key[1] != kind
+            }
+
+    def _get_entry(
+        self, key: IndexKey, stale: Optional[IndexEntry] = None
+    ) -> IndexEntry:
+        self._load()
+        entry = self._entries.get(key)
+        if entry is not None and entry is not stale and not self._expired(entry):
+            return entry
+
+        with self._get_key_lock(key):
+            current = self._entries.get(key)
+            if current is not entry and current is not None:
+                # Refreshed by another thread while this one was waiting
+                return current
+
+            entry = IndexEntry(ids=self._sweep(key), loaded_at=time.time())
+            with self._lock:
+                self._entries[key] = entry
+            self._save()
+            return entry
+
+    def _get_key_lock(self, key: IndexKey) -> threading.Lock:
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def _expired(self, entry: IndexEntry) -> bool:
+        return entry.loaded_at + self.ttl <= time.time()
+
+    def _sweep(self, key: IndexKey) -> Dict[str, str]:
+        profile, kind, parent_id = key
+        listing = LISTINGS[kind]
+        client = self.registry.get_client("bedrock-agent", profile=profile)
+
+        kwargs = dict()
+        if listing.parent_key:
+            kwargs[listing.parent_key] = parent_id
+
+        ids = dict()
+        for page in client.get_paginator(listing.operation).paginate(**kwargs):
+            for summary in page.get(listing.result_key, []):
+                ids[summary[listing.name_key]] = summary[listing.id_key]
+        return ids
+
+    def _load(self) -> None:
+        if not self.path or self._loaded_path == self.path:
+            return
+
+        with self._lock:
+            if self._loaded_path == self.path:
+                return
+            self._loaded_path = self.path
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return
+            if data.get("version") != INDEX_VERSION:
+                return
+
+            for item in data.get("entries", []):
+                key = (item["profile"], item["kind"], item.get("parent_id"))
+                if key not in self._entries:
+                    self._entries[key] = IndexEntry(
+                        ids=item["ids"], loaded_at=item["loaded_at"]
+                    )
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+
+        with self._lock:
+            data = json.dumps(
+                {
+                    "version": INDEX_VERSION,
+                    "entries": [
+                        {
+                            "profile": profile,
+                            "kind": kind,
+                            "parent_id": parent_id,
+                            "ids": entry.ids,
+                            "loaded_at": entry.loaded_at,
+                        }
+                        for (profile, kind, parent_id), entry in self._entries.items()
+                    ],
+                }
+            )
+
+        # Written atomically, other processes may be reading the file
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = dict()
+            self._loaded_path = None
+
+
+resource_index = ResourceIndex()
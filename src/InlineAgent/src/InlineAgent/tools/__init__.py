@@ -1,3 +1,18 @@
 from .mcp import MCPStdio, MCPServer, MCPHttp
+from .session_pool import MCPSessionPool
+from .result import MCPResultAdapter, ToolResult
+from .cache import CacheBackend, LRUCache, MCPCacheConfig, ToolCache, cacheable
 
-__all__ = ["MCPStdio", "MCPServer", "MCPHttp"]
+__all__ = [
+    "MCPStdio",
+    "MCPServer",
+    "MCPHttp",
+    "MCPSessionPool",
+    "MCPResultAdapter",
+    "ToolResult",
+    "CacheBackend",
+    "LRUCache",
+    "MCPCacheConfig",
+    "ToolCache",
+    "cacheable",
+]
@@ -0,0 +1,210 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+
+class CacheBackend(ABC):
+    """Storage for cached tool results.
+
+    Implement this to share results between processes, e.g. with Redis. Calls
+    are made from the event loop, so keep them fast.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return ``(True, value)`` on a hit and ``(False, None)`` on a miss."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-memory LRU with an optional time to live per entry."""
+
+    def __init__(self, maxsize: Optional[int] = 128):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, Tuple[Optional[float], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+
+            expires_at, value = self._entries[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ToolCache:
+    """Result cache of a single tool, attached by ``@cacheable``.
+
+    ``name`` prefixes the keys, so tools sharing a ``backend`` need distinct
+    names. ``clear`` empties the default in-memory LRU but leaves a given
+    ``backend`` alone, since other tools may keep their results in it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: Optional[float] = None,
+        maxsize: Optional[int] = 128,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        # An empty LRUCache is falsy
+        self._owns_backend = backend is None
+        self.backend = LRUCache(maxsize=maxsize) if backend is None else backend
+        self.stats = CacheStats()
+
+    def make_key(self, parameters: Dict) -> str:
+        return f"{self.name}:{json.dumps(parameters, sort_keys=True, default=str)}"
+
+    def get(self, parameters: Dict) -> Tuple[bool, Any]:
+        hit, value = self.backend.get(self.make_key(parameters))
+        if hit:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+        return hit, value
+
+    def set(self, parameters: Dict, value: Any) -> None:
+        self.backend.set(self.make_key(parameters), value, ttl=self.ttl)
+
+    def clear(self) -> None:
+        if self._owns_backend:
+            self.backend.clear()
+        self.stats = CacheStats()
+
+
+def cacheable(
+    ttl: Optional[float] = None,
+    maxsize: Optional[int] = 128,
+    backend: Optional[CacheBackend] = None,
+):
+    """Cache the results of a return of control tool.
+
+    ProcessROC answers repeated calls with the same parameters from the cache
+    instead of running the tool. Only successful results are cached. Use it
+    for pure lookups; the function itself is left unchanged.
+
+    Args:
+        ttl: Seconds a result stays valid, forever when None
+        maxsize: Number of results kept by the default in-memory LRU
+        backend: Shared storage to use instead of the in-memory LRU
+    """
+
+    def decorator(func: Callable) -> Callable:
+        func.__tool_cache__ = ToolCache(
+            # Tools of the same name in different modules may share a backend
+            name=f"{func.__module__}.{func.__qualname__}",
+            ttl=ttl,
+            maxsize=maxsize,
+            backend=backend,
+        )
+        return func
+
+    # Handle both @cacheable and @cacheable()
+    if callable(ttl):
+        func = ttl
+        ttl = None
+        return decorator(func)
+    return decorator
+
+
+def get_tool_cache(func: Callable) -> Optional[ToolCache]:
+    return getattr(func, "__tool_cache__", None)
+
+
+# Annotations of MCP tools whose results can be reused
+CACHEABLE_HINTS = ("readOnlyHint", "idempotentHint")
+
+
+def get_tool_annotation(tool: Any, key: str) -> Any:
+    """Read an annotation of an MCP tool, sent as a dict by older SDKs."""
+    annotations = getattr(tool, "annotations", None)
+    if isinstance(annotations, dict):
+        return annotations.get(key)
+    return getattr(annotations, key, None)
+
+
+@dataclass
+class MCPCacheConfig:
+    """Result cache of the tools of an MCP server.
+
+    Tools the server annotates as read-only or idempotent are cached for
+    ``ttl`` seconds. ``overrides`` maps a tool name to False to never cache it,
+    to True to cache it regardless of its annotations, or to its own TTL.
+    Give servers that share a ``backend`` their own ``namespace``.
+    """
+
+    ttl: Optional[float] = 300
+    maxsize: Optional[int] = 128
+    backend: Optional[CacheBackend] = None
+    overrides: Dict[str, Union[bool, float]] = field(default_factory=dict)
+    namespace: str = "mcp"
+
+    def get_ttl(self, tool: Any) -> Tuple[bool, Optional[float]]:
+        """Return whether ``tool`` is cached and for how long."""
+        override = self.overrides.get(tool.name)
+        if override is False:
+            return False, None
+        if override is True:
+            return True, self.ttl
+        if override is not None:
+            return True, override
+        cached = any(get_tool_annotation(tool, hint) for hint in CACHEABLE_HINTS)
+        return cached, self.ttl
+
+    def create_cache(self, tool: Any) -> Optional[ToolCache]:
+        cached, ttl = self.get_ttl(tool)
+        if not cached:
+            return None
+        return ToolCache(
+            name=f"{self.namespace}:{tool.name}",
+            ttl=ttl,
+            maxsize=self.maxsize,
+            backend=self.backend,
+        )
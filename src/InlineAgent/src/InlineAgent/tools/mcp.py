@@ -1,20 +1,235 @@
+import asyncio
+import logging
 from abc import ABC, abstractmethod
-from contextlib import AsyncExitStack
+from contextlib import AbstractAsyncContextManager, AsyncExitStack, asynccontextmanager
 
 from termcolor import colored
 
-from pydantic import validate_call
+import httpx
+from pydantic import ConfigDict, validate_call
 from mcp import ClientSession, ListToolsResult, StdioServerParameters
+from mcp.types import ServerNotification, Tool, ToolListChangedNotification
 from mcp.client.stdio import stdio_client
 from mcp.client.sse import sse_client
-from typing import Any, Callable, Dict, List
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+)
 
 from InlineAgent.types.action_group import FunctionDefination
 from InlineAgent.constants import TraceColor
+from InlineAgent.tools.cache import MCPCacheConfig, get_tool_cache
+from InlineAgent.tools.result import MCPResultAdapter, default_result_adapter
+from InlineAgent.tools.session_pool import MCPSessionPool
+from InlineAgent.tools.streamable_http import streamablehttp_client
+
+logger = logging.getLogger(__name__)
+
+# Keeps the tasks of servers started by create_many alive
+_runner_tasks = set()
 
 
 class MCPServer(ABC):
 
+    @classmethod
+    async def connect(
+        cls,
+        transport: AbstractAsyncContextManager,
+        tools_to_use: set = set(),
+        result_adapter: Optional[MCPResultAdapter] = None,
+        cache: Optional[MCPCacheConfig] = None,
+    ):
+        """Open a session over ``transport`` and load the tool catalog once.
+
+        The catalog is refreshed when the server sends a
+        ``notifications/tools/list_changed`` notification. Agents copy the
+        catalog when they are built, rebuild them to pick up a refresh.
+        """
+        self = cls._new(tools_to_use, result_adapter, cache)
+        try:
+            self.stdio, self.write = await self.exit_stack.enter_async_context(
+                transport
+            )
+            self.session = await self.exit_stack.enter_async_context(
+                ClientSession(
+                    self.stdio, self.write, message_handler=self._handle_message
+                )
+            )
+
+            await self.session.initialize()
+            await self.refresh_tools()
+        except BaseException:
+            await self.exit_stack.aclose()
+            raise
+
+        self._print_connected()
+        return self
+
+    @classmethod
+    async def connect_pool(
+        cls,
+        transport_factory: Callable[[], AbstractAsyncContextManager],
+        pool_size: int,
+        tools_to_use: set = set(),
+        health_check_interval: Optional[float] = 30,
+        acquire_timeout: Optional[float] = 30,
+        result_adapter: Optional[MCPResultAdapter] = None,
+        cache: Optional[MCPCacheConfig] = None,
+    ):
+        """Open ``pool_size`` sessions, each over a new transport.
+
+        Tool calls are dispatched to the least busy session and sessions that
+        die are restarted, see ``MCPSessionPool``.
+        """
+        self = cls._new(tools_to_use, result_adapter, cache)
+        self.pool = MCPSessionPool(
+            transport_factory,
+            size=pool_size,
+            message_handler=self._handle_message,
+            health_check_interval=health_check_interval,
+            acquire_timeout=acquire_timeout,
+        )
+        await self.pool.start()
+        self.exit_stack.push_async_callback(self.pool.close)
+        # The pool has the methods of ClientSession the server uses
+        self.session = self.pool
+
+        try:
+            await self.refresh_tools()
+        except BaseException:
+            await self.exit_stack.aclose()
+            raise
+
+        self._print_connected()
+        return self
+
+    @classmethod
+    def _new(
+        cls,
+        tools_to_use: set,
+        result_adapter: Optional[MCPResultAdapter],
+        cache: Optional[MCPCacheConfig],
+    ):
+        # Initialize session and client objects
+        self = cls()
+        self.session = None
+        self.pool = None
+        self.exit_stack = AsyncExitStack()
+        self.tools_to_use = set(tools_to_use)
+        self.tools: Dict[str, Tool] = dict()
+        self.function_schema = {"functions": list()}
+        self.callable_tools = dict()
+        self.result_adapter = result_adapter or default_result_adapter
+        self.cache = cache
+        self._refresh_task = None
+        self._refresh_pending = False
+        self._runner_task = None
+        self._close_requested = None
+        return self
+
+    def _print_connected(self) -> None:
+        print(
+            colored(
+                f"\nConnected to server with tools:{list(self.tools)}",
+                TraceColor.invocation_output,
+            )
+        )
+
+    async def refresh_tools(self) -> None:
+        """Fetch the tool catalog and rebuild the function schema and callables."""
+        if not self.session:
+            raise RuntimeError("Not connected to MCP server")
+
+        response: ListToolsResult = await self.session.list_tools()
+        self.set_tools(response.tools)
+
+    def set_tools(self, tools: List[Tool]) -> None:
+        self.tools = {tool.name: tool for tool in tools}
+
+        functions, callable_tools = list(), dict()
+        for tool in tools:
+            if self.tools_to_use and tool.name not in self.tools_to_use:
+                continue
+            functions.append(MCPServer.to_function(tool))
+            # Keep the callables of unchanged tools so caches keyed on them survive
+            callable_tools[tool.name] = self.callable_tools.get(
+                tool.name
+            ) or self.create_callable(tool.name)
+            self.set_tool_cache(callable_tools[tool.name], tool)
+
+        self.function_schema = {"functions": functions}
+        self.callable_tools = callable_tools
+
+    def set_tool_cache(self, callable_tool: Callable, tool: Tool) -> None:
+        """Attach the result cache ProcessROC uses for ``tool``, if any."""
+        if self.cache is None:
+            return
+
+        cache = self.cache.create_cache(tool)
+        current = get_tool_cache(callable_tool)
+        if cache is None:
+            callable_tool.__tool_cache__ = None
+        elif current is None or current.ttl != cache.ttl:
+            # Cached results survive a catalog refresh that changes nothing
+            callable_tool.__tool_cache__ = cache
+
+    @staticmethod
+    def to_function(tool: Tool) -> FunctionDefination:
+        function = {
+            "description": tool.description,
+            "name": tool.name,
+            "parameters": {},
+            "requireConfirmation": "DISABLED",
+        }
+        # Process input schema properties
+        required = tool.inputSchema.get("required", [])
+        for param_name, param_details in tool.inputSchema.get("properties", {}).items():
+            function["parameters"][param_name] = {
+                "description": param_details.get("description", param_name),
+                "type": param_details.get("type", "string"),
+                "required": param_name in required,
+            }
+
+        if len(function["parameters"]) > 5:
+
+            raise ValueError(
+                f"Tool {tool.name} has more than 5 parameters. This is not supported by Bedrock Agents."
+            )
+
+        return function
+
+    def create_callable(self, tool_name: str) -> Callable:
+        async def callable(*args, **kwargs):
+            response = await self.session.call_tool(tool_name, arguments=kwargs)
+            return self.result_adapter.adapt(tool_name, response)
+
+        callable.__name__ = tool_name
+        return callable
+
+    async def _handle_message(self, message) -> None:
+        if isinstance(message, ServerNotification) and isinstance(
+            message.root, ToolListChangedNotification
+        ):
+            # Requests cannot be awaited from the session's receive loop
+            self._refresh_pending = True
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh_changed_tools())
+
+    async def _refresh_changed_tools(self) -> None:
+        # Notifications received during a refresh are covered by one more refresh
+        while self._refresh_pending:
+            self._refresh_pending = False
+            try:
+                await self.refresh_tools()
+            except Exception:
+                logger.exception("Refreshing the tools of the MCP server failed")
+
     @validate_call
     async def set_available_tools(self, tools_to_use: set) -> List[FunctionDefination]:
         """
@@ -23,106 +238,146 @@ class MCPServer(ABC):
         if not self.session:
             raise RuntimeError("Not connected to MCP server")
 
-        tools: ListToolsResult = await self.session.list_tools()
-        tools_list = tools.tools
-
-        function = {}
-        for tool in tools_list:
-            if len(tools_to_use) != 0:
-                if tool.name in tools_to_use:
-                    function = {
-                        "description": tool.description,
-                        "name": tool.name,
-                        "parameters": {},
-                        "requireConfirmation": "DISABLED",
-                    }
-                    # Process input schema properties
-                    if "properties" in tool.inputSchema:
-
-                        for param_name, param_details in tool.inputSchema[
-                            "properties"
-                        ].items():
-                            function["parameters"][param_name] = {
-                                "description": param_details.get(
-                                    "description", param_name
-                                ),
-                                "type": param_details.get("type", "string"),
-                                "required": param_name
-                                in tool.inputSchema.get("required", []),
-                            }
-
-                        if len(function["parameters"]) > 5:
-
-                            raise ValueError(
-                                f"Tool {tool.name} has more than 5 parameters. This is not supported by Bedrock Agents."
-                            )
-
-                    if "functions" not in self.function_schema:
-                        self.function_schema["functions"] = list()
-
-                    self.function_schema["functions"].append(function)
-            else:
-                function = {
-                    "description": tool.description,
-                    "name": tool.name,
-                    "parameters": {},
-                    "requireConfirmation": "DISABLED",
-                }
-                # Process input schema properties
-                if "properties" in tool.inputSchema:
-
-                    for param_name, param_details in tool.inputSchema[
-                        "properties"
-                    ].items():
-                        function["parameters"][param_name] = {
-                            "description": param_details.get("description", param_name),
-                            "type": param_details.get("type", "string"),
-                            "required": param_name
-                            in tool.inputSchema.get("required", []),
-                        }
-
-                    if len(function["parameters"]) > 5:
-
-                        raise ValueError(
-                            f"Tool {tool.name} has more than 5 parameters. This is not supported by Bedrock Agents."
-                        )
-
-                if "functions" not in self.function_schema:
-                    self.function_schema["functions"] = list()
-
-                self.function_schema["functions"].append(function)
+        self.tools_to_use = set(tools_to_use)
+        if not self.tools:
+            await self.refresh_tools()
+        else:
+            self.set_tools(list(self.tools.values()))
+        return self.function_schema["functions"]
 
     @validate_call
     async def set_callable_tool(self, tools_to_use: set) -> Dict[str, Callable]:
         """
         Get callable function
         """
-        if not self.session:
-            raise RuntimeError("Not connected to MCP server")
-
-        tools = await self.session.list_tools()
-        tools_list = tools.tools
-
-        # Helper factory function to create a callable with the correct tool name
-        def create_callable(tool_name):
-            async def callable(*args, **kwargs):
-                response = await self.session.call_tool(
-                    tool_name, arguments=kwargs
-                )
-                return response.content[0].text
-            return callable
-
-        for tool in tools_list:
-            if len(tools_to_use) != 0:
-                if tool.name in tools_to_use:
-                    self.callable_tools[tool.name] = create_callable(tool.name)
-            else:
-                self.callable_tools[tool.name] = create_callable(tool.name)
+        await self.set_available_tools(tools_to_use=tools_to_use)
+        return self.callable_tools
 
     async def cleanup(self):
         """Clean up resources"""
+        if self._runner_task and self._runner_task is not asyncio.current_task():
+            # Started by create_many, the transport must be closed by its own task
+            self._close_requested.set()
+            await self._runner_task
+            return
+        if self._refresh_task:
+            self._refresh_task.cancel()
         await self.exit_stack.aclose()
 
+    @staticmethod
+    async def _run_server(
+        create: Awaitable["MCPServer"],
+        started: asyncio.Future,
+        timeout: Optional[float],
+    ) -> None:
+        # The transports enter anyio cancel scopes, which have to be exited by
+        # the task that entered them. Each server gets a task that connects,
+        # waits until cleanup is requested and then disconnects.
+        try:
+            async with asyncio.timeout(timeout):
+                server = await create
+        except BaseException as e:
+            if not started.done():
+                started.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        server._close_requested = asyncio.Event()
+        server._runner_task = asyncio.current_task()
+        started.set_result(server)
+        try:
+            await server._close_requested.wait()
+        finally:
+            await server.cleanup()
+
+    @staticmethod
+    async def create_many(
+        *servers: Awaitable["MCPServer"],
+        timeout: Optional[float] = None,
+        return_exceptions: bool = False,
+        exit_stack: Optional[AsyncExitStack] = None,
+    ) -> List["MCPServer"]:
+        """Start several MCP servers concurrently.
+
+        Example:
+            jira, monitoring = await MCPServer.create_many(
+                MCPStdio.create(server_params=jira_server_params),
+                MCPStdio.create(server_params=monitoring_server_params),
+                timeout=30,
+            )
+
+        Args:
+            servers: Unawaited ``create`` calls of MCPStdio or MCPHttp
+            timeout: Seconds each server may take to connect
+            return_exceptions: Return the exception of a server that failed in
+                its place instead of closing the others and raising
+            exit_stack: Stack the cleanup of the started servers is pushed to
+
+        Returns:
+            The servers in the order they were given
+        """
+        loop = asyncio.get_running_loop()
+        started = [loop.create_future() for _ in servers]
+        tasks = [
+            loop.create_task(MCPServer._run_server(create, future, timeout))
+            for create, future in zip(servers, started)
+        ]
+        for task in tasks:
+            _runner_tasks.add(task)
+            task.add_done_callback(_runner_tasks.discard)
+
+        try:
+            results = await asyncio.gather(*started, return_exceptions=True)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+        connected = [result for result in results if isinstance(result, MCPServer)]
+        errors = [
+            (index, result)
+            for index, result in enumerate(results)
+            if not isinstance(result, MCPServer)
+        ]
+
+        if errors and not return_exceptions:
+            await MCPServer.cleanup_many(connected)
+            index, error = errors[0]
+            raise RuntimeError(
+                f"{len(errors)} of {len(results)} MCP servers failed to start, "
+                f"server {index}: {error!r}"
+            ) from error
+
+        if exit_stack is not None:
+            exit_stack.push_async_callback(MCPServer.cleanup_many, connected)
+        return results
+
+    @staticmethod
+    async def cleanup_many(servers: List["MCPServer"]) -> None:
+        """Clean up several servers concurrently."""
+        results = await asyncio.gather(
+            *[server.cleanup() for server in servers], return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    @staticmethod
+    @asynccontextmanager
+    async def start_many(
+        *servers: Awaitable["MCPServer"],
+        timeout: Optional[float] = None,
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[List["MCPServer"]]:
+        """``create_many`` as an async context manager that cleans up on exit."""
+        async with AsyncExitStack() as exit_stack:
+            yield await MCPServer.create_many(
+                *servers,
+                timeout=timeout,
+                return_exceptions=return_exceptions,
+                exit_stack=exit_stack,
+            )
+
 
 class MCPStdio(MCPServer):
     """
@@ -130,46 +385,46 @@ class MCPStdio(MCPServer):
     """
 
     @classmethod
-    @validate_call
+    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     async def create(
-        cls, server_params: StdioServerParameters, tools_to_use: set = set()
+        cls,
+        server_params: StdioServerParameters,
+        tools_to_use: set = set(),
+        pool_size: int = 1,
+        health_check_interval: Optional[float] = 30,
+        acquire_timeout: Optional[float] = 30,
+        result_adapter: Optional[MCPResultAdapter] = None,
+        cache: Optional[MCPCacheConfig] = None,
     ):
-        # Initialize session and client objects
-        self = cls()
-        self.session = None
-        self.exit_stack = AsyncExitStack()
-        self.function_schema = dict()
-        self.callable_tools = dict()
-
-        stdio_transport = await self.exit_stack.enter_async_context(
-            stdio_client(server_params)
-        )
-        self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(
-            ClientSession(self.stdio, self.write)
-        )
+        """Start the server and connect to it.
 
-        await self.session.initialize()
-
-        # List available tools
-        response = await self.session.list_tools()
-        tools = response.tools
-        print(
-            colored(
-                f"\nConnected to server with tools:{[tool.name for tool in tools]}",
-                TraceColor.invocation_output,
+        With ``pool_size`` above 1, that many server processes are started and
+        concurrent tool calls are spread over them. Processes that stop
+        answering the health check every ``health_check_interval`` seconds, or
+        whose pipe breaks, are restarted. Tool calls fail when no process is
+        back within ``acquire_timeout`` seconds.
+        """
+        if pool_size > 1:
+            return await cls.connect_pool(
+                lambda: stdio_client(server_params),
+                pool_size=pool_size,
+                tools_to_use=tools_to_use,
+                health_check_interval=health_check_interval,
+                acquire_timeout=acquire_timeout,
+                result_adapter=result_adapter,
+                cache=cache,
             )
+        return await cls.connect(
+            stdio_client(server_params),
+            tools_to_use=tools_to_use,
+            result_adapter=result_adapter,
+            cache=cache,
         )
 
-        await self.set_available_tools(tools_to_use=tools_to_use)
-        await self.set_callable_tool(tools_to_use=tools_to_use)
-
-        return self
-
 
 class MCPHttp(MCPServer):
     @classmethod
-    @validate_call
+    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     async def create(
         cls,
         url: str,
@@ -177,41 +432,47 @@ class MCPHttp(MCPServer):
         timeout: float = 5,
         sse_read_timeout: float = 60 * 5,
         tools_to_use: set = set(),
+        transport: Literal["sse", "streamable-http"] = "sse",
+        limits: Optional[httpx.Limits] = None,
+        compression: bool = True,
+        max_reconnects: int = 3,
+        http_client: Optional[httpx.AsyncClient] = None,
+        result_adapter: Optional[MCPResultAdapter] = None,
+        cache: Optional[MCPCacheConfig] = None,
     ):
-
-        # Initialize session and client objects
-        self = cls()
-        self.session = None
-        self.exit_stack = AsyncExitStack()
-        self.function_schema = dict()
-        self.callable_tools = dict()
-
-        stdio_transport = await self.exit_stack.enter_async_context(
+        """Connect to a remote MCP server.
+
+        ``transport="streamable-http"`` uses the streamable HTTP transport,
+        which reuses keep-alive connections and resumes dropped event streams
+        up to ``max_reconnects`` times. ``limits`` sets the size of its
+        connection pool and ``http_client`` shares one pool between servers.
+        ``compression`` accepts compressed responses. These options do not
+        apply to the legacy ``sse`` transport.
+        """
+        if transport == "streamable-http":
+            return await cls.connect(
+                streamablehttp_client(
+                    url=url,
+                    headers=headers,
+                    timeout=timeout,
+                    sse_read_timeout=sse_read_timeout,
+                    limits=limits,
+                    compression=compression,
+                    max_reconnects=max_reconnects,
+                    http_client=http_client,
+                ),
+                tools_to_use=tools_to_use,
+                result_adapter=result_adapter,
+                cache=cache,
+            )
+        return await cls.connect(
             sse_client(
                 url=url,
                 headers=headers,
                 timeout=timeout,
                 sse_read_timeout=sse_read_timeout,
-            )
-        )
-        self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(
-            ClientSession(self.stdio, self.write)
+            ),
+            tools_to_use=tools_to_use,
+            result_adapter=result_adapter,
+            cache=cache,
         )
-
-        await self.session.initialize()
-
-        # List available tools
-        response = await self.session.list_tools()
-        tools = response.tools
-        print(
-            colored(
-                f"\nConnected to server with tools:{[tool.name for tool in tools]}",
-                TraceColor.invocation_output,
-            )
-        )
-
-        await self.set_available_tools(tools_to_use=tools_to_use)
-        await self.set_callable_tool(tools_to_use=tools_to_use)
-
-        return self
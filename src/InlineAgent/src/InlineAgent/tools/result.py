@@ -0,0 +1,133 @@
+import base64
+import mimetypes
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from mcp.types import (
+    BlobResourceContents,
+    CallToolResult,
+    EmbeddedResource,
+    ImageContent,
+    TextContent,
+    TextResourceContents,
+)
+
+
+class ToolResult(str):
+    """Text of a tool result, with files for the agent and truncation metadata.
+
+    A ``str`` so it can be used anywhere a tool result is expected. ProcessROC
+    sends ``files`` to the agent in the session state of the next call.
+    """
+
+    files: List[Dict]
+    truncated: bool
+    original_length: int
+
+    def __new__(
+        cls,
+        text: str = "",
+        files: Optional[List[Dict]] = None,
+        truncated: bool = False,
+        original_length: Optional[int] = None,
+    ):
+        self = super().__new__(cls, text)
+        self.files = files or list()
+        self.truncated = truncated
+        self.original_length = len(text) if original_length is None else original_length
+        return self
+
+
+@dataclass
+class MCPResultAdapter:
+    """Converts the content of an MCP tool call into a ``ToolResult``.
+
+    Text blocks, and text of embedded resources, are joined with newlines.
+    Images and binary resources become files of the session state, decoded
+    once from the base64 of the MCP message. Text above ``max_chars`` and
+    files above ``max_file_bytes`` are left out and the result says so, to
+    keep large results out of the next model call.
+    """
+
+    max_chars: Optional[int] = 25_000
+    max_file_bytes: Optional[int] = 10 * 1024 * 1024
+    file_use_case: str = "CHAT"
+
+    def adapt(self, tool_name: str, response: CallToolResult) -> ToolResult:
+        texts: List[str] = list()
+        files: List[Dict] = list()
+        notes: List[str] = list()
+        for index, block in enumerate(response.content):
+            if isinstance(block, TextContent):
+                texts.append(block.text)
+            elif isinstance(block, ImageContent):
+                self._add_file(
+                    files, notes, tool_name, index, block.data, block.mimeType
+                )
+            elif isinstance(block, EmbeddedResource):
+                resource = block.resource
+                if isinstance(resource, TextResourceContents):
+                    texts.append(resource.text)
+                elif isinstance(resource, BlobResourceContents):
+                    self._add_file(
+                        files,
+                        notes,
+                        tool_name,
+                        index,
+                        resource.blob,
+                        resource.mimeType or "application/octet-stream",
+                    )
+
+        text = "\n".join(texts)
+        original_length = len(text)
+        truncated = self.max_chars is not None and original_length > self.max_chars
+        if truncated:
+            text = text[: self.max_chars]
+            notes.append(
+                f"[Truncated to {self.max_chars} of {original_length} characters]"
+            )
+        if notes:
+            text = "\n".join([text, *notes]) if text else "\n".join(notes)
+
+        return ToolResult(
+            text,
+            files=files,
+            truncated=truncated,
+            original_length=original_length,
+        )
+
+    def _add_file(
+        self,
+        files: List[Dict],
+        notes: List[str],
+        tool_name: str,
+        index: int,
+        data: str,
+        media_type: str,
+    ) -> None:
+        name = f"{tool_name}-{index}{mimetypes.guess_extension(media_type) or ''}"
+        # Decoded size, without decoding
+        size = len(data) * 3 // 4 - data.count("=", -2)
+        if self.max_file_bytes is not None and size > self.max_file_bytes:
+            notes.append(
+                f"[File {name} of {size} bytes left out, the limit is {self.max_file_bytes} bytes]"
+            )
+            return
+
+        files.append(
+            {
+                "name": name,
+                "source": {
+                    "sourceType": "BYTE_CONTENT",
+                    "byteContent": {
+                        "mediaType": media_type,
+                        "data": base64.b64decode(data),
+                    },
+                },
+                "useCase": self.file_use_case,
+            }
+        )
+        notes.append(f"[File {name} ({media_type}) attached]")
+
+
+default_result_adapter = MCPResultAdapter()
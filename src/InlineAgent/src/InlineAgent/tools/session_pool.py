@@ -0,0 +1,232 @@
+import asyncio
+from contextlib import AbstractAsyncContextManager, AsyncExitStack
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import anyio
+from mcp import ClientSession
+from mcp.types import CallToolResult, ListToolsResult
+
+# Errors raised by a session whose server process or streams went away
+BROKEN_SESSION_ERRORS = (
+    anyio.BrokenResourceError,
+    anyio.ClosedResourceError,
+    anyio.EndOfStream,
+)
+
+
+class PooledSession:
+    """A server process and its session, restarted when it dies.
+
+    The transport is opened, and later closed, by a task owned by the pool
+    member because the anyio cancel scopes it enters must be exited by the
+    same task.
+    """
+
+    def __init__(
+        self,
+        transport_factory: Callable[[], AbstractAsyncContextManager],
+        message_handler: Optional[Callable[[Any], Awaitable[None]]] = None,
+        health_check_interval: Optional[float] = 30,
+        health_check_timeout: float = 5,
+        restart_delay: float = 1,
+    ):
+        self.transport_factory = transport_factory
+        self.message_handler = message_handler
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.restart_delay = restart_delay
+
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0
+        self.restarts = 0
+        self.last_error: Optional[Exception] = None
+        self._ready = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._closed = False
+        self._started: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.session is not None and not self._wake.is_set()
+
+    async def start(self) -> None:
+        """Connect and wait for the first session, raising if it fails."""
+        self._started = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run())
+        await self._started
+
+    def restart(self) -> None:
+        """Replace the server process, e.g. after a broken pipe."""
+        self._wake.set()
+
+    async def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._task:
+            await self._task
+
+    async def wait_ready(self) -> None:
+        await self._ready.wait()
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                async with AsyncExitStack() as exit_stack:
+                    read, write = await exit_stack.enter_async_context(
+                        self.transport_factory()
+                    )
+                    session = await exit_stack.enter_async_context(
+                        ClientSession(read, write, message_handler=self.message_handler)
+                    )
+                    await session.initialize()
+
+                    self.session = session
+                    self._ready.set()
+                    if not self._started.done():
+                        self._started.set_result(None)
+                    await self._watch(session)
+            except Exception as e:
+                self.last_error = e
+                if not self._started.done():
+                    # Never connected, report to start() instead of retrying
+                    self._started.set_exception(e)
+                    return
+            finally:
+                self.session = None
+                self._ready.clear()
+
+            if not self._closed:
+                self.restarts += 1
+                self._wake.clear()
+                # Cut short by close()
+                with anyio.move_on_after(self.restart_delay):
+                    await self._wake.wait()
+            self._wake.clear()
+
+    async def _watch(self, session: ClientSession) -> None:
+        # Returns when the session has to be closed
+        while not self._wake.is_set():
+            with anyio.move_on_after(self.health_check_interval):
+                await self._wake.wait()
+                return
+            try:
+                with anyio.fail_after(self.health_check_timeout):
+                    await session.send_ping()
+            except Exception as e:
+                self.last_error = e
+                return
+
+
+class MCPSessionPool:
+    """Sessions to several processes of the same MCP server.
+
+    Calls go to the healthy session with the fewest calls in flight, so
+    concurrent calls to a stdio server are not serialized on a single pipe.
+    Sessions that fail a health check or break during a call are restarted
+    in the background. Calls wait up to ``acquire_timeout`` seconds for a
+    session to come back, then fail with the last error of the sessions.
+    Exposes the ``list_tools`` and ``call_tool`` methods of ``ClientSession``
+    so it can be used in its place.
+    """
+
+    def __init__(
+        self,
+        transport_factory: Callable[[], AbstractAsyncContextManager],
+        size: int,
+        message_handler: Optional[Callable[[Any], Awaitable[None]]] = None,
+        health_check_interval: Optional[float] = 30,
+        health_check_timeout: float = 5,
+        acquire_timeout: Optional[float] = 30,
+    ):
+        if size < 1:
+            raise ValueError("size of the session pool must be at least 1")
+
+        self.members: List[PooledSession] = [
+            PooledSession(
+                transport_factory,
+                message_handler=message_handler,
+                health_check_interval=health_check_interval,
+                health_check_timeout=health_check_timeout,
+            )
+            for _ in range(size)
+        ]
+        self.acquire_timeout = acquire_timeout
+        self._closed = False
+        # Wakes calls waiting in acquire() when the pool is closed
+        self._closed_event = asyncio.Event()
+
+    async def start(self) -> None:
+        results = await asyncio.gather(
+            *[member.start() for member in self.members], return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            await self.close()
+            raise RuntimeError(
+                f"{len(errors)} of {len(self.members)} MCP server processes failed to start"
+            ) from errors[0]
+
+    async def acquire(self) -> PooledSession:
+        """Return the least busy healthy member, waiting for one to come back."""
+        loop = asyncio.get_running_loop()
+        deadline = (
+            None if self.acquire_timeout is None else loop.time() + self.acquire_timeout
+        )
+        while True:
+            if self._closed:
+                raise RuntimeError("MCP session pool is closed")
+
+            healthy = [member for member in self.members if member.healthy]
+            if healthy:
+                return min(healthy, key=lambda member: member.in_flight)
+
+            timeout = None if deadline is None else deadline - loop.time()
+            if timeout is not None and timeout <= 0:
+                errors = [
+                    member.last_error
+                    for member in self.members
+                    if member.last_error is not None
+                ]
+                raise RuntimeError(
+                    f"No MCP server process of the pool became healthy within {self.acquire_timeout} seconds: {errors}"
+                ) from (errors[-1] if errors else None)
+
+            waiters = [
+                asyncio.ensure_future(member.wait_ready()) for member in self.members
+            ]
+            waiters.append(asyncio.ensure_future(self._closed_event.wait()))
+            try:
+                await asyncio.wait(
+                    waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+
+    async def call_tool(
+        self, name: str, arguments: Optional[Dict[str, Any]] = None
+    ) -> CallToolResult:
+        member = await self.acquire()
+        member.in_flight += 1
+        try:
+            return await member.session.call_tool(name, arguments=arguments)
+        except BROKEN_SESSION_ERRORS:
+            # Tool calls may have side effects, so they are not retried
+            member.restart()
+            raise
+        finally:
+            member.in_flight -= 1
+
+    async def list_tools(self) -> ListToolsResult:
+        member = await self.acquire()
+        try:
+            return await member.session.list_tools()
+        except BROKEN_SESSION_ERRORS:
+            member.restart()
+            raise
+
+    async def close(self) -> None:
+        self._closed = True
+        self._closed_event.set()
+        await asyncio.gather(*[member.close() for member in self.members])
@@ -0,0 +1,299 @@
+import json
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+import anyio
+import httpx
+import mcp.types as types
+from anyio.abc import TaskGroup
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from httpx_sse import EventSource
+
+logger = logging.getLogger(__name__)
+
+MCP_SESSION_ID = "mcp-session-id"
+LAST_EVENT_ID = "last-event-id"
+
+# Errors after which a dropped event stream is resumed
+STREAM_ERRORS = (httpx.TransportError, anyio.EndOfStream)
+
+
+class StreamableHttpTransport:
+    """Client side of the MCP streamable HTTP transport.
+
+    Every message is POSTed to a single endpoint over a pooled keep-alive
+    connection. The server answers with JSON or with an event stream, and may
+    push messages over an optional GET event stream. Event streams that drop
+    are resumed with ``Last-Event-ID``, so idle timeouts of load balancers do
+    not lose responses.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        compression: bool = True,
+        max_reconnects: int = 3,
+        reconnect_delay: float = 1,
+    ):
+        self.url = url
+        self.headers = dict(headers or {})
+        if not compression:
+            self.headers["accept-encoding"] = "identity"
+        self.max_reconnects = max_reconnects
+        self.reconnect_delay = reconnect_delay
+        self.session_id: Optional[str] = None
+        self._listening = False
+
+    def request_headers(self, accept: str, last_event_id: Optional[str] = None):
+        headers = {**self.headers, "accept": accept}
+        if self.session_id:
+            headers[MCP_SESSION_ID] = self.session_id
+        if last_event_id:
+            headers[LAST_EVENT_ID] = last_event_id
+        return headers
+
+    async def post_writer(
+        self,
+        client: httpx.AsyncClient,
+        tg: TaskGroup,
+        write_stream_reader: MemoryObjectReceiveStream[types.JSONRPCMessage],
+        read_stream_writer: MemoryObjectSendStream[types.JSONRPCMessage | Exception],
+    ) -> None:
+        async with write_stream_reader:
+            async for message in write_stream_reader:
+                root = message.root
+                if (
+                    isinstance(root, types.JSONRPCRequest)
+                    and root.method != "initialize"
+                ):
+                    # Requests do not wait for each other
+                    tg.start_soon(self.post, client, message, read_stream_writer)
+                    continue
+
+                # The initialize response carries the session id every later
+                # message needs, and notifications keep their order
+                await self.post(client, message, read_stream_writer)
+                if self.session_id and not self._listening:
+                    self._listening = True
+                    tg.start_soon(self.listen, client, read_stream_writer)
+
+    async def post(
+        self,
+        client: httpx.AsyncClient,
+        message: types.JSONRPCMessage,
+        read_stream_writer: MemoryObjectSendStream[types.JSONRPCMessage | Exception],
+    ) -> None:
+        request_id = getattr(message.root, "id", None)
+        try:
+            async with client.stream(
+                "POST",
+                self.url,
+                json=message.model_dump(by_alias=True, mode="json", exclude_none=True),
+                headers=self.request_headers("application/json, text/event-stream"),
+            ) as response:
+                if response.status_code == 202:
+                    return
+                if response.status_code == 404 and self.session_id:
+                    raise RuntimeError("MCP session expired, reconnect to the server")
+                response.raise_for_status()
+
+                if MCP_SESSION_ID in response.headers:
+                    self.session_id = response.headers[MCP_SESSION_ID]
+
+                content_type = response.headers.get("content-type", "")
+                if content_type.startswith("text/event-stream"):
+                    await self.read_response_stream(
+                        client, response, request_id, read_stream_writer
+                    )
+                else:
+                    for reply in parse_messages(await response.aread()):
+                        await read_stream_writer.send(reply)
+        except Exception as e:
+            logger.error(f"Error posting MCP message: {e!r}")
+            if request_id is None:
+                await read_stream_writer.send(e)
+            else:
+                # Answer the request so the caller does not wait forever
+                await read_stream_writer.send(error_message(request_id, e))
+
+    async def read_response_stream(
+        self,
+        client: httpx.AsyncClient,
+        response: httpx.Response,
+        request_id: Any,
+        read_stream_writer: MemoryObjectSendStream[types.JSONRPCMessage | Exception],
+    ) -> None:
+        last_event_id, retry = None, None
+        for attempt in range(self.max_reconnects + 1):
+            try:
+                if attempt:
+                    await anyio.sleep(
+                        retry or self.reconnect_delay * 2 ** (attempt - 1)
+                    )
+                    if last_event_id is None:
+                        break
+                    logger.info(f"Resuming MCP response stream after {last_event_id}")
+                    response = await client.send(
+                        client.build_request(
+                            "GET",
+                            self.url,
+                            headers=self.request_headers(
+                                "text/event-stream", last_event_id
+                            ),
+                        ),
+                        stream=True,
+                    )
+                if response.status_code == 405:
+                    break
+                response.raise_for_status()
+                async for sse in EventSource(response).aiter_sse():
+                    last_event_id = sse.id or last_event_id
+                    retry = sse.retry / 1000 if sse.retry else retry
+                    if not sse.data:
+                        continue
+                    message = types.JSONRPCMessage.model_validate_json(sse.data)
+                    await read_stream_writer.send(message)
+                    if is_response_to(message, request_id):
+                        return
+            except STREAM_ERRORS as e:
+                logger.warning(f"MCP response stream dropped: {e!r}")
+            finally:
+                await response.aclose()
+
+        raise RuntimeError(f"MCP response stream for request {request_id} was lost")
+
+    async def listen(
+        self,
+        client: httpx.AsyncClient,
+        read_stream_writer: MemoryObjectSendStream[types.JSONRPCMessage | Exception],
+    ) -> None:
+        """Receive messages the server sends outside of a request."""
+        last_event_id, failures = None, 0
+        while failures <= self.max_reconnects:
+            try:
+                async with client.stream(
+                    "GET",
+                    self.url,
+                    headers=self.request_headers("text/event-stream", last_event_id),
+                ) as response:
+                    if response.status_code == 405:
+                        # The server does not offer a stream
+                        return
+                    response.raise_for_status()
+                    failures = 0
+                    async for sse in EventSource(response).aiter_sse():
+                        last_event_id = sse.id or last_event_id
+                        if sse.data:
+                            await read_stream_writer.send(
+                                types.JSONRPCMessage.model_validate_json(sse.data)
+                            )
+            except STREAM_ERRORS as e:
+                logger.info(f"MCP event stream dropped, reconnecting: {e!r}")
+            except httpx.HTTPStatusError as e:
+                logger.warning(f"MCP event stream failed: {e!r}")
+            except anyio.ClosedResourceError:
+                return
+            failures += 1
+            await anyio.sleep(self.reconnect_delay * 2 ** (failures - 1))
+
+    async def terminate(self, client: httpx.AsyncClient) -> None:
+        """Ask the server to end the session."""
+        if not self.session_id:
+            return
+        try:
+            await client.delete(self.url, headers=self.request_headers("*/*"))
+        except httpx.HTTPError as e:
+            logger.debug(f"Error terminating MCP session: {e!r}")
+
+
+def parse_messages(body: bytes) -> List[types.JSONRPCMessage]:
+    if not body.strip():
+        return list()
+    data = json.loads(body)
+    if isinstance(data, list):
+        # Batched responses
+        return [types.JSONRPCMessage.model_validate(message) for message in data]
+    return [types.JSONRPCMessage.model_validate(data)]
+
+
+def is_response_to(message: types.JSONRPCMessage, request_id: Any) -> bool:
+    return (
+        isinstance(message.root, (types.JSONRPCResponse, types.JSONRPCError))
+        and message.root.id == request_id
+    )
+
+
+def error_message(request_id: Any, error: Exception) -> types.JSONRPCMessage:
+    return types.JSONRPCMessage(
+        types.JSONRPCError(
+            jsonrpc="2.0",
+            id=request_id,
+            error=types.ErrorData(code=types.INTERNAL_ERROR, message=str(error)),
+        )
+    )
+
+
+@asynccontextmanager
+async def streamablehttp_client(
+    url: str,
+    headers: Optional[Dict[str, Any]] = None,
+    timeout: float = 30,
+    sse_read_timeout: float = 60 * 5,
+    limits: Optional[httpx.Limits] = None,
+    compression: bool = True,
+    max_reconnects: int = 3,
+    reconnect_delay: float = 1,
+    http_client: Optional[httpx.AsyncClient] = None,
+):
+    """Client transport for MCP streamable HTTP.
+
+    Args:
+        url: The MCP endpoint of the server
+        headers: Headers sent with every request
+        timeout: Seconds for connecting and sending requests
+        sse_read_timeout: Seconds to wait for the next event of a stream
+        limits: Connection pool limits of the HTTP client
+        compression: Accept compressed responses
+        max_reconnects: Attempts to resume an event stream that dropped
+        reconnect_delay: Seconds before the first attempt, doubled after each
+        http_client: Client to share one connection pool between servers, it
+            is not closed with the transport
+    """
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+    transport = StreamableHttpTransport(
+        url,
+        headers=headers,
+        compression=compression,
+        max_reconnects=max_reconnects,
+        reconnect_delay=reconnect_delay,
+    )
+
+    async with AsyncExitStack() as exit_stack:
+        client = http_client
+        if client is None:
+            client = await exit_stack.enter_async_context(
+                httpx.AsyncClient(
+                    timeout=httpx.Timeout(timeout, read=sse_read_timeout),
+                    limits=limits or httpx.Limits(),
+                )
+            )
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                transport.post_writer,
+                client,
+                tg,
+                write_stream_reader,
+                read_stream_writer,
+            )
+            try:
+                yield read_stream, write_stream
+            finally:
+                with anyio.move_on_after(timeout):
+                    await transport.terminate(client)
+                tg.cancel_scope.cancel()
+                await read_stream_writer.aclose()
+                await write_stream.aclose()
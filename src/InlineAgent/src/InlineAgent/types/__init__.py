@@ -2,8 +2,21 @@ from .action_group import Executor, Parameter, FunctionDefination, APISchema, S3
 from .inline_agent import (
     InlineCollaboratorAgentConfig,
     InlineCollaboratorConfigurations,
+    InvocationJob,
+    InvocationResult,
+    BatchInvocationResult,
 )
 from .mcp import MCPConfig
+from .stream import (
+    TextDeltaEvent,
+    CitationEvent,
+    ReturnControlEvent,
+    OutputFile,
+    FilesEvent,
+    TraceEvent,
+    UsageEvent,
+    StreamEvent,
+)
 
 __all__ = [
     "Executor",
@@ -12,6 +25,17 @@ __all__ = [
     "APISchema",
     "InlineCollaboratorAgentConfig",
     "InlineCollaboratorConfigurations",
+    "InvocationJob",
+    "InvocationResult",
+    "BatchInvocationResult",
     "MCPConfig",
     "S3",
+    "TextDeltaEvent",
+    "CitationEvent",
+    "ReturnControlEvent",
+    "OutputFile",
+    "FilesEvent",
+    "TraceEvent",
+    "UsageEvent",
+    "StreamEvent",
 ]
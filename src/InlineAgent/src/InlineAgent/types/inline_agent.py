@@ -1,5 +1,5 @@
-from typing import Literal, Optional
-from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
 
 
 class InlineCollaboratorAgentConfig(BaseModel):
@@ -12,3 +12,35 @@ class InlineCollaboratorConfigurations(BaseModel):
     collaboratorInstruction: str
     collaboratorName: str
     relayConversationHistory: Literal["TO_COLLABORATOR", "DISABLED"] = "DISABLED"
+
+
+class InvocationJob(BaseModel):
+    input_text: str
+    session_id: Optional[str] = None
+    session_state: Optional[Dict] = None
+
+
+class InvocationResult(BaseModel):
+    input_text: str
+    session_id: str
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    llm_calls: int = 0
+    latency_seconds: float = 0.0
+    attempts: int = 1
+
+
+class BatchInvocationResult(BaseModel):
+    results: List[InvocationResult] = Field(default_factory=list)
+    succeeded: int = 0
+    failed: int = 0
+    total_input_tokens: int = 0
+    total_output_tokens: int = 0
+    total_llm_calls: int = 0
+    throttle_retries: int = 0
+    wall_time_seconds: float = 0.0
+    invocations_per_second: float = 0.0
+    p50_latency_seconds: float = 0.0
+    p95_latency_seconds: float = 0.0
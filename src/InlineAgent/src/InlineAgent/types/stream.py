@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, Field
+
+
+class TextDeltaEvent(BaseModel):
+    type: Literal["text"] = "text"
+    text: str
+
+
+class CitationEvent(BaseModel):
+    type: Literal["citation"] = "citation"
+    text: str = str()
+    citations: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class ReturnControlEvent(BaseModel):
+    type: Literal["return_control"] = "return_control"
+    invocation_id: str
+    invocation_inputs: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class OutputFile(BaseModel):
+    name: str
+    type: Optional[str] = None
+    bytes: bytes
+
+
+class FilesEvent(BaseModel):
+    type: Literal["files"] = "files"
+    files: List[OutputFile] = Field(default_factory=list)
+
+
+class TraceEvent(BaseModel):
+    type: Literal["trace"] = "trace"
+    trace: Dict[str, Any]
+    input_tokens: int = 0
+    output_tokens: int = 0
+    llm_calls: int = 0
+
+
+class UsageEvent(BaseModel):
+    type: Literal["usage"] = "usage"
+    session_id: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    llm_calls: int = 0
+    latency_seconds: float = 0.0
+
+
+StreamEvent = Union[
+    TextDeltaEvent,
+    CitationEvent,
+    ReturnControlEvent,
+    FilesEvent,
+    TraceEvent,
+    UsageEvent,
+]
@@ -1,6 +1,16 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
+from botocore.exceptions import ClientError
+
+
+THROTTLING_ERROR_CODES = {
+    "throttlingexception",
+    "throttling",
+    "toomanyrequestsexception",
+    "servicequotaexceededexception",
+}
+
 
 class AgentAppConfig(BaseSettings):
     model_config = SettingsConfigDict(
@@ -9,3 +19,16 @@ class AgentAppConfig(BaseSettings):
         case_sensitive=True,
         extra="allow",
     )
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Check whether ``error`` or any exception it wraps is a throttling error."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, ClientError):
+            code = error.response.get("Error", {}).get("Code", "")
+            if code.lower() in THROTTLING_ERROR_CODES:
+                return True
+        error = error.__cause__ or error.__context__
+    return False
@@ -0,0 +1,34 @@
+"""Time building the function schemas of many tools, first and cached.
+
+Run from the src directory with
+``python -m tests.action_group.benchmark_function_schema``.
+"""
+
+import argparse
+import time
+
+from InlineAgent.action_group import ActionGroupBuilder
+from tests.action_group.test_action_group_builder import create_tools
+
+
+def time_schemas(tools) -> float:
+    start = time.perf_counter()
+    for tool in tools:
+        ActionGroupBuilder.create_function_schema(tool, argument_key="Args:")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tools", type=int, default=500)
+    args = parser.parse_args()
+
+    tools = create_tools(args.tools)
+    elapsed = time_schemas(tools)
+    cached_elapsed = time_schemas(tools)
+
+    print(f"{args.tools} tools: {elapsed:.4f}s, cached: {cached_elapsed:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from typing import Any, Dict, Literal
 import unittest
+from unittest import mock
 
 from InlineAgent.action_group import ActionGroupBuilder
 
@@ -149,6 +150,78 @@ check_indent_level = """
 """
 
 
+def get_distance_numpy(origin: str, destination: str, mode=None) -> float:
+    """Compute the distance between two points.
+
+    Parameters
+    ----------
+    origin : str
+        Start of the route,
+        e.g. Seattle
+    destination : str
+        End of the route
+    mode
+        Travel mode
+
+    Returns
+    -------
+    float
+        Distance in kilometers
+
+    Raises
+    ------
+    ValueError
+        If a point is unknown
+    """
+    pass
+
+
+def get_distance_rest(origin: str, destination: str, mode=None) -> float:
+    """Compute the distance between two points.
+
+    :param origin: Start of the route,
+        e.g. Seattle
+    :type origin: str
+    :param str destination: End of the route
+    :param mode: Travel mode
+    :returns: Distance in kilometers
+    :rtype: float
+    :raises ValueError: If a point is unknown
+    """
+    pass
+
+
+get_distance_description = "Compute the distance between two points. This function returns float: Distance in kilometers"
+get_distance_params = {
+    "origin": "str Start of the route, e.g. Seattle",
+    "destination": "str End of the route",
+    "mode": "Travel mode",
+}
+
+
+def create_tools(count: int):
+    tools = list()
+    for idx in range(count):
+
+        def tool(location: str, days: int, unit: str = "celsius") -> dict:
+            pass
+
+        tool.__name__ = f"get_forecast_{idx}"
+        tool.__doc__ = f"""Get the weather forecast for location number {idx}.
+
+        Args:
+            location: The city, e.g., San Francisco
+                or a postal code
+            days: Number of   days to forecast
+            unit: The unit to use, e.g., fahrenheit or celsius
+
+        Returns:
+            dict: The forecast per day
+        """
+        tools.append(tool)
+    return tools
+
+
 class TestActionGroupBuilder(unittest.TestCase):
     maxDiff = None
 
@@ -286,3 +359,61 @@ class TestActionGroupBuilder(unittest.TestCase):
         self.assertEqual(
             ActionGroupBuilder.create_function_schema(spider_run), spider_run_schema
         )
+
+    def test_parse_docstring_numpy(self):
+        description, param_descriptions = ActionGroupBuilder.parse_docstring(
+            get_distance_numpy.__doc__
+        )
+        self.assertEqual(description, get_distance_description)
+        self.assertEqual(param_descriptions, get_distance_params)
+
+    def test_parse_docstring_rest(self):
+        description, param_descriptions = ActionGroupBuilder.parse_docstring(
+            get_distance_rest.__doc__
+        )
+        self.assertEqual(description, get_distance_description)
+        self.assertEqual(param_descriptions, get_distance_params)
+
+    def test_create_function_memoized(self):
+        schema = ActionGroupBuilder.create_function_schema(get_distance_numpy)
+        schema["parameters"]["origin"]["description"] = "Changed"
+
+        self.assertEqual(
+            ActionGroupBuilder.create_function_schema(get_distance_numpy)["parameters"][
+                "origin"
+            ]["description"],
+            get_distance_params["origin"],
+        )
+
+    def test_create_function_schema_many_tools(self):
+        tools = create_tools(500)
+
+        with mock.patch.object(
+            ActionGroupBuilder,
+            "_compile_function_schema",
+            wraps=ActionGroupBuilder._compile_function_schema,
+        ) as mock_compile:
+            schemas = [
+                ActionGroupBuilder.create_function_schema(tool, argument_key="Args:")
+                for tool in tools
+            ]
+            cached_schemas = [
+                ActionGroupBuilder.create_function_schema(tool, argument_key="Args:")
+                for tool in tools
+            ]
+
+        # Compiled once per tool, see benchmark_function_schema.py for timings
+        self.assertEqual(mock_compile.call_count, 500)
+        self.assertEqual(cached_schemas, schemas)
+        self.assertEqual(
+            schemas[499]["description"],
+            "Get the weather forecast for location number 499. This function returns dict: The forecast per day",
+        )
+        self.assertEqual(
+            schemas[499]["parameters"]["location"]["description"],
+            "The city, e.g., San Francisco or a postal code",
+        )
+        self.assertEqual(
+            schemas[499]["parameters"]["days"]["description"],
+            "Number of days to forecast",
+        )
@@ -1,11 +1,13 @@
 import json
 import unittest
+from unittest import mock
 from unittest.mock import Mock
 
 import boto3
 from requests import patch
 
 from InlineAgent.action_group import ActionGroups, ActionGroup
+from InlineAgent.action_group.action_group import ActionGroupBuilder
 from InlineAgent.constants import USER_INPUT_ACTION_GROUP_NAME
 from InlineAgent.tools.mcp import MCPStdio
 
@@ -632,3 +634,70 @@ class TestActionGroup(unittest.TestCase):
                 get_lat_long.__name__: get_lat_long,
             },
         )
+
+    def test_compiled_once(self):
+        action_group = ActionGroup(
+            name="Weather Action Group",
+            tools=[get_current_weather],
+            argument_key="Args:",
+            test=True,
+        )
+        action_groups = ActionGroups(action_groups=[action_group])
+
+        with mock.patch.object(
+            ActionGroupBuilder,
+            "create_function_schema",
+            wraps=ActionGroupBuilder.create_function_schema,
+        ) as mock_create_function_schema:
+            first = action_groups.actionGroups
+            action_groups.model_dump()
+            repr(action_groups)
+            self.assertEqual(action_groups.actionGroups, first)
+            self.assertEqual(mock_create_function_schema.call_count, 1)
+
+            # Callers may extend the returned payload without touching the cache
+            first.append({"actionGroupName": "Extra"})
+            first[0]["description"] = "Changed"
+            self.assertEqual(len(action_groups.actionGroups), 1)
+            self.assertNotIn("description", action_groups.actionGroups[0])
+
+            action_group.tools.append(get_lat_long)
+            self.assertEqual(
+                len(action_groups.actionGroups[0]["functionSchema"]["functions"]), 2
+            )
+            self.assertIn(get_lat_long.__name__, action_groups.tool_map)
+            self.assertEqual(mock_create_function_schema.call_count, 3)
+
+            action_groups.invalidate()
+            action_groups.actionGroups
+            self.assertEqual(mock_create_function_schema.call_count, 5)
+
+    def test_recompiled_after_tool_replaced(self):
+        def make_tool(description: str):
+            def get_time(timezone: str):
+                pass
+
+            get_time.__doc__ = f"""{description}
+
+            Args:
+                timezone (str): The timezone
+            """
+            return get_time
+
+        action_group = ActionGroup(
+            name="Time Action Group",
+            tools=[make_tool("Get the time")],
+            argument_key="Args:",
+            test=True,
+        )
+        action_groups = ActionGroups(action_groups=[action_group])
+        functions = action_groups.actionGroups[0]["functionSchema"]["functions"]
+        self.assertEqual(functions[0]["description"], "Get the time")
+
+        # Same name, the old tool is freed and its id may be reused
+        action_group.tools = [make_tool("Get the local time")]
+        functions = action_groups.actionGroups[0]["functionSchema"]["functions"]
+        self.assertEqual(functions[0]["description"], "Get the local time")
+
+        action_group.description = "Clock"
+        self.assertEqual(action_groups.actionGroups[0]["description"], "Clock")
@@ -0,0 +1,98 @@
+import asyncio
+from contextlib import aclosing
+import time
+import unittest
+
+from InlineAgent.agent.async_stream import aiter_event_stream
+
+
+class SlowEventStream:
+    def __init__(self, events, delay=0.1):
+        self.events = events
+        self.delay = delay
+        self.closed = False
+
+    def __iter__(self):
+        for event in self.events:
+            if self.closed:
+                return
+            time.sleep(self.delay)
+            yield event
+
+    def close(self):
+        self.closed = True
+
+
+class FailingEventStream:
+    def __iter__(self):
+        yield {"chunk": {"bytes": b"partial"}}
+        raise RuntimeError("stream broke")
+
+
+class TestAsyncStream(unittest.IsolatedAsyncioTestCase):
+    async def test_events_in_order(self):
+        events = [{"chunk": {"bytes": str(i).encode()}} for i in range(5)]
+
+        received = [
+            event
+            async for event in aiter_event_stream(SlowEventStream(events, delay=0))
+        ]
+
+        self.assertEqual(received, events)
+
+    async def test_concurrent_streams_overlap(self):
+        async def consume():
+            return [
+                event
+                async for event in aiter_event_stream(
+                    SlowEventStream(range(3), delay=0.1)
+                )
+            ]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[consume() for _ in range(5)])
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, [[0, 1, 2]] * 5)
+        # Sequential consumption would take 5 * 3 * 0.1 seconds
+        self.assertLess(elapsed, 1.0)
+
+    async def test_loop_not_blocked(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        async for _ in aiter_event_stream(SlowEventStream(range(3), delay=0.1)):
+            pass
+        task.cancel()
+
+        self.assertGreater(ticks, 10)
+
+    async def test_error_is_raised(self):
+        received = []
+        with self.assertRaises(RuntimeError):
+            async for event in aiter_event_stream(FailingEventStream()):
+                received.append(event)
+
+        self.assertEqual(received, [{"chunk": {"bytes": b"partial"}}])
+
+    async def test_early_exit_closes_stream(self):
+        stream = SlowEventStream(range(100), delay=0.01)
+
+        async with aclosing(
+            aiter_event_stream(stream, max_buffered_events=2)
+        ) as events:
+            async for event in events:
+                if event == 1:
+                    break
+
+        self.assertTrue(stream.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from typing import List, Optional
+
+from pydantic import ValidationError
+
+from InlineAgent.agent.confirmation import require_confirmation
+from InlineAgent.agent.decoders import ParameterDecoder, get_parameter_decoder
+
+
+@require_confirmation
+def get_order(
+    order_id: int,
+    amount: float,
+    express: bool,
+    items: List[str],
+    note: str,
+    coupon: Optional[str] = None,
+):
+    """Get an order."""
+    return order_id
+
+
+async def untyped_tool(**kwargs):
+    return kwargs
+
+
+class TestParameterDecoder(unittest.TestCase):
+    def test_annotations(self):
+        parameters = get_parameter_decoder(get_order).decode(
+            [
+                {"name": "order_id", "type": "integer", "value": "42"},
+                {"name": "amount", "type": "number", "value": "19.99"},
+                {"name": "express", "type": "boolean", "value": "false"},
+                {"name": "items", "type": "array", "value": '["book", "pen"]'},
+                {"name": "note", "type": "string", "value": "42"},
+                {"name": "coupon", "type": "string", "value": "SAVE10"},
+            ]
+        )
+
+        self.assertEqual(
+            parameters,
+            {
+                "order_id": 42,
+                "amount": 19.99,
+                "express": False,
+                "items": ["book", "pen"],
+                "note": "42",
+                "coupon": "SAVE10",
+            },
+        )
+
+    def test_schema_types(self):
+        parameters = get_parameter_decoder(untyped_tool).decode(
+            [
+                {"name": "price", "type": "number", "value": "2.5"},
+                {"name": "count", "type": "integer", "value": "3"},
+                {"name": "enabled", "type": "boolean", "value": "True"},
+                {
+                    "name": "filters",
+                    "type": "array",
+                    "value": "[{name=color, value=red}]",
+                },
+            ]
+        )
+
+        self.assertEqual(
+            parameters,
+            {
+                "price": 2.5,
+                "count": 3,
+                "enabled": True,
+                "filters": [{"name": "color", "value": "red"}],
+            },
+        )
+
+    def test_decoder_cached(self):
+        decoder = get_parameter_decoder(get_order)
+
+        self.assertIs(decoder, get_parameter_decoder(get_order))
+        self.assertIs(
+            decoder.get_decoder("amount", "number"),
+            decoder.get_decoder("amount", "number"),
+        )
+        self.assertIs(get_parameter_decoder(None), get_parameter_decoder("get_order"))
+
+    def test_invalid_value(self):
+        with self.assertRaises(ValidationError):
+            ParameterDecoder(get_order).decode(
+                [{"name": "order_id", "type": "integer", "value": "forty two"}]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
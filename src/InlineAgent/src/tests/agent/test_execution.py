@@ -0,0 +1,127 @@
+import asyncio
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import mock
+
+from InlineAgent.agent import ProcessROC
+from InlineAgent.agent.execution import (
+    ToolExecutionConfig,
+    ToolTimeoutError,
+    cpu_bound,
+    tool_timeout,
+)
+
+
+def get_thread_name() -> str:
+    return threading.current_thread().name
+
+
+@cpu_bound
+def get_process_id() -> int:
+    return os.getpid()
+
+
+@tool_timeout(0.1)
+def slow_tool() -> str:
+    time.sleep(0.3)
+    return "done"
+
+
+functionInvocationInput = {
+    "actionGroup": "MockActionGroup",
+    "function": "mock_tool",
+    "agentId": "INLINE_AGENT",
+}
+
+
+class TestToolExecution(unittest.IsolatedAsyncioTestCase):
+    async def test_sync_tool_on_thread_pool(self):
+        with ThreadPoolExecutor(thread_name_prefix="tool") as thread_pool:
+            execution = ToolExecutionConfig(thread_pool=thread_pool)
+            thread_name = await execution.run(get_thread_name, dict())
+
+        self.assertTrue(thread_name.startswith("tool"))
+
+    async def test_cpu_bound_tool_on_process_pool(self):
+        with ProcessPoolExecutor(max_workers=1) as process_pool:
+            execution = ToolExecutionConfig(process_pool=process_pool)
+            pid = await execution.run(get_process_id, dict())
+
+        self.assertNotEqual(pid, os.getpid())
+        # Without a process pool, CPU bound tools fall back to threads
+        pid = await ToolExecutionConfig().run(get_process_id, dict())
+        self.assertEqual(pid, os.getpid())
+
+    async def test_loop_not_blocked(self):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        with mock.patch("builtins.print"):
+            await ProcessROC.invoke_roc_function(
+                functionInvocationInput=functionInvocationInput,
+                tool_to_invoke=lambda: time.sleep(0.2),
+            )
+        ticker.cancel()
+
+        self.assertGreater(ticks, 5)
+
+    async def test_timeout(self):
+        functionResult = await ProcessROC.invoke_roc_function(
+            functionInvocationInput=functionInvocationInput,
+            tool_to_invoke=slow_tool,
+        )
+
+        self.assertEqual(functionResult["responseState"], "FAILURE")
+        self.assertEqual(
+            functionResult["responseBody"]["TEXT"]["body"],
+            "mock_tool timed out after 0.1 seconds",
+        )
+
+    async def test_default_timeout(self):
+        async def slow_coroutine():
+            await asyncio.sleep(1)
+
+        functionResult = await ProcessROC.invoke_roc_function(
+            functionInvocationInput=functionInvocationInput,
+            tool_to_invoke=slow_coroutine,
+            execution=ToolExecutionConfig(timeout=0.05),
+        )
+
+        self.assertEqual(functionResult["responseState"], "FAILURE")
+
+    async def test_tool_timeout_error_not_a_timeout(self):
+        async def fetch():
+            raise TimeoutError("Read timed out from api.example.com")
+
+        functionResult = await ProcessROC.invoke_roc_function(
+            functionInvocationInput=functionInvocationInput,
+            tool_to_invoke=fetch,
+        )
+
+        self.assertEqual(functionResult["responseState"], "FAILURE")
+        self.assertEqual(
+            str(functionResult["responseBody"]["TEXT"]["body"]),
+            "Read timed out from api.example.com",
+        )
+
+        # The same with a timeout that did not expire
+        with self.assertRaisesRegex(TimeoutError, "api.example.com"):
+            await ToolExecutionConfig(timeout=5).run(fetch, dict())
+
+    async def test_timeout_error(self):
+        with self.assertRaises(ToolTimeoutError) as error:
+            await ToolExecutionConfig().run(slow_tool, dict())
+        self.assertEqual(error.exception.timeout, 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,27 @@
+import asyncio
 import json
+import os
+import shutil
+import tempfile
+import time
 import unittest
-from InlineAgent.action_group import ActionGroup
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from InlineAgent.action_group import ActionGroup, ActionGroups
 from InlineAgent.agent.confirmation import require_confirmation
-from InlineAgent.agent import InlineAgent
+from InlineAgent.agent import CollaboratorAgent, InlineAgent
+from InlineAgent.agent.resolution import ResolutionError
+from InlineAgent.clients import Identity, client_registry
+from InlineAgent.knowledge_base import KnowledgeBasePlugin
+from InlineAgent.output import BufferedSink, null_sink
+from InlineAgent.resource_index import resource_index
+from InlineAgent.types import (
+    ReturnControlEvent,
+    TextDeltaEvent,
+    TraceEvent,
+    UsageEvent,
+)
 
 
 @require_confirmation
@@ -585,5 +604,602 @@ class TestInlineAgent(unittest.TestCase):
         self.assertEqual(agent.action_groups, data_test___init___8)
 
 
+def mock_invoke_inline_agent(answer: str, delay: float = 0.0):
+    def invoke_inline_agent(**kwargs):
+        def completion():
+            for word in answer.split(" "):
+                time.sleep(delay)
+                yield {"chunk": {"bytes": (word + " ").encode("utf8")}}
+
+        return {
+            "completion": completion(),
+            "ResponseMetadata": {"RequestId": "MOCK", "RetryAttempts": 0},
+        }
+
+    return invoke_inline_agent
+
+
+class TestInlineAgentInvoke(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.agent = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant that is responsible for getting the current weather.",
+            user_input=True,
+            agent_name="MockAgent",
+        )
+
+    async def test_invoke_concurrent(self):
+        with mock.patch("builtins.print"), mock.patch.object(
+            client_registry, "get_client"
+        ) as mock_get_client:
+            mock_get_client.return_value.invoke_inline_agent = mock_invoke_inline_agent(
+                "The weather is sunny", delay=0.1
+            )
+
+            start = time.perf_counter()
+            answers = await asyncio.gather(
+                *[
+                    self.agent.invoke(input_text="Weather?", session_id=str(idx))
+                    for idx in range(4)
+                ]
+            )
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(answers, ["The weather is sunny "] * 4)
+        # Sequential invocations would take 4 * 4 * 0.1 seconds
+        self.assertLess(elapsed, 1.2)
+
+    async def test_invoke_many(self):
+        active, max_active = 0, 0
+        answer = mock_invoke_inline_agent("The weather is sunny", delay=0.05)
+
+        def invoke_inline_agent(**kwargs):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            response = answer(**kwargs)
+            completion = response["completion"]
+
+            def tracked():
+                nonlocal active
+                yield from completion
+                active -= 1
+
+            response["completion"] = tracked()
+            return response
+
+        with mock.patch("builtins.print"), mock.patch.object(
+            client_registry, "get_client"
+        ) as mock_get_client:
+            mock_get_client.return_value.invoke_inline_agent = invoke_inline_agent
+
+            batch = await self.agent.invoke_many(
+                jobs=[
+                    "Weather?",
+                    ("Weather in NYC?", "session-1"),
+                    {"input_text": "Weather in SF?", "session_state": {}},
+                    "Weather in LA?",
+                ],
+                max_concurrency=2,
+            )
+
+        self.assertLessEqual(max_active, 2)
+        self.assertEqual(batch.succeeded, 4)
+        self.assertEqual(batch.failed, 0)
+        self.assertEqual(
+            [result.answer for result in batch.results], ["The weather is sunny "] * 4
+        )
+        self.assertEqual(batch.results[1].session_id, "session-1")
+        self.assertEqual(
+            len({result.session_id for result in batch.results}), len(batch.results)
+        )
+        self.assertGreater(batch.invocations_per_second, 0)
+
+    async def test_invoke_many_throttling(self):
+        calls = 0
+        answer = mock_invoke_inline_agent("The weather is sunny")
+
+        def invoke_inline_agent(**kwargs):
+            nonlocal calls
+            calls += 1
+            if calls <= 2:
+                raise ClientError(
+                    {"Error": {"Code": "ThrottlingException", "Message": "Slow down"}},
+                    "InvokeInlineAgent",
+                )
+            return answer(**kwargs)
+
+        with mock.patch("builtins.print"), mock.patch.object(
+            client_registry, "get_client"
+        ) as mock_get_client:
+            mock_get_client.return_value.invoke_inline_agent = invoke_inline_agent
+
+            batch = await self.agent.invoke_many(
+                jobs=["Weather?"], base_delay=0.01, max_retries=3
+            )
+
+        self.assertEqual(batch.succeeded, 1)
+        self.assertEqual(batch.results[0].attempts, 3)
+        self.assertEqual(batch.throttle_retries, 2)
+
+    async def test_invoke_many_backoff_frees_slot(self):
+        calls = list()
+        answer = mock_invoke_inline_agent("The weather is sunny")
+
+        def invoke_inline_agent(**kwargs):
+            calls.append(kwargs["inputText"])
+            if calls == ["Throttled?"]:
+                raise ClientError(
+                    {"Error": {"Code": "ThrottlingException", "Message": "Slow down"}},
+                    "InvokeInlineAgent",
+                )
+            return answer(**kwargs)
+
+        with mock.patch("builtins.print"), mock.patch.object(
+            client_registry, "get_client"
+        ) as mock_get_client, mock.patch(
+            "InlineAgent.agent.inline_agent.random.uniform", return_value=0.2
+        ):
+            mock_get_client.return_value.invoke_inline_agent = invoke_inline_agent
+
+            batch = await self.agent.invoke_many(
+                jobs=["Throttled?", "Weather?"], max_concurrency=1
+            )
+
+        # The second job ran while the first one backed off
+        self.assertEqual(calls, ["Throttled?", "Weather?", "Throttled?"])
+        self.assertEqual(batch.succeeded, 2)
+        self.assertEqual(batch.results[0].attempts, 2)
+
+    async def test_invoke_many_no_retry_after_tools_ran(self):
+        tool_calls = 0
+
+        def get_weather(location: str) -> str:
+            """Get the weather of a location.
+
+            Args:
+                location: The city
+            """
+            nonlocal tool_calls
+            tool_calls += 1
+            return "sunny"
+
+        agent = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant that is responsible for getting the current weather.",
+            action_groups=[
+                ActionGroup(
+                    name="WeatherActionGroup",
+                    tools=[get_weather],
+                    argument_key="Args:",
+                    test=True,
+                )
+            ],
+            agent_name="MockAgent",
+        )
+        requests = list()
+
+        def invoke_inline_agent(**kwargs):
+            requests.append(kwargs)
+            if len(requests) > 1:
+                # Throttled on the turn after the tool ran
+                raise ClientError(
+                    {"Error": {"Code": "ThrottlingException", "Message": "Slow down"}},
+                    "InvokeInlineAgent",
+                )
+            return {
+                "completion": iter(
+                    [
+                        {
+                            "returnControl": {
+                                "invocationId": "MOCKID",
+                                "invocationInputs": [
+                                    {
+                                        "functionInvocationInput": {
+                                            "actionGroup": "WeatherActionGroup",
+                                            "parameters": [
+                                                {
+                                                    "name": "location",
+                                                    "type": "string",
+                                                    "value": "Seattle",
+                                                }
+                                            ],
+                                            "function": "get_weather",
+                                            "actionInvocationType": "RESULT",
+                                            "agentId": "INLINE_AGENT",
+                                        }
+                                    }
+                                ],
+                            }
+                        }
+                    ]
+                ),
+                "ResponseMetadata": {"RequestId": "MOCK", "RetryAttempts": 0},
+            }
+
+        with mock.patch("builtins.print"), mock.patch.object(
+            client_registry, "get_client"
+        ) as mock_get_client:
+            mock_get_client.return_value.invoke_inline_agent = invoke_inline_agent
+
+            batch = await agent.invoke_many(jobs=["Weather?"], base_delay=0.01)
+
+        self.assertEqual(tool_calls, 1)
+        self.assertEqual(batch.failed, 1)
+        self.assertEqual(batch.results[0].attempts, 1)
+        self.assertIn("Slow down", batch.results[0].error)
+
+    async def test_invoke_many_timeout(self):
+        with mock.patch("builtins.print"), mock.patch.object(
+            client_registry, "get_client"
+        ) as mock_get_client:
+            mock_get_client.return_value.invoke_inline_agent = mock_invoke_inline_agent(
+                "The weather is sunny", delay=0.2
+            )
+
+            batch = await self.agent.invoke_many(jobs=["Weather?"], timeout=0.1)
+
+        self.assertEqual(batch.failed, 1)
+        self.assertIn("timed out", batch.results[0].error)
+
+    async def test_invoke_output_sink(self):
+        sink = BufferedSink()
+        with mock.patch("builtins.print") as mock_print, mock.patch.object(
+            client_registry, "get_client"
+        ) as mock_get_client:
+            mock_get_client.return_value.invoke_inline_agent = mock_invoke_inline_agent(
+                "The weather is sunny"
+            )
+
+            answer = await self.agent.invoke(
+                input_text="Weather?", session_id="session-1", output_sink=sink
+            )
+            quiet_answer = await self.agent.invoke(
+                input_text="Weather?", output_sink=null_sink
+            )
+
+        mock_print.assert_not_called()
+        self.assertEqual(answer, quiet_answer)
+        self.assertIn("SessionId: session-1", sink.getvalue())
+        self.assertIn("The weather is sunny", sink.getvalue())
+        self.assertIn("LLM calls", sink.getvalue())
+
+
+class TestInlineAgentStream(unittest.IsolatedAsyncioTestCase):
+    async def test_stream(self):
+        agent = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant that is responsible for getting the current weather.",
+            action_groups=[
+                ActionGroup(
+                    name="WeatherActionGroup",
+                    tools=[get_current_weather],
+                    argument_key="Args:",
+                    test=True,
+                )
+            ],
+            agent_name="MockAgent",
+        )
+        requests = list()
+
+        def invoke_inline_agent(**kwargs):
+            requests.append(kwargs)
+            if len(requests) == 1:
+                completion = [
+                    {
+                        "trace": {
+                            "trace": {
+                                "orchestrationTrace": {
+                                    "modelInvocationOutput": {
+                                        "metadata": {
+                                            "usage": {
+                                                "inputTokens": 10,
+                                                "outputTokens": 5,
+                                            }
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    },
+                    {
+                        "returnControl": {
+                            "invocationId": "MOCKID",
+                            "invocationInputs": [
+                                {
+                                    "functionInvocationInput": {
+                                        "actionGroup": "WeatherActionGroup",
+                                        "parameters": [
+                                            {
+                                                "name": "location",
+                                                "type": "string",
+                                                "value": "New York City",
+                                            },
+                                            {
+                                                "name": "state",
+                                                "type": "string",
+                                                "value": "NY",
+                                            },
+                                        ],
+                                        "function": "get_current_weather",
+                                        "actionInvocationType": "RESULT",
+                                        "agentId": "INLINE_AGENT",
+                                    }
+                                }
+                            ],
+                        }
+                    },
+                ]
+            else:
+                completion = [
+                    {"chunk": {"bytes": b"It is "}},
+                    {"chunk": {"bytes": b"sunny"}},
+                ]
+            return {
+                "completion": iter(completion),
+                "ResponseMetadata": {"RequestId": "MOCK", "RetryAttempts": 0},
+            }
+
+        with mock.patch("builtins.print"), mock.patch.object(
+            client_registry, "get_client"
+        ) as mock_get_client:
+            mock_get_client.return_value.invoke_inline_agent = invoke_inline_agent
+
+            events = [
+                event
+                async for event in agent.stream(
+                    input_text="Weather in NYC?", session_id="MOCK_SESSION"
+                )
+            ]
+
+        self.assertEqual(
+            [type(event) for event in events],
+            [
+                TraceEvent,
+                ReturnControlEvent,
+                TextDeltaEvent,
+                TextDeltaEvent,
+                UsageEvent,
+            ],
+        )
+        self.assertEqual(events[0].input_tokens, 10)
+        self.assertEqual(events[1].invocation_id, "MOCKID")
+        self.assertEqual("".join(event.text for event in events[2:4]), "It is sunny")
+        self.assertEqual(events[-1].input_tokens, 10)
+        self.assertEqual(events[-1].output_tokens, 5)
+        self.assertEqual(events[-1].llm_calls, 1)
+        self.assertEqual(events[-1].session_id, "MOCK_SESSION")
+
+        self.assertEqual(len(requests), 2)
+        self.assertNotIn("inlineSessionState", requests[0])
+        self.assertEqual(
+            requests[1]["inlineSessionState"]["returnControlInvocationResults"][0][
+                "functionResult"
+            ]["responseBody"]["TEXT"]["body"],
+            "Weather in New York City, NY is 70fahrenheit and clear skies.",
+        )
+
+
+class TestInvokeParamsCache(unittest.TestCase):
+    def setUp(self):
+        patchers = [
+            mock.patch.object(
+                CollaboratorAgent,
+                "get_agent_arn_by_name",
+                return_value="arn:aws:bedrock:us-east-1:123456789012:agent/MOCKID",
+            ),
+            mock.patch.object(
+                CollaboratorAgent,
+                "account_id",
+                new_callable=mock.PropertyMock,
+                return_value="123456789012",
+            ),
+            mock.patch.object(
+                CollaboratorAgent,
+                "region",
+                new_callable=mock.PropertyMock,
+                return_value="us-east-1",
+            ),
+            mock.patch.object(
+                CollaboratorAgent, "session", new_callable=mock.PropertyMock
+            ),
+        ]
+        self.mock_get_agent_arn_by_name = patchers[0].start()
+        for patcher in patchers[1:]:
+            patcher.start()
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+        self.collaborator = CollaboratorAgent(
+            agent_name="MockCollaborator",
+            agent_alias_id="MOCKALIAS",
+            routing_instruction="Route weather questions",
+        )
+        self.inline_collaborator = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You answer questions about locations.",
+            agent_name="MockInlineCollaborator",
+        )
+        self.supervisor = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a supervisor.",
+            agent_name="MockSupervisor",
+            agent_collaboration="SUPERVISOR",
+            collaborators=[self.collaborator, self.inline_collaborator],
+        )
+
+    def test_compiled_once(self):
+        params = self.supervisor.get_invoke_params()
+        for _ in range(3):
+            self.assertEqual(self.supervisor.get_invoke_params(), params)
+
+        self.assertEqual(self.mock_get_agent_arn_by_name.call_count, 1)
+        self.assertEqual(
+            params["collaboratorConfigurations"][0]["agentAliasArn"],
+            "arn:aws:bedrock:us-east-1:123456789012:agent-alias/MOCKID/MOCKALIAS",
+        )
+
+    def test_invalidated_on_field_change(self):
+        self.supervisor.get_invoke_params()
+
+        self.supervisor.instruction = "You are a strict supervisor."
+        self.assertEqual(
+            self.supervisor.get_invoke_params()["instruction"],
+            "You are a strict supervisor.",
+        )
+        self.assertEqual(self.mock_get_agent_arn_by_name.call_count, 1)
+
+        self.inline_collaborator.instruction = "You answer questions about maps."
+        self.assertEqual(
+            self.supervisor.get_invoke_params()["collaborators"][0]["instruction"],
+            "You answer questions about maps.",
+        )
+        self.assertEqual(self.mock_get_agent_arn_by_name.call_count, 1)
+
+        self.collaborator.routing_instruction = "Route all questions"
+        self.assertEqual(
+            self.supervisor.get_invoke_params()["collaboratorConfigurations"][0][
+                "collaboratorInstruction"
+            ],
+            "Route all questions",
+        )
+        self.assertEqual(self.mock_get_agent_arn_by_name.call_count, 2)
+
+    def test_resolved_at_construction(self):
+        self.assertEqual(self.mock_get_agent_arn_by_name.call_count, 1)
+
+        nested = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a supervisor of supervisors.",
+            agent_name="MockRoot",
+            agent_collaboration="SUPERVISOR",
+            collaborators=[self.supervisor, self.collaborator],
+        )
+        nested.get_invoke_params()
+        self.assertEqual(self.mock_get_agent_arn_by_name.call_count, 1)
+
+    def test_resolution_errors_reported_together(self):
+        self.mock_get_agent_arn_by_name.side_effect = ValueError("Agent not found")
+
+        with mock.patch.object(
+            resource_index, "get_knowledge_base_id", return_value=None
+        ), self.assertRaises(ResolutionError) as context:
+            InlineAgent(
+                foundation_model="MOCK_ID",
+                instruction="You are a supervisor.",
+                agent_name="MockSupervisor",
+                agent_collaboration="SUPERVISOR",
+                collaborators=[
+                    CollaboratorAgent(
+                        agent_name=name,
+                        agent_alias_id="MOCKALIAS",
+                        routing_instruction="Route questions",
+                    )
+                    for name in ("MockFirst", "MockSecond")
+                ],
+                knowledge_bases=[
+                    KnowledgeBasePlugin(name="MockDocs", description="Mock docs")
+                ],
+            )
+
+        self.assertEqual(
+            [name for name, _ in context.exception.errors],
+            [
+                "knowledge base MockDocs",
+                "collaborator MockFirst",
+                "collaborator MockSecond",
+            ],
+        )
+
+    def test_invalidate_invoke_params(self):
+        params = self.supervisor.get_invoke_params()
+
+        self.supervisor.guardrail_configuration["guardrailIdentifier"] = "MOCK"
+        self.assertNotIn("guardrailConfiguration", params)
+        self.supervisor.invalidate_invoke_params()
+
+        self.assertEqual(
+            self.supervisor.get_invoke_params()["guardrailConfiguration"],
+            {"guardrailIdentifier": "MOCK"},
+        )
+
+
+class TestInvokeParamsSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.snapshot_dir)
+
+        patcher = mock.patch.object(
+            client_registry,
+            "get_identity",
+            return_value=Identity(
+                account_id="123456789012",
+                arn="arn:aws:iam::123456789012:user/mock",
+                region="us-east-1",
+                expires_at=0,
+            ),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_agent(self, instruction: str = "You are a weather assistant."):
+        return InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction=instruction,
+            agent_name="MockAgent",
+            action_groups=[
+                ActionGroup(
+                    name="WeatherActionGroup",
+                    tools=[get_current_weather_confirm],
+                    argument_key="Args:",
+                    test=True,
+                )
+            ],
+            knowledge_bases=[
+                KnowledgeBasePlugin(
+                    name="SKaEdphpZh", description="Mock knowledge base"
+                )
+            ],
+            user_input=True,
+            snapshot_dir=self.snapshot_dir,
+        )
+
+    def test_snapshot_reused(self):
+        with mock.patch.object(
+            ActionGroups,
+            "_compile_action_groups",
+            autospec=True,
+            side_effect=ActionGroups._compile_action_groups,
+        ) as mock_compile, mock.patch.object(
+            KnowledgeBasePlugin,
+            "to_dict",
+            autospec=True,
+            side_effect=KnowledgeBasePlugin.to_dict,
+        ) as mock_to_dict:
+            params = self.create_agent().get_invoke_params()
+            self.assertEqual(len(os.listdir(self.snapshot_dir)), 1)
+
+            agent = self.create_agent()
+            self.assertEqual(agent.get_invoke_params(), params)
+            self.assertIn("get_current_weather_confirm", agent.tool_map)
+            self.assertEqual(mock_compile.call_count, 1)
+            self.assertEqual(mock_to_dict.call_count, 1)
+
+            # A different configuration gets its own snapshot
+            other = self.create_agent(instruction="You are a travel assistant.")
+            self.assertEqual(
+                other.get_invoke_params()["instruction"], "You are a travel assistant."
+            )
+            self.assertEqual(mock_compile.call_count, 2)
+            self.assertEqual(len(os.listdir(self.snapshot_dir)), 2)
+
+    def test_snapshot_skipped_after_change(self):
+        agent = self.create_agent()
+        agent.instruction = "You are a travel assistant."
+        agent.get_invoke_params()
+
+        self.assertEqual(os.listdir(self.snapshot_dir), [])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -3,8 +3,11 @@ import json
 import unittest
 from unittest import mock
 import asyncio
+import threading
+import time
 from InlineAgent.agent import ProcessROC
 from InlineAgent.agent.confirmation import require_confirmation
+from InlineAgent.tools.result import ToolResult
 
 
 def get_current_weather(location: str, state: str, unit: str = "fahrenheit") -> dict:
@@ -469,6 +472,111 @@ class TestProcessROC(unittest.IsolatedAsyncioTestCase):
         )
         self.assertEqual(functionResult, output_invoke_roc_function_without_confirm)
 
+    async def test_parallel_tools(self):
+        active, max_active = 0, 0
+        lock = threading.Lock()
+
+        def get_stock_price(ticker: str):
+            nonlocal active, max_active
+            with lock:
+                active += 1
+                max_active = max(max_active, active)
+            time.sleep(0.2 if ticker == "AMZN" else 0.1)
+            with lock:
+                active -= 1
+            return f"{ticker}: 100"
+
+        async def get_stock_news(ticker: str):
+            await asyncio.sleep(0.1)
+            return f"{ticker}: no news"
+
+        tools = {"get_stock_price": get_stock_price, "get_stock_news": get_stock_news}
+        requests = [
+            ("get_stock_price", "AMZN"),
+            ("get_stock_news", "AMZN"),
+            ("get_stock_price", "MSFT"),
+            ("get_stock_price", "GOOG"),
+        ]
+        roc_event = {
+            "invocationId": "MOCKID",
+            "invocationInputs": [
+                {
+                    "functionInvocationInput": {
+                        "actionGroup": "StockActionGroup",
+                        "parameters": [
+                            {"name": "ticker", "type": "string", "value": ticker}
+                        ],
+                        "function": function,
+                        "actionInvocationType": "RESULT",
+                        "agentId": "INLINE_AGENT",
+                    }
+                }
+                for function, ticker in requests
+            ],
+        }
+
+        with mock.patch("builtins.print"):
+            start = time.perf_counter()
+            session_state_output = await ProcessROC.process_roc(
+                inlineSessionState=dict(),
+                roc_event=roc_event,
+                tool_map=tools,
+            )
+            elapsed = time.perf_counter() - start
+            parallel_max_active, max_active = max_active, 0
+
+            limited_output = await ProcessROC.process_roc(
+                inlineSessionState=dict(),
+                roc_event=roc_event,
+                tool_map=tools,
+                max_concurrency=1,
+            )
+
+        bodies = [
+            result["functionResult"]["responseBody"]["TEXT"]["body"]
+            for result in session_state_output["returnControlInvocationResults"]
+        ]
+        self.assertEqual(
+            bodies, ["AMZN: 100", "AMZN: no news", "MSFT: 100", "GOOG: 100"]
+        )
+        # Sequential execution would take 0.5 seconds
+        self.assertLess(elapsed, 0.4)
+        self.assertGreater(parallel_max_active, 1)
+        self.assertEqual(limited_output, session_state_output)
+        self.assertEqual(max_active, 1)
+
+    async def test_result_files(self):
+        chart = {
+            "name": "get_chart-0.png",
+            "source": {
+                "sourceType": "BYTE_CONTENT",
+                "byteContent": {"mediaType": "image/png", "data": b"png"},
+            },
+            "useCase": "CHAT",
+        }
+
+        async def get_chart(place: str):
+            return ToolResult("[File get_chart-0.png (image/png) attached]", [chart])
+
+        event = copy.deepcopy(event_without_confirmation_one_tool_invoke)
+        function_input = event["returnControl"]["invocationInputs"][0]
+        function_input["functionInvocationInput"]["function"] = "get_chart"
+
+        with mock.patch("builtins.print"):
+            session_state_output = await ProcessROC.process_roc(
+                inlineSessionState=dict(),
+                roc_event=event["returnControl"],
+                tool_map={"get_chart": get_chart},
+            )
+
+        self.assertEqual(session_state_output["files"], [chart])
+        self.assertEqual(
+            session_state_output["returnControlInvocationResults"][0][
+                "functionResult"
+            ]["responseBody"]["TEXT"]["body"],
+            "[File get_chart-0.png (image/png) attached]",
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,55 @@
+import threading
+import unittest
+
+from InlineAgent.agent.resolution import ResolutionError, resolve_all
+
+
+class TestResolveAll(unittest.TestCase):
+    def test_results_in_order(self):
+        tasks = [(str(i), lambda i=i: i * 2) for i in range(5)]
+        self.assertEqual(resolve_all(tasks), [0, 2, 4, 6, 8])
+
+    def test_runs_concurrently(self):
+        # Only passes if all three lookups are waiting at the same time
+        barrier = threading.Barrier(3, timeout=5)
+
+        def lookup():
+            barrier.wait()
+            return "id"
+
+        self.assertEqual(
+            resolve_all([("a", lookup), ("b", lookup), ("c", lookup)]),
+            ["id", "id", "id"],
+        )
+
+    def test_errors_reported_together(self):
+        def missing(name):
+            def lookup():
+                raise ValueError(f"{name} not found")
+
+            return lookup
+
+        resolved = list()
+        tasks = [
+            ("knowledge base docs", missing("docs")),
+            ("collaborator ok", lambda: resolved.append("ok")),
+            ("collaborator weather", missing("weather")),
+        ]
+        with self.assertRaises(ResolutionError) as context:
+            resolve_all(tasks)
+
+        self.assertEqual(
+            [name for name, _ in context.exception.errors],
+            ["knowledge base docs", "collaborator weather"],
+        )
+        self.assertIn("weather not found", str(context.exception))
+        self.assertEqual(resolved, ["ok"])
+
+    def test_single_task(self):
+        self.assertEqual(resolve_all([("a", lambda: 1)]), [1])
+        with self.assertRaises(ResolutionError):
+            resolve_all([("a", lambda: 1 / 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+import threading
+import unittest
+from unittest import mock
+
+from InlineAgent.observability import Trace, agent_instrument, observe
+from InlineAgent.observability.pipeline import TracePipeline
+
+
+class TestTracePipeline(unittest.TestCase):
+    def test_processed_in_order(self):
+        processed = list()
+        pipeline = TracePipeline(handler=processed.append)
+        for i in range(100):
+            pipeline.submit(i)
+        pipeline.close()
+
+        self.assertEqual(processed, list(range(100)))
+
+    def blocked_pipeline(self, policy: str):
+        taken, release = threading.Event(), threading.Event()
+        processed = list()
+
+        def handler(item):
+            taken.set()
+            release.wait(5)
+            processed.append(item)
+
+        pipeline = TracePipeline(handler=handler, maxsize=2, policy=policy)
+        # Taken by the worker, which waits for release
+        pipeline.submit(0)
+        taken.wait(5)
+        return pipeline, release, processed
+
+    def test_drop_newest(self):
+        pipeline, release, processed = self.blocked_pipeline("drop_newest")
+        results = [pipeline.submit(i) for i in range(1, 5)]
+        release.set()
+        pipeline.close()
+
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(processed, [0, 1, 2])
+        self.assertEqual(pipeline.dropped, 2)
+
+    def test_drop_oldest(self):
+        pipeline, release, processed = self.blocked_pipeline("drop_oldest")
+        for i in range(1, 5):
+            pipeline.submit(i)
+        release.set()
+        pipeline.close()
+
+        self.assertEqual(processed, [0, 3, 4])
+        self.assertEqual(pipeline.dropped, 2)
+
+    def test_block(self):
+        pipeline, release, processed = self.blocked_pipeline("block")
+        submitter = threading.Thread(
+            target=lambda: [pipeline.submit(i) for i in range(1, 5)]
+        )
+        submitter.start()
+        submitter.join(0.1)
+        # Waiting for room in the queue
+        self.assertTrue(submitter.is_alive())
+
+        release.set()
+        submitter.join(5)
+        pipeline.close()
+        self.assertEqual(processed, [0, 1, 2, 3, 4])
+        self.assertEqual(pipeline.dropped, 0)
+
+    def test_error_raised_on_close(self):
+        def handler(item):
+            raise ValueError(f"bad trace {item}")
+
+        pipeline = TracePipeline(handler=handler)
+        pipeline.submit(1)
+        pipeline.submit(2)
+        with self.assertRaisesRegex(ValueError, "bad trace 1"):
+            pipeline.close()
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            TracePipeline(handler=print, policy="drop_all")
+
+
+def usage_event(session_id: str):
+    return {
+        "trace": {
+            "sessionId": session_id,
+            "trace": {
+                "orchestrationTrace": {
+                    "modelInvocationOutput": {
+                        "metadata": {"usage": {"inputTokens": 10, "outputTokens": 5}}
+                    }
+                }
+            },
+        }
+    }
+
+
+class TestObservePipeline(unittest.TestCase):
+    def test_traces_processed_off_the_stream(self):
+        threads = list()
+
+        def process_trace_event(**kwargs):
+            threads.append(threading.current_thread())
+
+        @observe(show_traces=False)
+        def invoke_agent(inputText: str, sessionId: str, **kwargs):
+            return {
+                "completion": [
+                    usage_event(sessionId),
+                    usage_event(sessionId),
+                    {"chunk": {"bytes": b"Answer"}},
+                ]
+            }
+
+        with mock.patch(
+            "InlineAgent.observability.agent_instrument.ProcessL2Trace.process_trace_event",
+            side_effect=process_trace_event,
+        ), mock.patch("builtins.print") as mock_print:
+            answer = invoke_agent(inputText="Question", sessionId="session")
+
+        self.assertEqual(answer, "Answer")
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertIn(
+            "using 30 tokens (in: 20, out: 10)", mock_print.call_args_list[-1].args[0]
+        )
+
+    def test_dropped_traces_saved_and_counted(self):
+        release = threading.Event()
+        processed = list()
+
+        def process_trace_event(**kwargs):
+            release.wait(5)
+            processed.append(kwargs["trace_data"])
+
+        @observe(show_traces=False, save_traces=True)
+        def invoke_agent(inputText: str, sessionId: str, **kwargs):
+            def completion():
+                for _ in range(5):
+                    yield usage_event(sessionId)
+                release.set()
+                yield {"chunk": {"bytes": b"Answer"}}
+
+            return {"completion": completion()}
+
+        with mock.patch.object(
+            agent_instrument.config, "TRACE_QUEUE_SIZE", 1
+        ), mock.patch.object(
+            agent_instrument.config, "TRACE_QUEUE_POLICY", "drop_newest"
+        ), mock.patch(
+            "InlineAgent.observability.agent_instrument.ProcessL2Trace.process_trace_event",
+            side_effect=process_trace_event,
+        ), mock.patch(
+            "InlineAgent.observability.agent_instrument.ProcessL2Trace.save_trace"
+        ) as mock_save, mock.patch(
+            "builtins.print"
+        ) as mock_print:
+            invoke_agent(inputText="Question", sessionId="session")
+
+        self.assertLess(len(processed), 5)
+        self.assertEqual(mock_save.call_count, 5)
+        self.assertIn(
+            "5 LLM calls, using 75 tokens (in: 50, out: 25)",
+            mock_print.call_args_list[-1].args[0],
+        )
+
+    def test_usage_counted_like_trace(self):
+        events = [
+            usage_event("session"),
+            # A model invocation without usage is not counted as an LLM call
+            {
+                "trace": {
+                    "sessionId": "session",
+                    "trace": {
+                        "orchestrationTrace": {
+                            "modelInvocationOutput": {"metadata": dict()}
+                        }
+                    },
+                }
+            },
+        ]
+
+        @observe(show_traces=False)
+        def invoke_agent(inputText: str, sessionId: str, **kwargs):
+            return {"completion": events + [{"chunk": {"bytes": b"Answer"}}]}
+
+        with mock.patch(
+            "InlineAgent.observability.agent_instrument.ProcessL2Trace.process_trace_event"
+        ), mock.patch("builtins.print") as mock_print:
+            invoke_agent(inputText="Question", sessionId="session")
+
+        usage = [Trace.get_usage(event["trace"]["trace"]) for event in events]
+        self.assertEqual(usage, [(10, 5, 1), (0, 0, 0)])
+        self.assertIn(
+            "1 LLM calls, using 15 tokens (in: 10, out: 5)",
+            mock_print.call_args_list[-1].args[0],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+from unittest import mock
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import StatusCode
+
+from InlineAgent.observability import agent_instrument, observe, span_manager
+from InlineAgent.observability.sampling import TraceSampler
+from InlineAgent.observability.semantics import SpanAttributes
+
+ALIAS_ARN = "arn:aws:bedrock:us-east-1:123456789012:agent-alias/AGENT/ALIAS"
+
+
+def guardrail_event(session_id: str, action: str):
+    return {
+        "trace": {
+            "sessionId": session_id,
+            "callerChain": [{"agentAliasArn": ALIAS_ARN}],
+            "trace": {"guardrailTrace": {"action": action, "inputAssessments": [{}]}},
+        }
+    }
+
+
+class TestTraceSampler(unittest.TestCase):
+    def test_head_ratio(self):
+        sampler = TraceSampler(ratio=0.25)
+        sampled = [sampler.head(f"session-{i}") for i in range(2000)]
+
+        self.assertAlmostEqual(sum(sampled) / len(sampled), 0.25, delta=0.05)
+        # The same decision for every invocation of a session
+        self.assertEqual(sampled, [sampler.head(f"session-{i}") for i in range(2000)])
+
+    def test_head_bounds(self):
+        self.assertTrue(TraceSampler(ratio=1).head("session"))
+        self.assertFalse(TraceSampler(ratio=0).head("session"))
+
+    def test_rules(self):
+        sampler = TraceSampler(
+            ratio=0,
+            rules={"AGENT:ALIAS": 1, "OTHER": 1, "support-agent": 1, "AGENT": 0},
+        )
+
+        self.assertTrue(sampler.head("session", "AGENT", "ALIAS"))
+        self.assertFalse(sampler.head("session", "AGENT", "DRAFT"))
+        self.assertTrue(sampler.head("session", "OTHER", "ALIAS"))
+        self.assertTrue(sampler.head("session", agent_name="support-agent"))
+        self.assertFalse(sampler.head("session", "UNKNOWN", "ALIAS"))
+
+    def test_tail(self):
+        sampler = TraceSampler(latency_threshold=10)
+
+        self.assertEqual(sampler.tail(True, False, 1), "error")
+        self.assertEqual(sampler.tail(False, True, 1), "guardrail_intervention")
+        self.assertEqual(sampler.tail(False, False, 10), "latency")
+        self.assertIsNone(sampler.tail(False, False, 1))
+
+    def test_tail_disabled(self):
+        sampler = TraceSampler(keep_errors=False, keep_guardrail_interventions=False)
+
+        self.assertFalse(sampler.tail_enabled)
+        self.assertIsNone(sampler.tail(True, True, 100))
+
+
+class TestObserveSampling(unittest.TestCase):
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        tracer = provider.get_tracer("test")
+
+        patchers = [
+            mock.patch.object(agent_instrument, "tracer", tracer),
+            mock.patch.object(span_manager, "tracer", tracer),
+            mock.patch.object(
+                agent_instrument.config, "PRODUCE_BEDROCK_OTEL_TRACES", True
+            ),
+            mock.patch("builtins.print"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def invoke(self, sampler: TraceSampler, events, error: Exception = None):
+        @observe(show_traces=False)
+        def invoke_agent(inputText: str, sessionId: str, **kwargs):
+            def completion():
+                yield from events
+                if error:
+                    raise error
+
+            return {"completion": completion()}
+
+        with mock.patch.object(agent_instrument, "sampler", sampler):
+            return invoke_agent(
+                inputText="Question",
+                sessionId="session",
+                agentId="AGENT",
+                agentAliasId="ALIAS",
+            )
+
+    def get_root_span(self):
+        return next(
+            span
+            for span in self.exporter.get_finished_spans()
+            if span.name == "Agent AGENT:ALIAS"
+        )
+
+    def test_sampled(self):
+        answer = self.invoke(TraceSampler(ratio=1), [{"chunk": {"bytes": b"Answer"}}])
+
+        self.assertEqual(answer, "Answer")
+        root = self.get_root_span()
+        self.assertNotIn(SpanAttributes.SAMPLING_REASON.value, root.attributes)
+
+    def test_not_sampled_builds_no_spans(self):
+        with mock.patch.object(
+            span_manager.SpanManager, "create_agent_span_return"
+        ) as mock_create:
+            answer = self.invoke(
+                TraceSampler(ratio=0),
+                [
+                    guardrail_event("session", "NONE"),
+                    {"chunk": {"bytes": b"Answer"}},
+                ],
+            )
+
+        self.assertEqual(answer, "Answer")
+        mock_create.assert_not_called()
+        self.assertEqual(self.exporter.get_finished_spans(), ())
+
+    def test_tail_keeps_guardrail_intervention(self):
+        self.invoke(
+            TraceSampler(ratio=0),
+            [
+                guardrail_event("session", "INTERVENED"),
+                {"chunk": {"bytes": b"Sorry"}},
+            ],
+        )
+
+        spans = self.exporter.get_finished_spans()
+        self.assertIn("Guardrail", [span.name for span in spans])
+        root = self.get_root_span()
+        self.assertEqual(
+            root.attributes[SpanAttributes.SAMPLING_REASON.value],
+            "guardrail_intervention",
+        )
+        self.assertEqual(root.attributes["output.value"], "Sorry")
+
+    def test_tail_keeps_slow_invocation(self):
+        self.invoke(
+            TraceSampler(ratio=0, latency_threshold=0),
+            [{"chunk": {"bytes": b"Answer"}}],
+        )
+
+        self.assertEqual(
+            self.get_root_span().attributes[SpanAttributes.SAMPLING_REASON.value],
+            "latency",
+        )
+
+    def test_tail_keeps_error(self):
+        with self.assertRaises(Exception):
+            self.invoke(
+                TraceSampler(ratio=0),
+                [guardrail_event("session", "NONE")],
+                error=RuntimeError("Stream failed"),
+            )
+
+        root = self.get_root_span()
+        self.assertEqual(root.attributes[SpanAttributes.SAMPLING_REASON.value], "error")
+        self.assertEqual(root.status.status_code, StatusCode.ERROR)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from InlineAgent.observability.trace_writer import TraceWriter, read_trace
+
+
+def trace_event(index: int):
+    return {
+        "sessionId": "session",
+        "trace": {"orchestrationTrace": {"rationale": {"text": f"step {index}"}}},
+    }
+
+
+class TestTraceWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def create_writer(self, **kwargs):
+        writer = TraceWriter(directory=self.directory, **kwargs)
+        self.addCleanup(writer.close)
+        return writer
+
+    def test_read_back_as_array(self):
+        writer = self.create_writer()
+        events = [trace_event(i) for i in range(100)]
+        for event in events:
+            writer.write("session", event)
+        writer.close()
+
+        self.assertEqual(os.listdir(self.directory), ["session.jsonl"])
+        self.assertEqual(read_trace("session", directory=self.directory), events)
+
+    def test_flushed_in_background(self):
+        writer = self.create_writer(flush_interval=0.05)
+        writer.write("session", trace_event(0))
+
+        deadline = time.monotonic() + 5
+        while not read_trace("session", directory=self.directory):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        self.assertEqual(
+            read_trace("session", directory=self.directory), [trace_event(0)]
+        )
+
+    def test_size_rotation(self):
+        line_size = len(json.dumps(trace_event(0))) + 1
+        writer = self.create_writer(max_bytes=line_size * 3)
+        events = [trace_event(i) for i in range(10)]
+        for event in events:
+            writer.write("session", event)
+        writer.close()
+
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            [
+                "session.1.jsonl",
+                "session.2.jsonl",
+                "session.3.jsonl",
+                "session.jsonl",
+            ],
+        )
+        self.assertEqual(read_trace("session", directory=self.directory), events)
+
+    def test_age_rotation(self):
+        writer = self.create_writer(max_age=0.05)
+        writer.write("session", trace_event(0))
+        time.sleep(0.1)
+        writer.write("session", trace_event(1))
+        writer.close()
+
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), ["session.1.jsonl", "session.jsonl"]
+        )
+        self.assertEqual(
+            read_trace("session", directory=self.directory),
+            [trace_event(0), trace_event(1)],
+        )
+
+    def test_gzip(self):
+        writer = self.create_writer(compression="gzip")
+        events = [trace_event(i) for i in range(5)]
+        for event in events[:3]:
+            writer.write("session", event)
+        writer.close()
+
+        # Appending after a restart adds a gzip member
+        writer = self.create_writer(compression="gzip")
+        for event in events[3:]:
+            writer.write("session", event)
+        writer.close()
+
+        self.assertEqual(os.listdir(self.directory), ["session.jsonl.gz"])
+        self.assertEqual(read_trace("session", directory=self.directory), events)
+
+    @unittest.skipUnless(
+        importlib.util.find_spec("zstandard"), "zstandard is not installed"
+    )
+    def test_zstd(self):
+        writer = self.create_writer(compression="zstd")
+        events = [trace_event(i) for i in range(5)]
+        for event in events:
+            writer.write("session", event)
+        writer.close()
+
+        self.assertEqual(read_trace("session", directory=self.directory), events)
+
+    def test_legacy_array_read_first(self):
+        with open(os.path.join(self.directory, "session.json"), "w") as f:
+            json.dump([trace_event(0)], f, indent=2)
+
+        writer = self.create_writer()
+        writer.write("session", trace_event(1))
+        writer.close()
+
+        self.assertEqual(
+            read_trace("session", directory=self.directory),
+            [trace_event(0), trace_event(1)],
+        )
+
+    def test_sessions_kept_apart(self):
+        writer = self.create_writer()
+        writer.write("first", trace_event(0))
+        writer.write("second", trace_event(1))
+        writer.close()
+
+        self.assertEqual(
+            read_trace("first", directory=self.directory), [trace_event(0)]
+        )
+        self.assertEqual(
+            read_trace("second", directory=self.directory), [trace_event(1)]
+        )
+
+    def test_read_shared_writer_without_flush(self):
+        writer = TraceWriter(directory=self.directory, compression="gzip")
+        self.addCleanup(writer.close)
+        with mock.patch("InlineAgent.observability.trace_writer.trace_writer", writer):
+            writer.write("session", trace_event(0))
+            self.assertEqual(read_trace("session"), [trace_event(0)])
+
+            # Later writes append to the same session
+            writer.write("session", trace_event(1))
+            self.assertEqual(read_trace("session"), [trace_event(0), trace_event(1)])
+
+    def test_invalid_compression(self):
+        with self.assertRaises(ValueError):
+            TraceWriter(compression="brotli")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from InlineAgent.clients import ClientRegistry
+
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("InlineAgent.clients.boto3.Session")
+        self.mock_session = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_session.return_value.client.side_effect = lambda *args, **kwargs: (
+            mock.Mock()
+        )
+
+    def test_session_reused_per_profile(self):
+        registry = ClientRegistry()
+
+        self.assertIs(registry.get_session("default"), registry.get_session("default"))
+        registry.get_session("other")
+        self.assertEqual(self.mock_session.call_count, 2)
+
+    def test_client_reused(self):
+        registry = ClientRegistry()
+
+        client = registry.get_client("bedrock-agent-runtime")
+        self.assertIs(client, registry.get_client("bedrock-agent-runtime"))
+        self.assertIsNot(client, registry.get_client("sts"))
+        self.assertIsNot(
+            client,
+            registry.get_client("bedrock-agent-runtime", region_name="eu-west-1"),
+        )
+
+    def test_client_config(self):
+        registry = ClientRegistry(max_pool_connections=123)
+        registry.get_client("bedrock-agent-runtime")
+
+        config = self.mock_session.return_value.client.call_args.kwargs["config"]
+        self.assertEqual(config.max_pool_connections, 123)
+        self.assertTrue(config.tcp_keepalive)
+
+    def test_configure_drops_clients(self):
+        registry = ClientRegistry()
+        client = registry.get_client("bedrock-agent-runtime")
+
+        registry.configure(max_pool_connections=10)
+
+        self.assertIsNot(client, registry.get_client("bedrock-agent-runtime"))
+        self.assertEqual(registry.config.max_pool_connections, 10)
+
+    def test_thread_safe(self):
+        registry = ClientRegistry()
+        clients = list()
+
+        def get_client():
+            clients.append(registry.get_client("bedrock-agent-runtime"))
+
+        threads = [threading.Thread(target=get_client) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(client) for client in clients}), 1)
+
+    def test_identity_shared(self):
+        registry = ClientRegistry()
+        sts_client = mock.Mock()
+        sts_client.get_caller_identity.return_value = {
+            "Account": "123456789012",
+            "Arn": "arn:aws:iam::123456789012:user/mock",
+        }
+        self.mock_session.return_value.client.side_effect = None
+        self.mock_session.return_value.client.return_value = sts_client
+        self.mock_session.return_value.region_name = "us-west-2"
+
+        identities = list()
+
+        def get_identity():
+            identities.append(registry.get_identity("default"))
+
+        threads = [threading.Thread(target=get_identity) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sts_client.get_caller_identity.call_count, 1)
+        self.assertEqual(len({id(identity) for identity in identities}), 1)
+        self.assertEqual(identities[0].account_id, "123456789012")
+        self.assertEqual(identities[0].region, "us-west-2")
+
+        registry.get_identity("default", refresh=True)
+        self.assertEqual(sts_client.get_caller_identity.call_count, 2)
+
+    def test_identity_expiry(self):
+        registry = ClientRegistry(identity_ttl=3600)
+        sts_client = mock.Mock()
+        sts_client.get_caller_identity.return_value = {
+            "Account": "123456789012",
+            "Arn": "arn:aws:iam::123456789012:user/mock",
+        }
+        self.mock_session.return_value.client.side_effect = None
+        self.mock_session.return_value.client.return_value = sts_client
+        # Temporary credentials that expire within the refresh margin
+        self.mock_session.return_value.get_credentials.return_value._expiry_time = (
+            datetime.now(timezone.utc) + timedelta(seconds=60)
+        )
+
+        registry.get_identity("default")
+        registry.get_identity("default")
+
+        self.assertEqual(sts_client.get_caller_identity.call_count, 2)
+
+    def test_identity_cleared_during_refresh(self):
+        registry = ClientRegistry()
+        sts_client = mock.Mock()
+        sts_client.get_caller_identity.return_value = {
+            "Account": "123456789012",
+            "Arn": "arn:aws:iam::123456789012:user/mock",
+        }
+        self.mock_session.return_value.client.side_effect = None
+        self.mock_session.return_value.client.return_value = sts_client
+        registry.get_identity("default")
+
+        identity_lock = registry._identity_lock
+
+        class ClearingLock:
+            # clear() runs after the identity was read, before the lock is taken
+            def __enter__(self):
+                registry.clear()
+                return identity_lock.__enter__()
+
+            def __exit__(self, *args):
+                return identity_lock.__exit__(*args)
+
+        registry._identity_lock = ClearingLock()
+        identity = registry.get_identity("default", refresh=True)
+
+        self.assertEqual(identity.account_id, "123456789012")
+        self.assertEqual(sts_client.get_caller_identity.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
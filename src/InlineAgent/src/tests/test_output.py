@@ -0,0 +1,50 @@
+import logging
+import unittest
+from unittest import mock
+
+from InlineAgent.output import BufferedSink, ConsoleSink, LoggerSink, NullSink
+
+
+class TestOutputSinks(unittest.TestCase):
+    def test_console_sink(self):
+        with mock.patch("builtins.print") as mock_print:
+            ConsoleSink().write("hello", end="")
+
+        mock_print.assert_called_once_with("hello", end="")
+
+    def test_null_sink(self):
+        sink = NullSink()
+        with mock.patch("builtins.print") as mock_print:
+            sink.write("hello")
+            sink.markdown("**hello**")
+
+        self.assertFalse(sink.enabled)
+        mock_print.assert_not_called()
+
+    def test_buffered_sink(self):
+        sink = BufferedSink()
+        sink.write("The weather ", end="")
+        sink.write("is sunny")
+
+        self.assertEqual(sink.getvalue(), "The weather is sunny\n")
+        sink.clear()
+        self.assertEqual(sink.getvalue(), "")
+
+    def test_logger_sink(self):
+        logger = logging.getLogger("InlineAgent.tests")
+        sink = LoggerSink(logger=logger)
+
+        with self.assertLogs(logger, level="INFO") as logs:
+            sink.write("The weather ", end="")
+            sink.write("is sunny", end="")
+            sink.flush()
+            sink.write("Done")
+
+        self.assertEqual(
+            [record.getMessage() for record in logs.records],
+            ["The weather is sunny", "Done"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import boto3
+
+from InlineAgent.agent import CollaboratorAgent
+from InlineAgent.knowledge_base import KnowledgeBasePlugin
+from InlineAgent.resource_index import ResourceIndex
+
+
+def paginate(pages):
+    paginator = mock.Mock()
+    paginator.paginate.side_effect = lambda **kwargs: iter(pages(**kwargs))
+    return paginator
+
+
+class TestResourceIndex(unittest.TestCase):
+    def setUp(self):
+        self.pages = {
+            "list_knowledge_bases": lambda: [
+                {
+                    "knowledgeBaseSummaries": [
+                        {"name": f"kb-{i}", "knowledgeBaseId": f"KB{i}"}
+                        for i in range(start, start + 100)
+                    ],
+                    **({"nextToken": "next"} if start < 200 else {}),
+                }
+                for start in (0, 100, 200)
+            ],
+            "list_agents": lambda: [
+                {"agentSummaries": [{"agentName": "weather", "agentId": "AGENT1"}]}
+            ],
+            "list_agent_aliases": lambda agentId: [
+                {
+                    "agentAliasSummaries": [
+                        {"agentAliasName": "prod", "agentAliasId": f"{agentId}PROD"}
+                    ]
+                }
+            ],
+        }
+        self.client = mock.Mock()
+        self.client.get_paginator.side_effect = lambda operation: paginate(
+            self.pages[operation]
+        )
+        self.registry = mock.Mock()
+        self.registry.get_client.return_value = self.client
+
+    def sweeps(self, operation: str) -> int:
+        return [
+            call.args[0] for call in self.client.get_paginator.call_args_list
+        ].count(operation)
+
+    def test_one_sweep_for_many_names(self):
+        index = ResourceIndex(registry=self.registry)
+
+        for i in range(300):
+            self.assertEqual(index.get_knowledge_base_id(f"kb-{i}"), f"KB{i}")
+        self.assertEqual(index.get_agent_id("weather"), "AGENT1")
+        self.assertEqual(index.get_agent_alias_id("AGENT1", "prod"), "AGENT1PROD")
+
+        self.assertEqual(self.sweeps("list_knowledge_bases"), 1)
+        self.assertEqual(self.sweeps("list_agents"), 1)
+        self.registry.get_client.assert_called_with("bedrock-agent", profile="default")
+
+    def test_unknown_name_refreshes_once(self):
+        index = ResourceIndex(min_refresh_interval=30, registry=self.registry)
+
+        # Swept just now, a miss does not sweep again
+        self.assertIsNone(index.get_agent_id("missing"))
+        self.assertIsNone(index.get_agent_id("missing"))
+        self.assertEqual(self.sweeps("list_agents"), 1)
+
+        self.pages["list_agents"] = lambda: [
+            {"agentSummaries": [{"agentName": "new", "agentId": "AGENT2"}]}
+        ]
+        self.assertIsNone(index.get_agent_id("new"))
+        self.assertEqual(self.sweeps("list_agents"), 1)
+
+        later = time.time() + 31
+        with mock.patch("InlineAgent.resource_index.time.time", return_value=later):
+            self.assertEqual(index.get_agent_id("new"), "AGENT2")
+            self.assertIsNone(index.get_agent_id("missing"))
+        self.assertEqual(self.sweeps("list_agents"), 2)
+
+    def test_miss_refreshes_without_interval(self):
+        index = ResourceIndex(min_refresh_interval=0, registry=self.registry)
+        index.get_agent_id("weather")
+
+        self.pages["list_agents"] = lambda: [
+            {"agentSummaries": [{"agentName": "new", "agentId": "AGENT2"}]}
+        ]
+        self.assertEqual(index.get_agent_id("new"), "AGENT2")
+        self.assertEqual(self.sweeps("list_agents"), 2)
+
+    def test_ttl(self):
+        index = ResourceIndex(ttl=60, registry=self.registry)
+        index.get_agent_id("weather")
+
+        later = time.time() + 61
+        with mock.patch("InlineAgent.resource_index.time.time", return_value=later):
+            index.get_agent_id("weather")
+        self.assertEqual(self.sweeps("list_agents"), 2)
+
+        index.invalidate("agent")
+        index.get_agent_id("weather")
+        self.assertEqual(self.sweeps("list_agents"), 3)
+
+    def test_concurrent_lookups_sweep_once(self):
+        index = ResourceIndex(registry=self.registry)
+        pages = self.pages["list_knowledge_bases"]
+
+        def slow_pages():
+            time.sleep(0.1)
+            return pages()
+
+        self.pages["list_knowledge_bases"] = slow_pages
+        threads = [
+            threading.Thread(target=index.get_knowledge_base_id, args=(f"kb-{i}",))
+            for i in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.sweeps("list_knowledge_bases"), 1)
+
+    def test_persisted(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "index", "resources.json")
+
+        ResourceIndex(path=path, registry=self.registry).get_agent_id("weather")
+        self.assertTrue(os.path.exists(path))
+
+        index = ResourceIndex(path=path, registry=self.registry)
+        self.assertEqual(index.get_agent_id("weather"), "AGENT1")
+        self.assertEqual(self.sweeps("list_agents"), 1)
+
+    def test_knowledge_base_plugin(self):
+        index = ResourceIndex(registry=self.registry)
+        with mock.patch(
+            "InlineAgent.knowledge_base.knowledgebase_plugin.resource_index", index
+        ):
+            for i in (5, 150, 250):
+                self.assertEqual(
+                    KnowledgeBasePlugin(name=f"kb-{i}", description="KB").to_dict()[
+                        "knowledgeBaseId"
+                    ],
+                    f"KB{i}",
+                )
+            with self.assertRaises(ValueError):
+                KnowledgeBasePlugin(name="missing", description="KB").to_dict()
+
+        self.assertEqual(self.sweeps("list_knowledge_bases"), 1)
+
+    def test_get_knowledge_base_id_by_name_pages(self):
+        session = mock.Mock(spec=boto3.Session)
+        session.client.return_value = self.client
+
+        self.assertEqual(
+            KnowledgeBasePlugin.get_knowledge_base_id_by_name("kb-250", session),
+            "KB250",
+        )
+        self.assertIsNone(
+            KnowledgeBasePlugin.get_knowledge_base_id_by_name("missing", session)
+        )
+
+    def test_collaborator_agent(self):
+        index = ResourceIndex(registry=self.registry)
+        with mock.patch(
+            "InlineAgent.agent.collaborator_agent_instance.resource_index", index
+        ):
+            self.assertEqual(
+                CollaboratorAgent.get_agent_arn_by_name(
+                    "weather", region="us-east-1", account_id="123456789012"
+                ),
+                "arn:aws:bedrock:us-east-1:123456789012:agent/AGENT1",
+            )
+            with self.assertRaises(ValueError):
+                CollaboratorAgent.get_agent_arn_by_name(
+                    "missing", region="us-east-1", account_id="123456789012"
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
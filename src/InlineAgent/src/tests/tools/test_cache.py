@@ -0,0 +1,163 @@
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from InlineAgent.agent import ProcessROC
+from InlineAgent.output import BufferedSink
+from InlineAgent.tools.cache import (
+    LRUCache,
+    MCPCacheConfig,
+    cacheable,
+    get_tool_cache,
+)
+
+functionInvocationInput = {
+    "actionGroup": "StockActionGroup",
+    "function": "get_stock_price",
+    "agentId": "INLINE_AGENT",
+}
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), (True, 1))
+        self.assertEqual(cache.get("b"), (False, None))
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl(self):
+        cache = LRUCache()
+        cache.set("a", 1, ttl=0.05)
+
+        self.assertEqual(cache.get("a"), (True, 1))
+        time.sleep(0.1)
+        self.assertEqual(cache.get("a"), (False, None))
+
+
+class TestCacheable(unittest.IsolatedAsyncioTestCase):
+    async def test_cached_result(self):
+        calls = 0
+
+        @cacheable(ttl=60)
+        def get_stock_price(ticker: str, currency: str = "USD"):
+            nonlocal calls
+            calls += 1
+            return f"{ticker}: 100 {currency}"
+
+        sink = BufferedSink()
+        results = [
+            await ProcessROC.invoke_roc_function(
+                functionInvocationInput=functionInvocationInput,
+                tool_to_invoke=get_stock_price,
+                parameters=parameters,
+                sink=sink,
+            )
+            for parameters in [
+                {"ticker": "AMZN", "currency": "USD"},
+                {"currency": "USD", "ticker": "AMZN"},
+                {"ticker": "MSFT", "currency": "USD"},
+            ]
+        ]
+
+        self.assertEqual(calls, 2)
+        self.assertEqual(results[0], results[1])
+        stats = get_tool_cache(get_stock_price).stats
+        self.assertEqual((stats.hits, stats.misses), (1, 2))
+        self.assertIn("Tool cache hit", sink.getvalue())
+        self.assertIn("(hits: 1, misses: 2)", sink.getvalue())
+
+    async def test_failure_not_cached(self):
+        calls = 0
+
+        @cacheable
+        async def get_stock_price(ticker: str):
+            nonlocal calls
+            calls += 1
+            raise RuntimeError("Service unavailable")
+
+        with mock.patch("builtins.print"):
+            for _ in range(2):
+                functionResult = await ProcessROC.invoke_roc_function(
+                    functionInvocationInput=functionInvocationInput,
+                    tool_to_invoke=get_stock_price,
+                    parameters={"ticker": "AMZN"},
+                )
+
+        self.assertEqual(calls, 2)
+        self.assertEqual(functionResult["responseState"], "FAILURE")
+
+    def test_same_name_shared_backend(self):
+        backend = LRUCache()
+
+        def create_tool(module: str, weather: str):
+            def get_weather(city: str):
+                return f"{city}: {weather}"
+
+            get_weather.__module__ = module
+            return cacheable(backend=backend)(get_weather)
+
+        sunny = create_tool("weather.sunny", "Sunny")
+        rainy = create_tool("weather.rainy", "Rainy")
+        sunny_cache, rainy_cache = get_tool_cache(sunny), get_tool_cache(rainy)
+
+        sunny_cache.set({"city": "Seattle"}, sunny(city="Seattle"))
+        self.assertEqual(rainy_cache.get({"city": "Seattle"}), (False, None))
+        rainy_cache.set({"city": "Seattle"}, rainy(city="Seattle"))
+        self.assertEqual(sunny_cache.get({"city": "Seattle"}), (True, "Seattle: Sunny"))
+
+        # A shared backend keeps the results of the other tools
+        rainy_cache.clear()
+        self.assertEqual(len(backend), 2)
+        self.assertEqual(sunny_cache.get({"city": "Seattle"}), (True, "Seattle: Sunny"))
+
+    def test_clear_own_backend(self):
+        @cacheable
+        def get_weather(city: str):
+            return "Sunny"
+
+        cache = get_tool_cache(get_weather)
+        cache.set({"city": "Seattle"}, "Sunny")
+        cache.clear()
+        self.assertEqual(len(cache.backend), 0)
+
+
+class TestMCPCacheConfig(unittest.TestCase):
+    def test_annotations(self):
+        config = MCPCacheConfig(ttl=10, overrides={"write": True})
+        tools = {
+            "dict": SimpleNamespace(name="dict", annotations={"readOnlyHint": True}),
+            "object": SimpleNamespace(
+                name="object",
+                annotations=SimpleNamespace(readOnlyHint=None, idempotentHint=True),
+            ),
+            "none": SimpleNamespace(name="none"),
+            "write": SimpleNamespace(name="write", annotations={"readOnlyHint": False}),
+        }
+
+        self.assertEqual(config.get_ttl(tools["dict"]), (True, 10))
+        self.assertEqual(config.get_ttl(tools["object"]), (True, 10))
+        self.assertEqual(config.get_ttl(tools["none"]), (False, 10))
+        self.assertEqual(config.get_ttl(tools["write"]), (True, 10))
+        self.assertIsNone(config.create_cache(tools["none"]))
+
+    def test_shared_backend(self):
+        backend = LRUCache()
+        config = MCPCacheConfig(backend=backend, namespace="jira")
+        cache = config.create_cache(
+            SimpleNamespace(name="get_issue", annotations={"readOnlyHint": True})
+        )
+
+        cache.set({"b": 1, "a": 2}, "issue")
+        self.assertEqual(
+            backend.get('jira:get_issue:{"a": 2, "b": 1}'), (True, "issue")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
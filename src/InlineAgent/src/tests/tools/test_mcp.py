@@ -0,0 +1,496 @@
+import asyncio
+import unittest
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import List
+from unittest import mock
+
+import anyio
+from mcp import types
+from mcp.server.lowlevel import Server
+from mcp.shared.memory import create_client_server_memory_streams
+
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+from InlineAgent.agent import ProcessROC
+from InlineAgent.tools.cache import MCPCacheConfig, get_tool_cache
+from InlineAgent.tools.mcp import MCPServer, MCPStdio
+from InlineAgent.tools.session_pool import MCPSessionPool
+
+
+class MockMCPServer:
+    """In-memory MCP server that counts tools/list requests."""
+
+    def __init__(self, tools: List[types.Tool]):
+        self.tools = list(tools)
+        self.list_tools_calls = 0
+        self.call_sessions = []
+        self.calls = []
+        self.server_scopes = []
+        self.server = Server("mock")
+
+        @self.server.list_tools()
+        async def list_tools() -> List[types.Tool]:
+            self.list_tools_calls += 1
+            return self.tools
+
+        @self.server.call_tool()
+        async def call_tool(name: str, arguments: dict) -> List[types.TextContent]:
+            self.calls.append(name)
+            if name == "add_tool":
+                self.tools.append(
+                    create_tool(arguments["tool_name"], "A tool added at runtime")
+                )
+                await self.server.request_context.session.send_tool_list_changed()
+                return [types.TextContent(type="text", text="added")]
+            if name == "slow_tool":
+                self.call_sessions.append(id(self.server.request_context.session))
+                await anyio.sleep(0.1)
+            return [types.TextContent(type="text", text=f"{name}: {arguments}")]
+
+    async def serve(self, server_streams):
+        with anyio.CancelScope() as scope:
+            self.server_scopes.append(scope)
+            await self.server.run(
+                server_streams[0],
+                server_streams[1],
+                self.server.create_initialization_options(),
+            )
+
+    def kill(self, index: int):
+        """Stop answering on a connection, like a server process that hangs."""
+        self.server_scopes[index].cancel()
+
+    @asynccontextmanager
+    async def transport(self):
+        async with create_client_server_memory_streams() as (
+            client_streams,
+            server_streams,
+        ):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(self.serve, server_streams)
+                try:
+                    yield client_streams
+                finally:
+                    tg.cancel_scope.cancel()
+
+
+@asynccontextmanager
+async def hanging_transport():
+    await anyio.sleep_forever()
+    yield
+
+
+@asynccontextmanager
+async def failing_transport():
+    raise ConnectionError("server exited")
+    yield
+
+
+def create_tool(name: str, description: str, **properties) -> types.Tool:
+    return types.Tool(
+        name=name,
+        description=description,
+        inputSchema={
+            "type": "object",
+            "properties": {
+                key: {"type": value, "description": f"The {key}"}
+                for key, value in properties.items()
+            },
+            "required": list(properties)[:1],
+        },
+    )
+
+
+weather_tools = [
+    create_tool("get_weather", "Get the weather", city="string", days="integer"),
+    create_tool("get_time", "Get the time", timezone="string"),
+    create_tool("add_tool", "Add a tool", tool_name="string"),
+]
+
+
+class TestMCPServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = mock.patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_single_list_tools(self):
+        server = MockMCPServer(weather_tools)
+        client = await MCPStdio.connect(server.transport())
+        try:
+            self.assertEqual(server.list_tools_calls, 1)
+            self.assertEqual(
+                [function["name"] for function in client.function_schema["functions"]],
+                ["get_weather", "get_time", "add_tool"],
+            )
+            self.assertEqual(
+                client.function_schema["functions"][0]["parameters"],
+                {
+                    "city": {
+                        "description": "The city",
+                        "type": "string",
+                        "required": True,
+                    },
+                    "days": {
+                        "description": "The days",
+                        "type": "integer",
+                        "required": False,
+                    },
+                },
+            )
+            self.assertEqual(
+                await client.callable_tools["get_time"](timezone="UTC"),
+                "get_time: {'timezone': 'UTC'}",
+            )
+
+            await client.set_available_tools(tools_to_use={"get_weather"})
+            self.assertEqual(list(client.callable_tools), ["get_weather"])
+            self.assertEqual(len(client.function_schema["functions"]), 1)
+            self.assertEqual(server.list_tools_calls, 1)
+        finally:
+            await client.cleanup()
+
+    async def test_list_changed(self):
+        server = MockMCPServer(weather_tools)
+        client = await MCPStdio.connect(server.transport())
+        try:
+            get_weather = client.callable_tools["get_weather"]
+            await client.callable_tools["add_tool"](tool_name="get_forecast")
+            await client._refresh_task
+
+            self.assertEqual(server.list_tools_calls, 2)
+            self.assertIn("get_forecast", client.callable_tools)
+            self.assertIs(client.callable_tools["get_weather"], get_weather)
+        finally:
+            await client.cleanup()
+
+    async def test_list_changed_single_refresh(self):
+        server = MockMCPServer(weather_tools)
+        client = await MCPStdio.connect(server.transport())
+        notification = types.ServerNotification(
+            types.ToolListChangedNotification(method="notifications/tools/list_changed")
+        )
+        try:
+            for _ in range(3):
+                await client._handle_message(notification)
+            refresh_task = client._refresh_task
+            await client._handle_message(notification)
+            self.assertIs(client._refresh_task, refresh_task)
+
+            await refresh_task
+            # Notifications received before the refresh ran share it
+            self.assertEqual(server.list_tools_calls, 2)
+
+            with mock.patch.object(
+                client, "refresh_tools", side_effect=RuntimeError("Broken pipe")
+            ):
+                with self.assertLogs("InlineAgent.tools.mcp", "ERROR"):
+                    await client._handle_message(notification)
+                    await client._refresh_task
+        finally:
+            await client.cleanup()
+
+    async def test_too_many_parameters(self):
+        tool = create_tool(
+            "too_many", "Too many", **{f"p{i}": "string" for i in range(6)}
+        )
+
+        with self.assertRaises(ValueError):
+            MCPServer.to_function(tool)
+
+
+class TestCreateMany(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = mock.patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_start_many(self):
+        servers = [MockMCPServer(weather_tools[:1]), MockMCPServer(weather_tools[1:])]
+
+        async with MCPServer.start_many(
+            *[MCPStdio.connect(server.transport()) for server in servers]
+        ) as clients:
+            self.assertEqual(list(clients[0].callable_tools), ["get_weather"])
+            self.assertEqual(list(clients[1].callable_tools), ["get_time", "add_tool"])
+            self.assertEqual(
+                await clients[1].callable_tools["get_time"](timezone="UTC"),
+                "get_time: {'timezone': 'UTC'}",
+            )
+
+        for client in clients:
+            with self.assertRaises(Exception):
+                await client.session.list_tools()
+
+    async def test_failures_do_not_stall_others(self):
+        server = MockMCPServer(weather_tools)
+
+        start = time.perf_counter()
+        async with AsyncExitStack() as exit_stack:
+            client, hanging, failing = await MCPServer.create_many(
+                MCPStdio.connect(server.transport()),
+                MCPStdio.connect(hanging_transport()),
+                MCPStdio.connect(failing_transport()),
+                timeout=0.2,
+                return_exceptions=True,
+                exit_stack=exit_stack,
+            )
+            self.assertLess(time.perf_counter() - start, 1)
+            self.assertIsInstance(client, MCPServer)
+            self.assertIsInstance(hanging, TimeoutError)
+            self.assertIsInstance(failing, ConnectionError)
+            self.assertEqual(server.list_tools_calls, 1)
+
+        self.assertTrue(client._runner_task.done())
+
+    async def test_failure_closes_started_servers(self):
+        server = MockMCPServer(weather_tools)
+
+        with mock.patch.object(
+            MCPServer, "cleanup_many", wraps=MCPServer.cleanup_many
+        ) as cleanup_many:
+            with self.assertRaises(RuntimeError) as error:
+                await MCPServer.create_many(
+                    MCPStdio.connect(server.transport()),
+                    MCPStdio.connect(failing_transport()),
+                )
+
+        self.assertIsInstance(error.exception.__cause__, ConnectionError)
+        (clients,) = cleanup_many.call_args.args
+        self.assertEqual(len(clients), 1)
+        self.assertTrue(clients[0]._runner_task.done())
+
+
+class TestMCPSessionPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = mock.patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_concurrent_calls_use_all_sessions(self):
+        server = MockMCPServer(
+            weather_tools + [create_tool("slow_tool", "Slow", value="string")]
+        )
+        client = await MCPStdio.connect_pool(server.transport, pool_size=3)
+        try:
+            self.assertEqual(len(server.server_scopes), 3)
+            self.assertEqual(server.list_tools_calls, 1)
+
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *[client.callable_tools["slow_tool"](value=str(i)) for i in range(3)]
+            )
+            self.assertLess(time.perf_counter() - start, 0.25)
+            self.assertEqual(results[2], "slow_tool: {'value': '2'}")
+            self.assertEqual(len(set(server.call_sessions)), 3)
+        finally:
+            await client.cleanup()
+
+        with self.assertRaises(RuntimeError):
+            await client.session.list_tools()
+
+    async def test_restarts_unhealthy_session(self):
+        server = MockMCPServer(weather_tools)
+        pool = MCPSessionPool(
+            server.transport,
+            size=2,
+            health_check_interval=0.05,
+            health_check_timeout=0.1,
+        )
+        for member in pool.members:
+            member.restart_delay = 0
+        await pool.start()
+        try:
+            server.kill(0)
+            for _ in range(50):
+                if pool.members[0].restarts and pool.members[0].healthy:
+                    break
+                await asyncio.sleep(0.05)
+
+            self.assertEqual(pool.members[0].restarts, 1)
+            self.assertEqual(pool.members[1].restarts, 0)
+            self.assertEqual(len(server.server_scopes), 3)
+
+            result = await pool.call_tool("get_time", {"timezone": "UTC"})
+            self.assertEqual(result.content[0].text, "get_time: {'timezone': 'UTC'}")
+        finally:
+            await pool.close()
+
+    async def test_least_busy(self):
+        pool = MCPSessionPool(MockMCPServer(weather_tools).transport, size=3)
+        await pool.start()
+        try:
+            pool.members[0].in_flight = 2
+            pool.members[1].in_flight = 1
+            pool.members[2].in_flight = 3
+            self.assertIs(await pool.acquire(), pool.members[1])
+
+            pool.members[1].restart()
+            self.assertIs(await pool.acquire(), pool.members[0])
+        finally:
+            await pool.close()
+
+    async def test_start_failure(self):
+        with self.assertRaises(RuntimeError) as error:
+            await MCPSessionPool(failing_transport, size=2).start()
+        self.assertIsInstance(error.exception.__cause__, ConnectionError)
+
+    async def test_acquire_times_out_with_last_error(self):
+        server = MockMCPServer(weather_tools)
+        transports = iter([server.transport])
+        pool = MCPSessionPool(
+            lambda: next(transports, failing_transport)(),
+            size=1,
+            acquire_timeout=0.2,
+        )
+        pool.members[0].restart_delay = 0.01
+        await pool.start()
+        try:
+            # Every restart of the server process fails
+            pool.members[0].restart()
+            with self.assertRaises(RuntimeError) as error:
+                await pool.call_tool("get_time", {"timezone": "UTC"})
+            self.assertIsInstance(error.exception.__cause__, ConnectionError)
+            self.assertGreater(pool.members[0].restarts, 0)
+        finally:
+            await pool.close()
+
+    async def test_close_wakes_waiting_calls(self):
+        server = MockMCPServer(weather_tools)
+        pool = MCPSessionPool(server.transport, size=1, acquire_timeout=None)
+        pool.members[0].restart_delay = 10
+        await pool.start()
+        pool.members[0].restart()
+
+        call = asyncio.ensure_future(pool.call_tool("get_time", {"timezone": "UTC"}))
+        await asyncio.sleep(0.05)
+        self.assertFalse(call.done())
+
+        await pool.close()
+        with self.assertRaises(RuntimeError):
+            await asyncio.wait_for(call, 1)
+
+
+def annotate(tool: types.Tool, **annotations) -> types.Tool:
+    return types.Tool(**tool.model_dump(), annotations=annotations)
+
+
+def roc_event(function: str, **parameters) -> dict:
+    return {
+        "invocationId": "MOCKID",
+        "invocationInputs": [
+            {
+                "functionInvocationInput": {
+                    "actionGroup": "WeatherActionGroup",
+                    "parameters": [
+                        {"name": name, "type": "string", "value": value}
+                        for name, value in parameters.items()
+                    ],
+                    "function": function,
+                    "actionInvocationType": "RESULT",
+                    "agentId": "INLINE_AGENT",
+                }
+            }
+        ],
+    }
+
+
+class TestMCPCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = mock.patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.server = MockMCPServer(
+            [
+                annotate(weather_tools[0], readOnlyHint=True),
+                annotate(weather_tools[1], idempotentHint=True),
+                annotate(weather_tools[2], readOnlyHint=False),
+            ]
+        )
+
+    async def test_read_only_tools_are_cached(self):
+        reader = InMemoryMetricReader()
+        counter = (
+            MeterProvider(metric_readers=[reader])
+            .get_meter("test")
+            .create_counter("inline_agent.tool_cache.requests")
+        )
+        client = await MCPStdio.connect(
+            self.server.transport(), cache=MCPCacheConfig(ttl=60)
+        )
+        try:
+            self.assertIsNotNone(get_tool_cache(client.callable_tools["get_weather"]))
+            self.assertIsNone(get_tool_cache(client.callable_tools["add_tool"]))
+
+            with mock.patch(
+                "InlineAgent.observability.metrics.tool_cache_requests", counter
+            ):
+                for _ in range(3):
+                    output = await ProcessROC.process_roc(
+                        inlineSessionState=dict(),
+                        roc_event=roc_event("get_weather", city="Seattle"),
+                        tool_map=client.callable_tools,
+                    )
+                await ProcessROC.process_roc(
+                    inlineSessionState=dict(),
+                    roc_event=roc_event("get_weather", city="Paris"),
+                    tool_map=client.callable_tools,
+                )
+
+            self.assertEqual(self.server.calls, ["get_weather", "get_weather"])
+            self.assertEqual(
+                output["returnControlInvocationResults"][0]["functionResult"][
+                    "responseBody"
+                ]["TEXT"]["body"],
+                "get_weather: {'city': 'Seattle'}",
+            )
+            cache = get_tool_cache(client.callable_tools["get_weather"])
+            self.assertEqual(cache.name, "mcp:get_weather")
+            self.assertEqual(cache.stats.hit_rate, 0.5)
+
+            points = {
+                point.attributes["cache.result"]: point.value
+                for metric in reader.get_metrics_data()
+                .resource_metrics[0]
+                .scope_metrics[0]
+                .metrics
+                for point in metric.data.data_points
+            }
+            self.assertEqual(points, {"hit": 2, "miss": 2})
+        finally:
+            await client.cleanup()
+
+    async def test_overrides(self):
+        client = await MCPStdio.connect(
+            self.server.transport(),
+            cache=MCPCacheConfig(overrides={"get_weather": False, "add_tool": 5}),
+        )
+        try:
+            self.assertIsNone(get_tool_cache(client.callable_tools["get_weather"]))
+            self.assertEqual(get_tool_cache(client.callable_tools["add_tool"]).ttl, 5)
+            self.assertEqual(get_tool_cache(client.callable_tools["get_time"]).ttl, 300)
+        finally:
+            await client.cleanup()
+
+    async def test_cache_survives_refresh(self):
+        client = await MCPStdio.connect(self.server.transport(), cache=MCPCacheConfig())
+        try:
+            cache = get_tool_cache(client.callable_tools["get_weather"])
+            await client.refresh_tools()
+            self.assertIs(get_tool_cache(client.callable_tools["get_weather"]), cache)
+        finally:
+            await client.cleanup()
+
+    async def test_disabled_by_default(self):
+        client = await MCPStdio.connect(self.server.transport())
+        try:
+            self.assertIsNone(get_tool_cache(client.callable_tools["get_weather"]))
+        finally:
+            await client.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import base64
+import unittest
+
+from mcp import types
+
+from InlineAgent.tools.result import MCPResultAdapter, ToolResult
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256))
+
+
+def call_result(*content) -> types.CallToolResult:
+    return types.CallToolResult(content=list(content))
+
+
+def text(value: str) -> types.TextContent:
+    return types.TextContent(type="text", text=value)
+
+
+def image(data: bytes) -> types.ImageContent:
+    return types.ImageContent(
+        type="image", data=base64.b64encode(data).decode(), mimeType="image/png"
+    )
+
+
+class TestMCPResultAdapter(unittest.TestCase):
+    def test_text_blocks(self):
+        result = MCPResultAdapter().adapt(
+            "get_logs", call_result(text("first"), text("second"))
+        )
+
+        self.assertIsInstance(result, ToolResult)
+        self.assertEqual(result, "first\nsecond")
+        self.assertEqual(result.files, [])
+        self.assertFalse(result.truncated)
+
+    def test_image_and_resources(self):
+        result = MCPResultAdapter(file_use_case="CODE_INTERPRETER").adapt(
+            "get_chart",
+            call_result(
+                image(PNG),
+                text("A chart"),
+                types.EmbeddedResource(
+                    type="resource",
+                    resource=types.TextResourceContents(
+                        uri="file:///report.md", text="# Report"
+                    ),
+                ),
+                types.EmbeddedResource(
+                    type="resource",
+                    resource=types.BlobResourceContents(
+                        uri="file:///data.bin", blob=base64.b64encode(b"\x00\x01")
+                    ),
+                ),
+            ),
+        )
+
+        self.assertEqual(
+            result,
+            "A chart\n# Report\n"
+            "[File get_chart-0.png (image/png) attached]\n"
+            "[File get_chart-3.bin (application/octet-stream) attached]",
+        )
+        self.assertEqual(
+            result.files[0],
+            {
+                "name": "get_chart-0.png",
+                "source": {
+                    "sourceType": "BYTE_CONTENT",
+                    "byteContent": {"mediaType": "image/png", "data": PNG},
+                },
+                "useCase": "CODE_INTERPRETER",
+            },
+        )
+        self.assertEqual(result.files[1]["source"]["byteContent"]["data"], b"\x00\x01")
+
+    def test_image_only(self):
+        result = MCPResultAdapter().adapt("get_chart", call_result(image(PNG)))
+
+        self.assertEqual(result, "[File get_chart-0.png (image/png) attached]")
+        self.assertEqual(len(result.files), 1)
+
+    def test_size_budget(self):
+        adapter = MCPResultAdapter(max_chars=10, max_file_bytes=len(PNG) - 1)
+        result = adapter.adapt(
+            "get_logs", call_result(text("a" * 8), text("b" * 8), image(PNG))
+        )
+
+        self.assertTrue(result.truncated)
+        self.assertEqual(result.original_length, 17)
+        self.assertEqual(result.files, [])
+        self.assertEqual(
+            result,
+            "aaaaaaaa\nb\n"
+            f"[File get_logs-2.png of {len(PNG)} bytes left out, the limit is {len(PNG) - 1} bytes]\n"
+            "[Truncated to 10 of 17 characters]",
+        )
+
+    def test_empty(self):
+        self.assertEqual(MCPResultAdapter().adapt("noop", call_result()), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
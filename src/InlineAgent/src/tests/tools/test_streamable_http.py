@@ -0,0 +1,161 @@
+import json
+import unittest
+from typing import List, Tuple
+from unittest import mock
+
+import httpx
+from mcp import types
+
+from InlineAgent.tools.mcp import MCPHttp
+from InlineAgent.tools.streamable_http import parse_messages
+
+URL = "http://mcp.example.com/mcp"
+SESSION_ID = "session-1"
+
+
+def to_json(model) -> dict:
+    return model.model_dump(by_alias=True, mode="json", exclude_none=True)
+
+
+def response_message(request_id, result) -> str:
+    return json.dumps({"jsonrpc": "2.0", "id": request_id, "result": to_json(result)})
+
+
+def sse_response(events: List[Tuple[str, str]], drop: bool = False):
+    async def stream():
+        for event_id, data in events:
+            yield f"id: {event_id}\ndata: {data}\n\n".encode()
+        if drop:
+            raise httpx.ReadError("connection reset by load balancer")
+
+    return httpx.Response(
+        200, headers={"content-type": "text/event-stream"}, content=stream()
+    )
+
+
+class FakeStreamableServer:
+    """Answers tools/list with an event stream and drops the first tools/call."""
+
+    def __init__(self):
+        self.requests = list()
+        self.replay = dict()
+        self.terminated = False
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "DELETE":
+            self.terminated = request.headers.get("mcp-session-id") == SESSION_ID
+            return httpx.Response(200)
+
+        if request.method == "GET":
+            last_event_id = request.headers.get("last-event-id")
+            if last_event_id not in self.replay:
+                return httpx.Response(405)
+            return sse_response([self.replay.pop(last_event_id)])
+
+        body = json.loads(request.content)
+        self.requests.append((body.get("method"), request.headers))
+        if "id" not in body:
+            return httpx.Response(202)
+
+        method, request_id = body["method"], body["id"]
+        if method == "initialize":
+            result = types.InitializeResult(
+                protocolVersion=types.LATEST_PROTOCOL_VERSION,
+                capabilities=types.ServerCapabilities(tools=types.ToolsCapability()),
+                serverInfo=types.Implementation(name="fake", version="1.0"),
+            )
+            return httpx.Response(
+                200,
+                headers={
+                    "content-type": "application/json",
+                    "mcp-session-id": SESSION_ID,
+                },
+                content=response_message(request_id, result),
+            )
+
+        if request.headers.get("mcp-session-id") != SESSION_ID:
+            return httpx.Response(400)
+
+        if method == "tools/list":
+            result = types.ListToolsResult(
+                tools=[
+                    types.Tool(
+                        name="get_time",
+                        description="Get the time",
+                        inputSchema={
+                            "type": "object",
+                            "properties": {"timezone": {"type": "string"}},
+                        },
+                    )
+                ]
+            )
+            return sse_response([("list-1", response_message(request_id, result))])
+
+        if method == "tools/call":
+            arguments = body["params"]["arguments"]
+            result = types.CallToolResult(
+                content=[types.TextContent(type="text", text=f"time in {arguments}")]
+            )
+            self.replay["call-1"] = ("call-2", response_message(request_id, result))
+            progress = json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "method": "notifications/message",
+                    "params": {"level": "info", "data": "working"},
+                }
+            )
+            return sse_response([("call-1", progress)], drop=True)
+
+        return httpx.Response(404)
+
+
+class TestStreamableHttp(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = mock.patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_resumes_dropped_stream(self):
+        server = FakeStreamableServer()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(server.handle)
+        ) as http_client:
+            client = await MCPHttp.create(
+                url=URL,
+                transport="streamable-http",
+                http_client=http_client,
+                compression=False,
+            )
+            try:
+                self.assertEqual(list(client.callable_tools), ["get_time"])
+                self.assertEqual(
+                    await client.callable_tools["get_time"](timezone="UTC"),
+                    "time in {'timezone': 'UTC'}",
+                )
+            finally:
+                await client.cleanup()
+
+            # The shared client stays open
+            self.assertFalse(http_client.is_closed)
+
+        self.assertTrue(server.terminated)
+        self.assertEqual(
+            [method for method, _ in server.requests],
+            ["initialize", "notifications/initialized", "tools/list", "tools/call"],
+        )
+        self.assertNotIn("mcp-session-id", server.requests[0][1])
+        for _, headers in server.requests[1:]:
+            self.assertEqual(headers["mcp-session-id"], SESSION_ID)
+            self.assertEqual(headers["accept-encoding"], "identity")
+
+    def test_parse_messages(self):
+        ping = {"jsonrpc": "2.0", "id": 1, "method": "ping"}
+        self.assertEqual(parse_messages(b""), [])
+        self.assertEqual(len(parse_messages(json.dumps([ping, ping]).encode())), 2)
+        self.assertIsInstance(
+            parse_messages(json.dumps(ping).encode())[0].root, types.JSONRPCRequest
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()